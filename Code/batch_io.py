@@ -0,0 +1,142 @@
+"""
+Chunked readers for batch anonymization inputs.
+
+Every reader yields pandas DataFrames of at most ``chunksize`` rows so large inputs never
+have to be loaded (or converted to CSV) in full:
+  - CSV via ``pd.read_csv(chunksize=...)`` with a latin-1 fallback,
+  - XLSX via openpyxl in ``read_only`` row-streaming mode,
+  - Parquet via pyarrow, one record batch at a time within each row group.
+Sources can be filesystem paths or file-like objects with a ``name`` (e.g. Streamlit uploads).
+"""
+
+import codecs
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+CSV_EXTENSIONS = (".csv",)
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + XLSX_EXTENSIONS + PARQUET_EXTENSIONS
+
+DEFAULT_CHUNKSIZE = 5000
+SCAN_BLOCK_BYTES = 1 << 20
+
+
+def source_name(source) -> str:
+    return str(getattr(source, "name", source))
+
+
+def source_extension(source) -> str:
+    return Path(source_name(source)).suffix.lower()
+
+
+def _rewind(source) -> None:
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def detect_csv_encoding(source) -> str:
+    """'utf-8' if the whole source decodes as UTF-8, otherwise 'latin-1' (which decodes any bytes)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    f = open(source, "rb") if isinstance(source, (str, Path)) else source
+    _rewind(f)
+    try:
+        while True:
+            block = f.read(SCAN_BLOCK_BYTES)
+            if not isinstance(block, bytes):
+                # Already decoded text (e.g. a StringIO)
+                return "utf-8"
+            decoder.decode(block, final=not block)
+            if not block:
+                return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+    finally:
+        if f is not source:
+            f.close()
+        else:
+            _rewind(source)
+
+
+def iter_csv_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV in chunks, as latin-1 if it is not valid UTF-8 anywhere. The encoding is
+    decided by one scan of the bytes up front, since chunks that were already yielded
+    cannot be taken back when a bad byte turns up later in the file.
+    """
+    encoding = detect_csv_encoding(source)
+    _rewind(source)
+    yield from pd.read_csv(source, chunksize=chunksize, encoding=encoding)
+
+
+def iter_xlsx_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE,
+                     sheet: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Stream a worksheet (the active one by default) row by row in openpyxl read-only mode."""
+    from openpyxl import load_workbook
+
+    _rewind(source)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"column_{i}" for i, c in enumerate(header)]
+        buffer: List[tuple] = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_parquet_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE,
+                        columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Stream a Parquet file row group by row group, in record batches of ``chunksize`` rows."""
+    import pyarrow.parquet as pq
+
+    _rewind(source)
+    parquet_file = pq.ParquetFile(source)
+    for group in range(parquet_file.num_row_groups):
+        for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=[group], columns=columns):
+            yield batch.to_pandas()
+
+
+def iter_table_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Dispatch to the chunked reader matching the source's file extension."""
+    ext = source_extension(source)
+    if ext in CSV_EXTENSIONS:
+        return iter_csv_chunks(source, chunksize)
+    if ext in XLSX_EXTENSIONS:
+        return iter_xlsx_chunks(source, chunksize)
+    if ext in PARQUET_EXTENSIONS:
+        return iter_parquet_chunks(source, chunksize)
+    raise ValueError(f"Unsupported file type '{ext}' for {source_name(source)}. "
+                     f"Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+def table_columns(source) -> List[str]:
+    """Column names of a table source as its chunked reader returns them (CSVs: header row only)."""
+    if source_extension(source) in CSV_EXTENSIONS:
+        _rewind(source)
+        try:
+            columns = pd.read_csv(source, nrows=0).columns
+        except UnicodeDecodeError:
+            _rewind(source)
+            columns = pd.read_csv(source, nrows=0, encoding="latin-1").columns
+        _rewind(source)
+        return list(columns)
+    first = next(iter_table_chunks(source, chunksize=1), None)
+    return list(first.columns) if first is not None else []
+
+
+def list_table_files(folder: Path) -> List[Path]:
+    """All supported tabular files directly inside ``folder``, sorted by name."""
+    return sorted(p for p in Path(folder).iterdir() if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS)
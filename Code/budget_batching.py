@@ -0,0 +1,229 @@
+"""
+Budget-based batching for inference.
+
+A fixed ``nlp.pipe`` batch size is either too small for short rows or too large once a
+few long documents (extracted PDFs, multi-paragraph cells) land in the same batch.
+``BudgetBatcher`` instead fills each batch up to a character (or estimated token) budget:
+  - documents longer than ``max_doc_chars`` are split at line breaks (or spaces) and the
+    pieces are batched like any other text; entity offsets are shifted back afterwards,
+  - with ``rss_limit_mb`` the process RSS is checked after every batch: above 90% of the
+    ceiling the budget is halved (down to ``min_budget``), below 60% it grows back towards
+    the configured budget.
+The budget only decides which texts share a batch; a text (or piece) larger than the
+budget gets a batch of its own. Splitting depends on ``max_doc_chars`` alone, never on the
+budget, so memory pressure does not change what the model sees. It only happens at line
+breaks or spaces, so an entity is cut in two only if it straddles a split point of a
+document longer than ``max_doc_chars``.
+
+Compare a fixed batch size with budget batching (throughput and peak RSS) with:
+    python budget_batching.py --data Testing_Set.csv --model "PII Model" --rss-limit-mb 1500
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_CHARS = 100_000
+DEFAULT_MAX_DOC_CHARS = 100_000
+DEFAULT_MAX_BATCH_ITEMS = 1000
+DEFAULT_MIN_BUDGET = 5_000
+UNITS = ("chars", "tokens")
+
+# Fractions of the RSS ceiling at which the budget is shrunk / grown back
+SHRINK_AT = 0.9
+GROW_BELOW = 0.6
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MiB (None if it cannot be read)."""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def split_text(text: str, max_chars: int) -> List[Tuple[str, int]]:
+    """``(piece, offset)`` pairs of at most ``max_chars`` characters, cut at a line break or space when possible."""
+    pieces = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = text.rfind("\n", start + max_chars // 2, end)
+        if cut == -1:
+            cut = text.rfind(" ", start + max_chars // 2, end)
+        cut = end if cut == -1 else cut + 1
+        pieces.append((text[start:cut], start))
+        start = cut
+    pieces.append((text[start:], start))
+    return pieces
+
+
+class BudgetBatcher:
+    """
+    Forms ``nlp.pipe`` batches by size budget (see the module docstring). ``stats`` counts
+    'batches', 'pieces', 'split_docs', 'shrunk' and 'grown' and keeps 'peak_rss_mb'.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BATCH_CHARS, unit: str = "chars",
+                 max_doc_chars: int = DEFAULT_MAX_DOC_CHARS, rss_limit_mb: Optional[float] = None,
+                 max_items: int = DEFAULT_MAX_BATCH_ITEMS, min_budget: int = DEFAULT_MIN_BUDGET):
+        if unit not in UNITS:
+            raise ValueError(f"Unknown budget unit '{unit}'. Choose from {UNITS}.")
+        self.initial_budget = budget
+        self.budget = budget
+        self.unit = unit
+        self.max_doc_chars = max_doc_chars
+        self.rss_limit_mb = rss_limit_mb
+        self.max_items = max_items
+        self.min_budget = min(min_budget, budget)
+        self.stats = Counter()
+
+    def cost(self, text: str) -> int:
+        if self.unit == "chars":
+            return len(text)
+        # Whitespace count is a cheap, slightly low estimate of spaCy's token count
+        return text.count(" ") + text.count("\n") + 1
+
+    def batches(self, texts: Iterable[str]) -> Iterator[List[Tuple[int, int, str]]]:
+        """Batches of ``(text index, char offset, piece)``; reads the current budget for every batch."""
+        batch, used = [], 0
+        for index, text in enumerate(texts):
+            pieces = split_text(text, self.max_doc_chars) if len(text) > self.max_doc_chars else [(text, 0)]
+            if len(pieces) > 1:
+                self.stats["split_docs"] += 1
+            for piece, offset in pieces:
+                cost = self.cost(piece)
+                if batch and (used + cost > self.budget or len(batch) >= self.max_items):
+                    yield batch
+                    batch, used = [], 0
+                batch.append((index, offset, piece))
+                used += cost
+        if batch:
+            yield batch
+
+    def adapt(self) -> None:
+        """Shrink or grow the budget according to the current RSS."""
+        if self.rss_limit_mb is None:
+            return
+        rss = current_rss_mb()
+        if rss is None:
+            return
+        self.stats["peak_rss_mb"] = max(self.stats["peak_rss_mb"], rss)
+        if rss > SHRINK_AT * self.rss_limit_mb and self.budget > self.min_budget:
+            self.budget = max(self.min_budget, self.budget // 2)
+            self.stats["shrunk"] += 1
+            gc.collect()
+        elif rss < GROW_BELOW * self.rss_limit_mb and self.budget < self.initial_budget:
+            self.budget = min(self.initial_budget, int(self.budget * 1.5))
+            self.stats["grown"] += 1
+
+    def pipe(self, nlp, texts: Iterable[str]) -> Iterator[Tuple[int, int, object]]:
+        """``(text index, char offset, doc)`` for every text, or every piece of a split text, in order."""
+        for batch in self.batches(texts):
+            docs = nlp.pipe([piece for _, _, piece in batch], batch_size=len(batch))
+            for (index, offset, _), doc in zip(batch, docs):
+                yield index, offset, doc
+            self.stats["batches"] += 1
+            self.stats["pieces"] += len(batch)
+            self.adapt()
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def mixed_workload(texts: Sequence[str], long_docs: int, long_doc_chars: int) -> List[str]:
+    """``texts`` with ``long_docs`` documents of ~``long_doc_chars`` (concatenated rows) spread among them."""
+    workload = list(texts)
+    if not workload or not long_docs:
+        return workload
+    step = max(1, len(workload) // long_docs)
+    for k in range(long_docs):
+        parts, size, i = [], 0, k
+        while size < long_doc_chars:
+            parts.append(texts[i % len(texts)])
+            size += len(parts[-1]) + 1
+            i += 1
+        workload.insert(min(len(workload), k * step + k), "\n".join(parts))
+    return workload
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB (current RSS where ``resource`` is missing, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return current_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_mode(model: str, texts: List[str], mode: str, batch_size: int, batcher_kwargs: Dict) -> Dict:
+    """Run one batching mode in a fresh process and report throughput and peak RSS."""
+    import spacy
+
+    from pii_pipeline import predict_spans
+
+    nlp = spacy.load(model)
+    nlp.max_length = max(nlp.max_length, max(len(t) for t in texts) + 1)
+    batcher = BudgetBatcher(**batcher_kwargs) if mode == "budget" else None
+    start = time.perf_counter()
+    spans = predict_spans(nlp, texts, batch_size=batch_size, batcher=batcher)
+    seconds = time.perf_counter() - start
+    words = sum(t.count(" ") + t.count("\n") + 1 for t in texts)
+    row = {"mode": mode, "docs": len(texts), "entities": spans.n_spans, "seconds": seconds,
+           "words_per_second": words / seconds,
+           "peak_rss_mb": peak_rss_mb()}
+    if batcher is not None:
+        row.update({k: v for k, v in batcher.stats.items() if k != "peak_rss_mb"}, final_budget=batcher.budget)
+    return row
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="Testing_Set.csv")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--model", default="PII Model")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeat the rows this many times")
+    parser.add_argument("--long-docs", type=int, default=4, help="Very long documents mixed into the rows")
+    parser.add_argument("--long-doc-chars", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=64, help="Fixed batch size to compare against")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BATCH_CHARS)
+    parser.add_argument("--unit", default="chars", choices=UNITS)
+    parser.add_argument("--max-doc-chars", type=int, default=DEFAULT_MAX_DOC_CHARS)
+    parser.add_argument("--rss-limit-mb", type=float, default=None)
+    parser.add_argument("--output", default="budget_batching_report.csv")
+    args = parser.parse_args(argv)
+
+    rows = pd.read_csv(args.data)[args.text_col].astype(str).tolist() * args.repeat
+    texts = mixed_workload(rows, args.long_docs, args.long_doc_chars)
+    batcher_kwargs = {"budget": args.budget, "unit": args.unit, "max_doc_chars": args.max_doc_chars,
+                      "rss_limit_mb": args.rss_limit_mb}
+    print(f"{len(texts)} documents, {sum(map(len, texts)):,} characters")
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for mode in ("fixed", "budget"):
+        # One process per mode so the peak RSS of one run does not carry over to the other
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(_run_mode, (args.model, texts, mode, args.batch_size, batcher_kwargs)))
+    report = pd.DataFrame(results)
+    report.to_csv(args.output, index=False)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+
+if __name__ == "__main__":
+    main()
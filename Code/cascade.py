@@ -0,0 +1,209 @@
+"""
+Confidence-scored detection cascade.
+
+Per-entity confidences come from beam search over the transition-based ``ner`` component
+(``ner.beam_parse`` + ``ner.scored_ents``): the score of a span is the share of beam
+probability mass on parses that contain it. The entities of a document are the spans
+with a score of at least 0.5, and the document's confidence is the least decisive of its
+candidate spans, ``min(max(p, 1 - p))``.
+
+The cascade runs a cheap first tier (regex rules for emails, URLs, SSNs and Luhn-valid
+card numbers, plus a small model scored with a narrow beam) on every document and sends
+only documents whose confidence is below the threshold to the heavy model.
+
+Compare escalation rate, throughput and accuracy against the heavy model alone with:
+    python cascade.py --data Testing_Set.csv --fast-model "Student Model" --heavy-model "PII Model"
+"""
+
+import argparse
+import ast
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from column_profiler import CARD_NUMBER, FULLMATCH_PATTERNS, luhn_valid
+from pii_pipeline import DEFAULT_BATCH_SIZE, predict_many
+from span_resolver import resolve_entities
+
+DEFAULT_BEAM_WIDTH = 4
+DEFAULT_BEAM_DENSITY = 0.0001
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_THRESHOLDS = (0.8, 0.9, 0.95, 0.99)
+
+RULE_PATTERNS = {
+    "email": FULLMATCH_PATTERNS["email"],
+    "url": re.compile(r"(?:https?://|www\.)[^\s<>\"')\]]*[^\s<>\"')\].,;:!?]", re.IGNORECASE),
+    "ssn": re.compile(r"(?<![\d-])\d{3}-\d{2}-\d{4}(?![\d-])"),
+}
+
+
+def rule_entities(text: str) -> List[Dict]:
+    """Spans matched by ``RULE_PATTERNS`` and Luhn-valid card numbers, with score 1.0."""
+    ents = []
+    for label, pattern in RULE_PATTERNS.items():
+        for match in pattern.finditer(text):
+            ents.append({"start": match.start(), "end": match.end(), "label": label, "text": match.group(),
+                         "source": "rule", "score": 1.0})
+    cards = list(CARD_NUMBER.finditer(text))
+    if cards:
+        valid = luhn_valid(pd.Series([re.sub(r"\D", "", m.group()) for m in cards]))
+        for match, is_valid in zip(cards, valid):
+            if is_valid:
+                ents.append({"start": match.start(), "end": match.end(), "label": "credit_card",
+                             "text": match.group(), "source": "rule", "score": 1.0})
+    return ents
+
+
+def scored_entities(nlp, texts: Sequence[str], beam_width: int = DEFAULT_BEAM_WIDTH,
+                    beam_density: float = DEFAULT_BEAM_DENSITY,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> List[Tuple[List[Dict], float]]:
+    """
+    Beam-score the ``ner`` component of ``nlp`` over ``texts``. Returns one
+    ``(entities, confidence)`` pair per text; every entity carries its beam probability
+    under 'score'.
+    """
+    from spacy.util import minibatch
+
+    ner = nlp.get_pipe("ner")
+    docs = nlp.pipe(texts, batch_size=batch_size, disable=["ner"])
+    results = []
+    for batch in minibatch(docs, size=batch_size):
+        beams = ner.beam_parse(batch, beam_width=beam_width, beam_density=beam_density)
+        for doc, scores in zip(batch, ner.scored_ents(beams)):
+            ents = []
+            confidence = 1.0
+            for (start, end, label), score in scores.items():
+                confidence = min(confidence, max(score, 1.0 - score))
+                if score >= 0.5:
+                    span = doc[start:end]
+                    ents.append({"start": span.start_char, "end": span.end_char, "label": label.lower(),
+                                 "text": span.text, "score": float(score)})
+            ents.sort(key=lambda e: e["start"])
+            results.append((ents, confidence))
+    return results
+
+
+class Cascade:
+    """
+    Two-tier detector: ``fast_nlp`` (beam-scored) plus rules for every document,
+    ``heavy_nlp`` only for documents whose confidence is below ``threshold``.
+
+    Overlaps between rule and model spans go to the longer span, so rules fill in what the
+    model missed without cutting down wider model spans (e.g. a full card block around the
+    number). Entities from the fast tier carry a 'score'; escalated documents get the heavy
+    model's (unscored) entities.
+    """
+
+    def __init__(self, fast_nlp, heavy_nlp, threshold: float = DEFAULT_THRESHOLD,
+                 beam_width: int = DEFAULT_BEAM_WIDTH, use_rules: bool = True,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.fast_nlp = fast_nlp
+        self.heavy_nlp = heavy_nlp
+        self.threshold = threshold
+        self.beam_width = beam_width
+        self.use_rules = use_rules
+        self.batch_size = batch_size
+
+    def first_tier(self, texts: Sequence[str]) -> List[Tuple[List[Dict], float]]:
+        return scored_entities(self.fast_nlp, texts, self.beam_width, batch_size=self.batch_size)
+
+    def predict_many(self, texts: Sequence[str], stats: Optional[Counter] = None,
+                     first_tier: Optional[List[Tuple[List[Dict], float]]] = None) -> List[List[Dict]]:
+        """
+        Entities for every text. ``stats`` counts 'docs' and 'escalated'; a precomputed
+        ``first_tier`` result can be passed to try several thresholds on the same scores.
+        """
+        texts = list(texts)
+        first_tier = first_tier if first_tier is not None else self.first_tier(texts)
+        results = [ents for ents, _ in first_tier]
+        escalate = [i for i, (_, confidence) in enumerate(first_tier) if confidence < self.threshold]
+        heavy = predict_many(self.heavy_nlp, [texts[i] for i in escalate], batch_size=self.batch_size)
+        for i, ents in zip(escalate, heavy):
+            results[i] = ents
+        if self.use_rules:
+            results = [resolve_entities(rule_entities(text) + ents, policy="longest")
+                       for text, ents in zip(texts, results)]
+        if stats is not None:
+            stats["docs"] += len(texts)
+            stats["escalated"] += len(escalate)
+        return results
+
+
+def entity_scores(gold: List[set], predicted: List[List[Dict]]) -> Dict[str, float]:
+    """Exact-match entity precision / recall / F1 over all documents."""
+    tp = fp = fn = 0
+    for gold_set, ents in zip(gold, predicted):
+        pred_set = {(e["start"], e["end"], e["label"]) for e in ents}
+        tp += len(gold_set & pred_set)
+        fp += len(pred_set - gold_set)
+        fn += len(gold_set - pred_set)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def main(argv=None):
+    import spacy
+
+    from prefilter import _line_records
+    from span_resolver import resolve_annotations
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="Testing_Set.csv", help="Annotated CSV with 'text' and 'True Predictions'")
+    parser.add_argument("--fast-model", required=True)
+    parser.add_argument("--heavy-model", default="PII Model")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH)
+    parser.add_argument("--no-rules", action="store_true", help="First tier without the regex rules")
+    parser.add_argument("--split-lines", action="store_true", help="Evaluate each line as its own document")
+    parser.add_argument("--output", default="cascade_report.csv")
+    args = parser.parse_args(argv)
+
+    dataset = pd.read_csv(args.data)
+    records = []
+    for text, raw in zip(dataset["text"].astype(str), dataset["True Predictions"]):
+        entities = resolve_annotations([tuple(e) for e in ast.literal_eval(raw)])
+        records.extend(_line_records(text, entities) if args.split_lines else [(text, entities)])
+    texts = [t for t, _ in records]
+    gold = [set(spans) for _, spans in records]
+    words = sum(len(t.split()) for t in texts)
+
+    fast_nlp = spacy.load(args.fast_model)
+    heavy_nlp = spacy.load(args.heavy_model)
+    heavy_nlp(texts[0])  # warm up both models before timing
+    fast_nlp(texts[0])
+
+    rows = []
+    start = time.perf_counter()
+    heavy_only = predict_many(heavy_nlp, texts)
+    heavy_seconds = time.perf_counter() - start
+    rows.append({"mode": "heavy only", "threshold": None, "escalation_rate": 1.0, "seconds": heavy_seconds,
+                 "words_per_second": words / heavy_seconds, **entity_scores(gold, heavy_only)})
+
+    cascade = Cascade(fast_nlp, heavy_nlp, beam_width=args.beam_width, use_rules=not args.no_rules)
+    start = time.perf_counter()
+    first_tier = cascade.first_tier(texts)
+    first_tier_seconds = time.perf_counter() - start
+
+    for threshold in args.thresholds:
+        cascade.threshold = threshold
+        stats = Counter()
+        start = time.perf_counter()
+        predicted = cascade.predict_many(texts, stats=stats, first_tier=first_tier)
+        seconds = first_tier_seconds + time.perf_counter() - start
+        rows.append({"mode": "cascade", "threshold": threshold,
+                     "escalation_rate": stats["escalated"] / max(stats["docs"], 1), "seconds": seconds,
+                     "words_per_second": words / seconds, **entity_scores(gold, predicted)})
+
+    report = pd.DataFrame(rows)
+    report.to_csv(args.output, index=False)
+    print(f"Documents: {len(texts)}, first tier: {first_tier_seconds:.2f}s")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
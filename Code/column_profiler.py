@@ -0,0 +1,154 @@
+"""
+Column-type profiling for multi-column batch anonymization.
+
+A sample of every column is classified as one of:
+  - "structured": the column holds a single PII type (SSNs, card numbers, emails, ...).
+    Every non-empty cell is redacted with vectorized pandas string operations; the model
+    is never run on it.
+  - "free_text": prose that may embed PII anywhere; only these columns go to the NER model.
+  - "non_pii": numbers, dates, flags and low-cardinality codes; left untouched.
+
+Value validators are regular expressions applied with ``Series.str`` methods, plus a
+vectorized Luhn checksum for card numbers. Column headers that name a PII label
+(``ssn``, ``email``, ``name``, ...) are used as a hint for types without a reliable
+pattern, such as names and addresses.
+"""
+
+import re
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+STRUCTURED = "structured"
+FREE_TEXT = "free_text"
+NON_PII = "non_pii"
+
+DEFAULT_SAMPLE_SIZE = 500
+DEFAULT_MATCH_THRESHOLD = 0.8
+# Above these averages a column is treated as prose rather than a single value per cell
+FREE_TEXT_MIN_CHARS = 120
+FREE_TEXT_MIN_WORDS = 12
+# Few distinct values in a large sample means a categorical/status column
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.05
+CATEGORICAL_MIN_SAMPLE = 20
+
+FULLMATCH_PATTERNS = {
+    "ssn": re.compile(r"\d{3}[- ]?\d{2}[- ]?\d{4}"),
+    "email": re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"),
+    "url": re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE),
+    # International numbers with a leading '+', or 10-digit national numbers
+    "phone": re.compile(r"\+\d{1,4}[\s.-]?(?:\d[\s.-]?){6,13}\d|\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}"),
+}
+# Contiguous 13-19 digit numbers, or the usual 4-4-4-x and 4-6-5 groupings
+CARD_NUMBER = re.compile(r"(?<!\d)(\d{13,19}|\d{4}(?:[ -]\d{4}){2}[ -]\d{1,7}|\d{4}[ -]\d{6}[ -]\d{5})(?!\d)")
+CARD_MAX_CHARS = 160
+
+HEADER_HINTS = {
+    "name": "name", "full_name": "name", "customer_name": "name",
+    "email": "email", "email_address": "email",
+    "phone": "phone", "phone_number": "phone", "mobile": "phone",
+    "address": "address", "street_address": "address",
+    "credit_card": "credit_card", "card_number": "credit_card", "cc_number": "credit_card",
+    "company": "company", "company_name": "company",
+    "url": "url", "website": "url",
+    "ssn": "ssn", "social_security_number": "ssn",
+}
+
+
+def luhn_valid(digits: pd.Series) -> pd.Series:
+    """Vectorized Luhn checksum over a Series of digit-only strings (NaN/empty -> False)."""
+    digits = digits.fillna("").astype(str)
+    lengths = digits.str.len().to_numpy()
+    width = int(lengths.max()) if len(lengths) else 0
+    if width == 0:
+        return pd.Series(np.zeros(len(digits), dtype=bool), index=digits.index)
+
+    # Right-align every number in a zero-padded uint8 matrix
+    padded = digits.str.zfill(width).to_numpy().astype(f"S{width}")
+    matrix = np.frombuffer(padded.tobytes(), dtype=np.uint8).reshape(len(digits), width) - ord("0")
+    doubled = matrix[:, width - 2::-2] * 2 if width > 1 else np.zeros((len(digits), 0), dtype=np.uint8)
+    doubled = np.where(doubled > 9, doubled - 9, doubled)
+    total = matrix[:, width - 1::-2].sum(axis=1, dtype=np.int64) + doubled.sum(axis=1, dtype=np.int64)
+    valid = (total % 10 == 0) & (lengths >= 13)
+    return pd.Series(valid, index=digits.index)
+
+
+def validate(values: pd.Series, label: str) -> pd.Series:
+    """Boolean mask of cells in ``values`` that look like a ``label`` value."""
+    values = values.astype(str).str.strip()
+    if label == "credit_card":
+        candidates = values.str.extractall(CARD_NUMBER)[0].str.replace(r"\D", "", regex=True)
+        valid = luhn_valid(candidates).groupby(level=0).any()
+        return valid.reindex(values.index, fill_value=False) & (values.str.len() <= CARD_MAX_CHARS)
+    return values.str.fullmatch(FULLMATCH_PATTERNS[label])
+
+
+# Checked in this order; on equal match rates the earlier label wins
+VALIDATED_LABELS = ("credit_card", "ssn", "email", "url", "phone")
+# Labels whose patterns any 9-10 digit integer matches; numeric columns need the header to agree
+DIGITS_ONLY_LABELS = ("ssn", "phone")
+
+
+def profile_column(name: str, values: pd.Series, match_threshold: float = DEFAULT_MATCH_THRESHOLD,
+                   use_header_hints: bool = True) -> Dict:
+    """Classify one column from a sample of its values."""
+    sample = values.dropna()
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return {"kind": NON_PII, "label": None, "match_rate": 0.0}
+    text = sample.astype(str).str.strip()
+    text = text[text != ""]
+    if text.empty:
+        return {"kind": NON_PII, "label": None, "match_rate": 0.0}
+
+    numeric = pd.api.types.is_numeric_dtype(values)
+    hint = HEADER_HINTS.get(str(name).strip().lower().replace(" ", "_")) if use_header_hints else None
+
+    # Value patterns first: they also catch SSNs/cards stored as numbers
+    best_label, best_rate = None, 0.0
+    for label in VALIDATED_LABELS:
+        if numeric and label in DIGITS_ONLY_LABELS and hint != label:
+            # Timestamps, order IDs and other plain integers fit these patterns too
+            continue
+        rate = float(validate(text, label).mean())
+        if rate > best_rate:
+            best_label, best_rate = label, rate
+    if best_rate >= match_threshold:
+        return {"kind": STRUCTURED, "label": best_label, "match_rate": best_rate}
+
+    if numeric:
+        return {"kind": NON_PII, "label": None, "match_rate": best_rate}
+
+    mean_chars = float(text.str.len().mean())
+    mean_words = float(text.str.split().str.len().mean())
+    is_prose = mean_chars >= FREE_TEXT_MIN_CHARS or mean_words >= FREE_TEXT_MIN_WORDS
+
+    if hint and not is_prose:
+        return {"kind": STRUCTURED, "label": hint, "match_rate": best_rate}
+
+    if is_prose:
+        return {"kind": FREE_TEXT, "label": None, "match_rate": best_rate}
+    if not text.str.contains(r"[A-Za-z]", regex=True).any():
+        # Amounts, dates and codes without letters that matched no validator
+        return {"kind": NON_PII, "label": None, "match_rate": best_rate}
+    if len(text) >= CATEGORICAL_MIN_SAMPLE and text.nunique() / len(text) <= CATEGORICAL_MAX_UNIQUE_RATIO:
+        return {"kind": NON_PII, "label": None, "match_rate": best_rate}
+    return {"kind": FREE_TEXT, "label": None, "match_rate": best_rate}
+
+
+def profile_columns(df: pd.DataFrame, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                    match_threshold: float = DEFAULT_MATCH_THRESHOLD,
+                    use_header_hints: bool = True, skip: Optional[set] = None) -> Dict[str, Dict]:
+    """Profile every column of ``df`` (skipping ``skip``) from its first ``sample_size`` rows."""
+    sample = df.head(sample_size)
+    return {
+        column: profile_column(column, sample[column], match_threshold, use_header_hints)
+        for column in df.columns
+        if not skip or column not in skip
+    }
+
+
+def redact_structured(values: pd.Series, replacement: str) -> pd.Series:
+    """Replace every non-empty cell with ``replacement`` (vectorized)."""
+    mask = values.notna() & (values.astype("string").str.strip() != "").fillna(False)
+    return values.astype(object).where(~mask, replacement)
@@ -0,0 +1,243 @@
+"""
+Training-corpus deduplication and coreset selection.
+
+The synthetic training rows are produced by cycling through a fixed list of sentence
+templates, so most rows share their context and differ only in the Faker values. This
+stage:
+1. masks every annotated entity with its label (``<NAME>``, ``<EMAIL>``, ...), so rows of
+   the same template become (near-)identical,
+2. groups near-duplicates with MinHash over word 3-gram shingles of the masked text and
+   LSH banding (pairs with an estimated Jaccard similarity of at least ``threshold``),
+3. picks a subset greedily: each step takes the next row of the cluster that adds the most
+   under-represented labels, discounted by how often that cluster was already used, so
+   the subset covers every context and stays label-balanced.
+The selected rows are written in the training CSV format (``ner_training.load_training_data``).
+
+Example:
+    python coreset.py select --data Training_Set.csv --size 500 --output Training_Coreset.csv
+    python coreset.py report --data Training_Set.csv --test Testing_Set.csv --sizes 100 250 500 1000
+"""
+
+import argparse
+import ast
+import random
+import re
+import time
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_SIZES = (100, 250, 500, 1000)
+
+MERSENNE_PRIME = (1 << 31) - 1
+TOKEN = re.compile(r"<\w+>|\w+")
+
+
+def masked_context(text: str, entities: Sequence[Tuple[int, int, str]]) -> str:
+    """``text`` with every entity replaced by ``<LABEL>``."""
+    parts, last = [], 0
+    for start, end, label in sorted(entities):
+        if start < last:
+            continue
+        parts.append(text[last:start])
+        parts.append(f"<{label.upper()}>")
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> set:
+    tokens = TOKEN.findall(text.lower())
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signatures(shingle_sets: Sequence[set], num_perm: int = DEFAULT_NUM_PERM, seed: int = 0) -> np.ndarray:
+    """``(len(shingle_sets), num_perm)`` MinHash signatures (CRC32 shingle hashes, universal hashing mod 2^31 - 1)."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    signatures = np.full((len(shingle_sets), num_perm), MERSENNE_PRIME, dtype=np.uint64)
+    for i, items in enumerate(shingle_sets):
+        if not items:
+            continue
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64, count=len(items))
+        signatures[i] = ((np.outer(hashes, a) + b) % MERSENNE_PRIME).min(axis=0)
+    return signatures
+
+
+def near_duplicate_clusters(signatures: np.ndarray, bands: int = DEFAULT_BANDS,
+                            threshold: float = DEFAULT_THRESHOLD) -> List[int]:
+    """Cluster id per row: LSH candidate pairs whose signature agreement is >= ``threshold`` are merged."""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            buckets[block[i].tobytes()].append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a != root_b and np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[root_b] = root_a
+    roots = [find(i) for i in range(n)]
+    ids = {root: k for k, root in enumerate(dict.fromkeys(roots))}
+    return [ids[root] for root in roots]
+
+
+def select_coreset(labels: Sequence[Counter], clusters: Sequence[int], size: int, seed: int = 0) -> List[int]:
+    """
+    Greedy label-balanced, cluster-diverse selection of ``size`` row indices.
+
+    The gain of a row is ``sum(n / (1 + selected[label]))`` over its label counts, divided
+    by ``1 + picks`` of its cluster; rows inside a cluster are taken in random order.
+    """
+    rng = random.Random(seed)
+    members = defaultdict(list)
+    for index, cluster in enumerate(clusters):
+        members[cluster].append(index)
+    for indices in members.values():
+        rng.shuffle(indices)
+    picks = Counter()
+    selected_labels = Counter()
+    selected = []
+    while len(selected) < size and members:
+        def gain(cluster: int) -> float:
+            row_labels = labels[members[cluster][-1]]
+            value = sum(n / (1 + selected_labels[label]) for label, n in row_labels.items()) or 1e-3
+            return value / (1 + picks[cluster])
+
+        best = max(members, key=lambda c: (gain(c), rng.random()))
+        index = members[best].pop()
+        if not members[best]:
+            del members[best]
+        picks[best] += 1
+        selected_labels.update(labels[index])
+        selected.append(index)
+    return selected
+
+
+def reduce_corpus(dataset: pd.DataFrame, size: Optional[int], num_perm: int = DEFAULT_NUM_PERM,
+                  bands: int = DEFAULT_BANDS, threshold: float = DEFAULT_THRESHOLD, seed: int = 0
+                  ) -> Tuple[pd.DataFrame, Dict]:
+    """Drop exact duplicates, cluster near-duplicates and select ``size`` rows (one per cluster if None)."""
+    unique = dataset.drop_duplicates(subset="text").reset_index(drop=True)
+    entities = [[tuple(e) for e in ast.literal_eval(raw)] for raw in unique["True Predictions"]]
+    contexts = [masked_context(text, ents) for text, ents in zip(unique["text"].astype(str), entities)]
+    start = time.perf_counter()
+    signatures = minhash_signatures([shingles(c) for c in contexts], num_perm, seed)
+    clusters = near_duplicate_clusters(signatures, bands, threshold)
+    labels = [Counter(label for _, _, label in ents) for ents in entities]
+    order = select_coreset(labels, clusters, len(set(clusters)) if size is None else size, seed)
+    selected = unique.iloc[order].reset_index(drop=True)
+    label_counts = Counter()
+    for index in order:
+        label_counts.update(labels[index])
+    stats = {
+        "rows": len(dataset),
+        "exact_duplicates": len(dataset) - len(unique),
+        "clusters": len(set(clusters)),
+        "clusters_covered": len({clusters[i] for i in order}),
+        "selected": len(order),
+        "label_counts": dict(sorted(label_counts.items())),
+        "seconds": time.perf_counter() - start,
+    }
+    return selected, stats
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def train_and_score(train_df: pd.DataFrame, test_data, iterations: int, seed: int) -> Dict:
+    """Train a fresh model on ``train_df`` and score it on ``test_data``."""
+    from ner_training import build_examples, create_blank_nlp, evaluate_ner, labels_of, records_from_frame, train_ner
+
+    quiet = lambda *_: None
+    records = records_from_frame(train_df)
+    nlp = create_blank_nlp(labels_of(records))
+    examples = build_examples(nlp, records, log=quiet)
+    start = time.perf_counter()
+    train_ner(nlp, examples, iterations=iterations, seed=seed, log=quiet)
+    seconds = time.perf_counter() - start
+    scores = evaluate_ner(nlp, build_examples(nlp, test_data, log=quiet))
+    return {"train_seconds": seconds, "precision": scores["precision"], "recall": scores["recall"],
+            "f1": scores["f1"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("select", "report"):
+        sub = commands.add_parser(name, help="Write a reduced training CSV" if name == "select"
+                                  else "Training time vs test F1 for several subset sizes")
+        sub.add_argument("--data", default="Training_Set.csv")
+        sub.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM)
+        sub.add_argument("--bands", type=int, default=DEFAULT_BANDS)
+        sub.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Near-duplicate Jaccard")
+        sub.add_argument("--seed", type=int, default=0)
+    select = commands.choices["select"]
+    select.add_argument("--size", type=int, default=None, help="Rows to keep (default: one per near-duplicate cluster)")
+    select.add_argument("--output", default="Training_Coreset.csv")
+    report = commands.choices["report"]
+    report.add_argument("--test", default="Testing_Set.csv")
+    report.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    report.add_argument("--full", action="store_true", help="Also train on the full corpus")
+    report.add_argument("--compare-random", action="store_true", help="Also train on random subsets of each size")
+    report.add_argument("--iterations", type=int, default=10)
+    report.add_argument("--output", default="coreset_report.csv")
+    args = parser.parse_args(argv)
+
+    dataset = pd.read_csv(args.data)
+    if args.command == "select":
+        selected, stats = reduce_corpus(dataset, args.size, args.num_perm, args.bands, args.threshold, args.seed)
+        selected.to_csv(args.output, index=False)
+        print(stats)
+        print(f"Wrote {len(selected)} rows to {args.output}")
+        return
+
+    from ner_training import load_training_data
+
+    test_data = load_training_data(args.test)
+    rows = []
+    runs = [("coreset", size) for size in args.sizes]
+    if args.compare_random:
+        runs += [("random", size) for size in args.sizes]
+    if args.full:
+        runs.append(("full", len(dataset)))
+    for method, size in runs:
+        if method == "coreset":
+            subset, stats = reduce_corpus(dataset, size, args.num_perm, args.bands, args.threshold, args.seed)
+            print(f"{stats['clusters']} near-duplicate clusters, {stats['clusters_covered']} covered by {size} rows")
+        elif method == "random":
+            subset = dataset.sample(n=min(size, len(dataset)), random_state=args.seed)
+        else:
+            subset = dataset
+        row = {"method": method, "rows": len(subset), "fraction": len(subset) / len(dataset),
+               **train_and_score(subset, test_data, args.iterations, args.seed)}
+        print(f"{method:>7} {row['rows']:>6} rows: {row['train_seconds']:.1f}s F1={row['f1']:.4f}")
+        rows.append(row)
+    report_df = pd.DataFrame(rows)
+    report_df.to_csv(args.output, index=False)
+    print(report_df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
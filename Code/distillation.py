@@ -0,0 +1,213 @@
+"""
+Distil the PII NER model into a compact student tuned for CPU throughput.
+
+1. A synthetic corpus is generated from the training Faker templates (synthetic_data.py)
+   with fresh values.
+2. One or more teacher models label it; with several teachers only spans predicted by a
+   majority are kept.
+3. A student with a narrower, shallower tok2vec is trained on the teacher labels.
+4. Teachers and student are scored side by side on Testing_Set.csv and timed on a single
+   CPU thread; the run checks the student against a words-per-second target and an F1 floor.
+
+Example:
+    python distillation.py --teacher "PII Model" --samples 20000 \
+        --target-wps 20000 --min-f1 0.90 --output "Student Model"
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+# Only stdlib imports at module level: main() caps the native thread pools before numpy,
+# pandas or thinc load their BLAS / OpenMP runtimes, which read the limits once at load time
+from hyperparameter_sweep import limit_threads
+
+# The current PII Model uses spaCy's default ner config: width 96, depth 4, hidden width 64
+DEFAULT_STUDENT_ARCHITECTURE = {"width": 64, "depth": 2, "embed_size": 2000, "hidden_width": 48}
+DEFAULT_SAMPLES = 20000
+
+
+def ner_model_config(width: int, depth: int, embed_size: int, hidden_width: int) -> Dict:
+    """``ner`` model config with the given tok2vec and parser sizes."""
+    return {
+        "@architectures": "spacy.TransitionBasedParser.v2",
+        "state_type": "ner",
+        "extra_state_tokens": False,
+        "hidden_width": hidden_width,
+        "maxout_pieces": 2,
+        "use_upper": True,
+        "nO": None,
+        "tok2vec": {
+            "@architectures": "spacy.HashEmbedCNN.v2",
+            "pretrained_vectors": None,
+            "width": width,
+            "depth": depth,
+            "embed_size": embed_size,
+            "window_size": 1,
+            "maxout_pieces": 3,
+            "subword_features": True,
+        },
+    }
+
+
+def synthetic_corpus(num_samples: int, seed: int = 0) -> "pandas.DataFrame":
+    """Fresh Faker values poured into the training templates, with their exact-match annotations."""
+    from synthetic_data import (
+        PII_FIELDS, TRAINING_TEMPLATES, annotate_pii, fill_templates, generate_pii_data,
+        remove_random_full_stops, seed_generators,
+    )
+
+    seed_generators(seed)
+    corpus = generate_pii_data(num_samples)
+    corpus["text"] = fill_templates(corpus, TRAINING_TEMPLATES).apply(remove_random_full_stops)
+    corpus["annotations"] = [annotate_pii(row["text"], {f: row[f] for f in PII_FIELDS})
+                             for _, row in corpus.iterrows()]
+    return corpus
+
+
+def teacher_labels(teachers: Sequence, texts: List[str]) -> List[List]:
+    """Spans predicted by a majority of ``teachers``, overlaps resolved."""
+    from pii_pipeline import predict_many
+    from span_resolver import resolve_annotations
+
+    votes = [Counter() for _ in texts]
+    for teacher in teachers:
+        for counter, ents in zip(votes, predict_many(teacher, texts)):
+            counter.update({(e["start"], e["end"], e["label"]) for e in ents})
+    needed = math.ceil(len(teachers) / 2)
+    return [resolve_annotations([span for span, n in counter.items() if n >= needed]) for counter in votes]
+
+
+def label_agreement(labels: List[List], reference: List[List]) -> Dict[str, float]:
+    """Precision / recall / F1 of teacher labels against the exact-match Faker annotations."""
+    from span_resolver import resolve_annotations
+
+    tp = fp = fn = 0
+    for spans, gold in zip(labels, reference):
+        spans, gold = set(spans), set(resolve_annotations(gold))
+        tp += len(spans & gold)
+        fp += len(spans - gold)
+        fn += len(gold - spans)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {"precision": precision, "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0}
+
+
+def model_summary(name: str, nlp, test_examples, test_texts: List[str], model_dir: Optional[str] = None) -> Dict:
+    """Accuracy on the test examples and single-thread throughput of one model."""
+    from ner_training import evaluate_ner, measure_words_per_second
+
+    config = nlp.config["components"]["ner"]["model"]
+    scores = evaluate_ner(nlp, test_examples)
+    nlp(test_texts[0])  # warm up
+    row = {
+        "model": name,
+        "parameters": sum(node.get_param(p).size for node in nlp.get_pipe("ner").model.walk()
+                          for p in node.param_names if node.has_param(p)),
+        "width": config["tok2vec"]["width"],
+        "depth": config["tok2vec"]["depth"],
+        "embed_size": config["tok2vec"]["embed_size"],
+        "hidden_width": config["hidden_width"],
+        "words_per_second": measure_words_per_second(nlp, test_texts, repeats=2),
+        "precision": scores["precision"],
+        "recall": scores["recall"],
+        "f1": scores["f1"],
+    }
+    if model_dir:
+        row["size_mb"] = sum(os.path.getsize(os.path.join(root, f))
+                             for root, _, files in os.walk(model_dir) for f in files) / 1e6
+    row.update({f"f1_{label}": s["f1"] for label, s in sorted(scores["per_label"].items())})
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teacher", nargs="+", default=["PII Model"], help="Teacher model dir(s); >1 = ensemble")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Synthetic documents to label")
+    parser.add_argument("--test", default="Testing_Set.csv")
+    parser.add_argument("--width", type=int, default=DEFAULT_STUDENT_ARCHITECTURE["width"])
+    parser.add_argument("--depth", type=int, default=DEFAULT_STUDENT_ARCHITECTURE["depth"])
+    parser.add_argument("--embed-size", type=int, default=DEFAULT_STUDENT_ARCHITECTURE["embed_size"])
+    parser.add_argument("--hidden-width", type=int, default=DEFAULT_STUDENT_ARCHITECTURE["hidden_width"])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--dropout", type=float, default=0.3)
+    parser.add_argument("--patience", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-wps", type=float, default=None, help="Required student words/sec on one core")
+    parser.add_argument("--min-f1", type=float, default=None, help="Required student F1 on the test set")
+    parser.add_argument("--output", default="Student Model")
+    parser.add_argument("--report", default="distillation_report.csv")
+    args = parser.parse_args(argv)
+
+    # Throughput targets are defined for a single CPU core
+    limit_threads(1)
+    import pandas as pd
+    import spacy
+
+    from ner_training import build_examples, create_blank_nlp, load_training_data, split_dev, train_ner
+
+    teachers = [spacy.load(path) for path in args.teacher]
+    print(f"Generating {args.samples} synthetic documents...")
+    corpus = synthetic_corpus(args.samples, seed=args.seed)
+    texts = corpus["text"].tolist()
+
+    start = time.perf_counter()
+    labels = teacher_labels(teachers, texts)
+    labelling_seconds = time.perf_counter() - start
+    agreement = label_agreement(labels, corpus["annotations"].tolist())
+    print(f"Teacher labels in {labelling_seconds:.1f}s; agreement with Faker annotations: "
+          f"P={agreement['precision']:.4f} R={agreement['recall']:.4f} F1={agreement['f1']:.4f}")
+
+    records = [(text, {"entities": spans}) for text, spans in zip(texts, labels)]
+    train_records, dev_records = split_dev(records, 0.1, seed=args.seed)
+    architecture = {"width": args.width, "depth": args.depth, "embed_size": args.embed_size,
+                    "hidden_width": args.hidden_width}
+    student = create_blank_nlp(teachers[0].get_pipe("ner").labels, model=ner_model_config(**architecture))
+    quiet = lambda *_: None
+    start = time.perf_counter()
+    train_ner(student, build_examples(student, train_records, log=quiet), iterations=args.iterations,
+              dropout=args.dropout, batch_size_start=4, batch_size_end=32, batch_compound=1.001, seed=args.seed,
+              dev_examples=build_examples(student, dev_records, log=quiet), patience=args.patience)
+    training_seconds = time.perf_counter() - start
+
+    student.meta["distillation"] = {
+        "teachers": args.teacher, "samples": args.samples, "seed": args.seed, "architecture": architecture,
+        "teacher_label_agreement": agreement, "training_seconds": training_seconds,
+    }
+    student.to_disk(args.output)
+
+    test_data = load_training_data(args.test)
+    test_texts = [text for text, _ in test_data]
+    rows = []
+    for path, teacher in zip(args.teacher, teachers):
+        rows.append(model_summary(f"teacher: {path}", teacher, build_examples(teacher, test_data, log=quiet),
+                                  test_texts, path))
+    rows.append(model_summary(f"student: {args.output}", student, build_examples(student, test_data, log=quiet),
+                              test_texts, args.output))
+    report = pd.DataFrame(rows)
+    report.to_csv(args.report, index=False)
+    print(report.T.to_string(header=False, float_format=lambda v: f"{v:.4f}"))
+
+    student_row = rows[-1]
+    checks = {
+        "target_wps": args.target_wps is None or student_row["words_per_second"] >= args.target_wps,
+        "min_f1": args.min_f1 is None or student_row["f1"] >= args.min_f1,
+    }
+    student.meta["distillation"].update({"test_f1": student_row["f1"],
+                                         "words_per_second_1_thread": student_row["words_per_second"],
+                                         "checks": checks})
+    with open(os.path.join(args.output, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(student.meta, f, indent=2)
+    for name, passed in checks.items():
+        print(f"{name}: {'PASS' if passed else 'FAIL'}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Windowed HTML highlighting of detected entities.
+
+Long documents are split into pages of roughly ``page_chars`` characters (preferring line
+breaks, never cutting through an entity) and only the visible page is rendered, so the
+browser receives a bounded amount of HTML whatever the document size. Entities are
+expected to be resolved (non-overlapping) and sorted by start offset, as returned by
+``span_resolver.resolve_entities`` or ``spans.DocSpans.resolve``; both lists of entity
+dicts and ``DocSpans`` are accepted.
+"""
+
+import html
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from spans import DocSpans, span_tuples
+
+Entities = Union[List[Dict], DocSpans]
+
+LABEL_COLORS = {
+    "name": "#E74C3C",
+    "email": "#3498DB",
+    "phone": "#9B59B6",
+    "address": "#16A085",
+    "credit_card": "#F39C12",
+    "company": "#2ECC71",
+    "url": "#1ABC9C",
+    "ssn": "#E67E22",
+}
+
+DEFAULT_PAGE_CHARS = 5000
+
+
+def filter_labels(ents: Entities, labels: Optional[Iterable[str]]) -> Entities:
+    """Keep only entities whose label is in ``labels`` (all of them when ``labels`` is None)."""
+    if labels is None:
+        return ents
+    if isinstance(ents, DocSpans):
+        return ents.filter_labels(labels)
+    wanted = {label.lower() for label in labels}
+    return [e for e in ents if e["label"].lower() in wanted]
+
+
+def page_bounds(text: str, ents: Entities, page_chars: int = DEFAULT_PAGE_CHARS) -> List[Tuple[int, int]]:
+    """Split ``text`` into ``(start, end)`` pages that end on a line break when possible."""
+    ents = span_tuples(ents)
+    bounds = []
+    start = 0
+    i = 0
+    while start < len(text):
+        end = min(start + page_chars, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start + page_chars // 2, end)
+            if newline != -1:
+                end = newline + 1
+        # Never cut through an entity: extend the page to its end
+        while i < len(ents) and ents[i][1] <= end:
+            i += 1
+        if i < len(ents) and ents[i][0] < end:
+            end = ents[i][1]
+        bounds.append((start, end))
+        start = end
+    return bounds or [(0, 0)]
+
+
+def entities_in_window(ents: Entities, starts: Sequence[int], start: int, end: int) -> Entities:
+    """Entities starting inside ``[start, end)``; ``starts`` is the sorted list (or array) of entity starts."""
+    return ents[bisect_left(starts, start):bisect_left(starts, end)]
+
+
+def render_highlighted(text: str, ents: Entities, start: int = 0, end: Optional[int] = None) -> str:
+    """Build HTML with colored spans for ``text[start:end]`` and the entities inside it."""
+    end = len(text) if end is None else end
+    parts = []
+    last = start
+    for ent_start, ent_end, label in span_tuples(ents):
+        if ent_start < start or ent_end > end:
+            continue
+        color = LABEL_COLORS.get(label, "#BDC3C7")
+        parts.append(html.escape(text[last:ent_start]))
+        span = f"<span style='background-color:{color}; padding:2px 4px; border-radius:3px;' title='{label}'>{html.escape(text[ent_start:ent_end])}</span>"
+        parts.append(span)
+        last = ent_end
+    parts.append(html.escape(text[last:end]))
+    return "".join(parts)
@@ -0,0 +1,185 @@
+"""
+Parallel hyperparameter sweep for the PII NER training loop.
+
+Trains every combination of iterations / dropout / batch schedule (compounding batch
+sizes or length-bucketed token budgets) concurrently in a process pool (each worker
+limited to a fixed number of BLAS/OpenMP threads), scores each model on a dev split and
+writes a speed/accuracy table with the Pareto front marked.
+
+Example:
+    python hyperparameter_sweep.py --train Training_Set.csv --iterations 10 20 \
+        --dropout 0.2 0.5 --workers 4 --threads-per-worker 1 --min-f1 0.9
+
+Compare the training throughput ('train_words_per_second') of the compounding schedule
+with length-bucketed batches:
+    python hyperparameter_sweep.py --iterations 5 --batch-tokens 0 1000 2000 4000 --workers 1
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+# Only stdlib imports at module level: spawned workers import this module before the
+# initializer runs, and numpy/thinc must not be loaded until thread limits are set.
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def limit_threads(n_threads: int) -> None:
+    """Pool initializer: cap native thread pools for this worker process."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits  # type: ignore
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+
+
+def build_grid(args) -> List[Dict]:
+    """
+    Every combination of the swept values. A ``--batch-tokens`` value of 0 stands for the
+    compounding schedule; other values use length-bucketed batches with that token budget
+    (the compounding settings do not apply to them).
+    """
+    configs = []
+    for iterations, dropout, batch_tokens in itertools.product(args.iterations, args.dropout, args.batch_tokens):
+        base = {"iterations": iterations, "dropout": dropout}
+        if batch_tokens:
+            configs.append({**base, "batch_size_start": None, "batch_size_end": None, "batch_compound": None,
+                            "batch_tokens": batch_tokens})
+            continue
+        for batch_start, batch_end, compound in itertools.product(args.batch_start, args.batch_end,
+                                                                  args.batch_compound):
+            configs.append({**base, "batch_size_start": batch_start, "batch_size_end": batch_end,
+                            "batch_compound": compound, "batch_tokens": None})
+    return configs
+
+
+def run_config(config: Dict, train_path: str, dev_path: Optional[str], dev_fraction: float,
+               nrows: Optional[int], seed: int, patience: Optional[int], save_dir: Optional[str],
+               config_id: int) -> Dict:
+    """Train and score one configuration (runs inside a worker process)."""
+    from ner_training import (
+        load_training_data, split_dev, create_blank_nlp, build_examples, labels_of,
+        train_ner, evaluate_ner, measure_words_per_second,
+    )
+
+    training_data = load_training_data(train_path, nrows=nrows)
+    if dev_path:
+        dev_data = load_training_data(dev_path)
+    else:
+        training_data, dev_data = split_dev(training_data, dev_fraction, seed=seed)
+
+    nlp = create_blank_nlp(labels_of(training_data))
+    quiet = lambda *_: None
+    train_examples = build_examples(nlp, training_data, log=quiet)
+    dev_examples = build_examples(nlp, dev_data, log=quiet)
+
+    schedule = {k: v for k, v in config.items() if v is not None}
+    start = time.perf_counter()
+    train_ner(nlp, train_examples, seed=seed, dev_examples=dev_examples if patience else None,
+              patience=patience, log=quiet, **schedule)
+    train_seconds = time.perf_counter() - start
+
+    scores = evaluate_ner(nlp, dev_examples)
+    wps = measure_words_per_second(nlp, [eg.reference.text for eg in dev_examples])
+
+    model_path = None
+    if save_dir:
+        model_path = os.path.join(save_dir, f"config_{config_id:03d}")
+        nlp.to_disk(model_path)
+
+    return {
+        "config_id": config_id,
+        **config,
+        "dev_precision": scores["precision"],
+        "dev_recall": scores["recall"],
+        "dev_f1": scores["f1"],
+        "iterations_run": nlp.meta["training"]["iterations_run"],
+        "train_seconds": train_seconds,
+        "train_words_per_second": nlp.meta["training"]["train_words_per_second"],
+        "words_per_second": wps,
+        "model_path": model_path,
+    }
+
+
+def mark_pareto(results: List[Dict]) -> List[Dict]:
+    """Flag configurations not dominated on (dev_f1, words_per_second)."""
+    best_f1 = float("-inf")
+    for row in sorted(results, key=lambda r: (-r["words_per_second"], -r["dev_f1"])):
+        row["pareto"] = row["dev_f1"] > best_f1
+        best_f1 = max(best_f1, row["dev_f1"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", default="Training_Set.csv", help="Annotated training CSV")
+    parser.add_argument("--dev", default=None, help="Annotated dev CSV (default: hold out --dev-fraction of --train)")
+    parser.add_argument("--dev-fraction", type=float, default=0.1)
+    parser.add_argument("--nrows", type=int, default=None, help="Only read the first N training rows")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[20])
+    parser.add_argument("--dropout", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--batch-start", type=float, nargs="+", default=[4])
+    parser.add_argument("--batch-end", type=float, nargs="+", default=[32])
+    parser.add_argument("--batch-compound", type=float, nargs="+", default=[1.001])
+    parser.add_argument("--batch-tokens", type=int, nargs="+", default=[0],
+                        help="Length-bucketed batches with this padded-token budget (0 = compounding schedule)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--patience", type=int, default=None,
+                        help="Early-stop each run after this many dev evaluations without improvement")
+    parser.add_argument("--save-models", default=None, help="Directory to save every trained model into")
+    parser.add_argument("--output", default="sweep_results.csv", help="Where to write the results table")
+    parser.add_argument("--min-f1", type=float, default=None, help="Report the fastest config meeting this dev F1")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(args)
+    print(f"Sweeping {len(grid)} configuration(s) on {args.workers} worker(s) x {args.threads_per_worker} thread(s)")
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx,
+                             initializer=limit_threads, initargs=(args.threads_per_worker,)) as pool:
+        futures = {
+            pool.submit(run_config, config, args.train, args.dev, args.dev_fraction, args.nrows,
+                        args.seed, args.patience, args.save_models, i): config
+            for i, config in enumerate(grid)
+        }
+        for future in as_completed(futures):
+            row = future.result()
+            print(f"config {row['config_id']}: F1={row['dev_f1']:.4f} train={row['train_seconds']:.1f}s "
+                  f"train wps={row['train_words_per_second']:.0f} wps={row['words_per_second']:.0f}")
+            results.append(row)
+
+    import pandas as pd
+
+    table = pd.DataFrame(mark_pareto(results)).sort_values("words_per_second", ascending=False)
+    table.to_csv(args.output, index=False)
+    print(table.to_string(index=False))
+    print(f"Sweep results saved to {args.output}")
+
+    if args.min_f1 is not None:
+        eligible = table[table["dev_f1"] >= args.min_f1]
+        if eligible.empty:
+            print(f"No configuration reached dev F1 >= {args.min_f1}")
+        else:
+            best = eligible.iloc[0]
+            print(f"Fastest configuration with dev F1 >= {args.min_f1}: config {best['config_id']} "
+                  f"({best['words_per_second']:.0f} wps, F1={best['dev_f1']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
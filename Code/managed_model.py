@@ -0,0 +1,234 @@
+"""
+Long-running model wrapper with bounded vocabulary and memory.
+
+spaCy interns every unseen token string in the StringStore and adds a lexeme to the
+vocab. PII text repeats almost no strings, so a process that keeps one ``nlp`` for days
+grows without bound. ``ManagedModel`` wraps a loaded pipeline and
+  - runs ``pipe`` in chunks of ``zone_docs`` documents inside ``nlp.memory_zone()``
+    (spaCy >= 3.8), which drops the strings interned by those documents,
+  - every ``check_every`` documents records vocab size, StringStore size and RSS, and
+    reloads the pipeline from an in-memory snapshot (``nlp.to_bytes()`` taken at load
+    time, no disk access) once ``max_vocab`` lexemes or ``max_rss_mb`` are exceeded.
+The wrapper can be used wherever an ``nlp`` is expected (``pipe``, ``__call__`` and every
+other attribute go to the current pipeline). Each chunk is finished, and its memory zone
+closed, before any of its docs are handed out, so a caller that abandons the stream
+never holds the model. With memory zones ``pipe`` therefore yields ``DetachedDoc``s: the
+text, token count and entities (``start_char``, ``end_char``, ``label_``, ``text``)
+copied out of each doc before its strings were dropped. Docs from ``__call__`` are real
+docs, but their strings are only reclaimed by a reload.
+
+Check that memory stays flat over a long run with:
+    python managed_model.py --model "PII Model" --docs 2000000 --tokenizer-only --report soak.csv
+"""
+
+import argparse
+import gc
+import random
+import string
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from budget_batching import current_rss_mb
+
+DEFAULT_ZONE_DOCS = 1000
+DEFAULT_CHECK_EVERY = 10_000
+DEFAULT_MAX_VOCAB = 500_000
+
+
+class DetachedEntity(NamedTuple):
+    start_char: int
+    end_char: int
+    label_: str
+    text: str
+
+
+class DetachedDoc:
+    """What ``ManagedModel.pipe`` keeps of a doc made inside a memory zone."""
+
+    __slots__ = ("text", "ents", "n_tokens")
+
+    def __init__(self, doc):
+        self.text = doc.text
+        self.ents = tuple(DetachedEntity(e.start_char, e.end_char, e.label_, e.text) for e in doc.ents)
+        self.n_tokens = len(doc)
+
+    def __len__(self) -> int:
+        return self.n_tokens
+
+
+def _detach(item, as_tuples: bool):
+    if as_tuples:
+        doc, context = item
+        return DetachedDoc(doc), context
+    return DetachedDoc(item)
+
+
+class ManagedModel:
+    """See the module docstring. ``metrics()`` reports the current counters."""
+
+    def __init__(self, nlp, zone_docs: int = DEFAULT_ZONE_DOCS, check_every: int = DEFAULT_CHECK_EVERY,
+                 max_vocab: Optional[int] = DEFAULT_MAX_VOCAB, max_rss_mb: Optional[float] = None,
+                 use_memory_zones: bool = True, log: Callable = lambda *_: None):
+        self.nlp = nlp
+        self._config = nlp.config
+        self._snapshot = nlp.to_bytes()
+        self.zone_docs = zone_docs
+        self.check_every = check_every
+        self.max_vocab = max_vocab
+        self.max_rss_mb = max_rss_mb
+        self.use_memory_zones = use_memory_zones and hasattr(nlp, "memory_zone")
+        self.log = log
+        self.docs = 0
+        self.reloads = 0
+        self.reload_seconds = 0.0
+        self.baseline_vocab = len(nlp.vocab)
+        self._next_check = check_every
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "ManagedModel":
+        import spacy
+
+        return cls(spacy.load(path), **kwargs)
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper does not define itself
+        return getattr(self.__dict__["nlp"], name)
+
+    def __call__(self, text: str, **kwargs):
+        with self._lock:
+            doc = self.nlp(text, **kwargs)
+            self._count(1)
+        return doc
+
+    def pipe(self, texts: Iterable[str], batch_size: Optional[int] = None, **kwargs) -> Iterator:
+        chunk: List[str] = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= self.zone_docs:
+                yield from self._pipe_chunk(chunk, batch_size, kwargs)
+                chunk = []
+        if chunk:
+            yield from self._pipe_chunk(chunk, batch_size, kwargs)
+
+    def _pipe_chunk(self, chunk: List[str], batch_size: Optional[int], kwargs: Dict) -> List:
+        # Memory zones are not safe to interleave between threads, so chunks run one at a
+        # time. The lock is never held across a yield: a consumer that stops part-way (or
+        # is finalized on another thread) must not leave it taken
+        with self._lock:
+            nlp = self.nlp
+            if self.use_memory_zones:
+                with nlp.memory_zone():
+                    out = [_detach(item, kwargs.get("as_tuples", False))
+                           for item in nlp.pipe(chunk, batch_size=batch_size, **kwargs)]
+            else:
+                out = list(nlp.pipe(chunk, batch_size=batch_size, **kwargs))
+            self._count(len(chunk))
+        return out
+
+    def _count(self, n: int) -> None:
+        self.docs += n
+        if self.docs >= self._next_check:
+            self._next_check = self.docs + self.check_every
+            self.maybe_reload()
+
+    def maybe_reload(self) -> bool:
+        """Reload from the snapshot if the vocab or RSS limit is exceeded."""
+        vocab = len(self.nlp.vocab)
+        rss = current_rss_mb() if self.max_rss_mb else None
+        too_big = self.max_vocab is not None and vocab - self.baseline_vocab > self.max_vocab
+        too_much_memory = rss is not None and rss > self.max_rss_mb
+        if too_big or too_much_memory:
+            self.reload(f"vocab {vocab:,} lexemes" if too_big else f"RSS {rss:.0f} MB")
+            return True
+        return False
+
+    def reload(self, reason: str = "requested") -> None:
+        """Swap in a fresh pipeline built from the load-time snapshot."""
+        from spacy.util import load_model_from_config
+
+        with self._lock:
+            start = time.perf_counter()
+            self.nlp = load_model_from_config(self._config).from_bytes(self._snapshot)
+            gc.collect()
+            self.reloads += 1
+            self.reload_seconds += time.perf_counter() - start
+            self.baseline_vocab = len(self.nlp.vocab)
+        self.log(f"Reloaded model after {self.docs:,} documents ({reason})")
+
+    def metrics(self) -> Dict:
+        return {
+            "docs": self.docs,
+            "vocab": len(self.nlp.vocab),
+            "strings": len(self.nlp.vocab.strings),
+            "rss_mb": current_rss_mb(),
+            "reloads": self.reloads,
+            "reload_seconds": self.reload_seconds,
+        }
+
+
+# -----------------------------
+# Soak test
+# -----------------------------
+def random_pii_texts(n: int, seed: int = 0) -> Iterator[str]:
+    """Short documents made of never-repeating names, emails, card numbers and phone numbers."""
+    rng = random.Random(seed)
+
+    def word(k: int) -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=k))
+
+    for _ in range(n):
+        first, last, company = word(6).title(), word(8).title(), word(7).title()
+        card = " ".join(str(rng.randrange(1000, 10000)) for _ in range(4))
+        yield (f"{first} {last} from {company} Ltd can be reached at {first.lower()}.{last.lower()}@{word(5)}.com "
+               f"or +1-{rng.randrange(200, 999)}-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}; "
+               f"card {card}.")
+
+
+def main(argv=None):
+    import pandas as pd
+    import spacy
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="PII Model")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", default=["plain", "managed"], choices=("plain", "managed"),
+                        help="'plain' = unmanaged nlp.pipe, 'managed' = ManagedModel")
+    parser.add_argument("--tokenizer-only", action="store_true", help="Disable 'ner' to soak the vocab faster")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--zone-docs", type=int, default=DEFAULT_ZONE_DOCS)
+    parser.add_argument("--check-every", type=int, default=DEFAULT_CHECK_EVERY)
+    parser.add_argument("--max-vocab", type=int, default=DEFAULT_MAX_VOCAB)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--sample-every", type=int, default=50_000, help="Record metrics every N documents")
+    parser.add_argument("--report", default="soak_report.csv")
+    args = parser.parse_args(argv)
+
+    rows = []
+    disable = ["ner"] if args.tokenizer_only else []
+    for mode in args.modes:
+        gc.collect()
+        nlp = spacy.load(args.model)
+        if mode == "managed":
+            nlp = ManagedModel(nlp, args.zone_docs, args.check_every, args.max_vocab, args.max_rss_mb, log=print)
+        start = time.perf_counter()
+        for i, doc in enumerate(nlp.pipe(random_pii_texts(args.docs), batch_size=args.batch_size,
+                                         disable=disable), start=1):
+            if i % args.sample_every == 0 or i == args.docs:
+                row = {"mode": mode, "docs": i, "seconds": time.perf_counter() - start}
+                if isinstance(nlp, ManagedModel):
+                    row.update(nlp.metrics(), docs=i)
+                else:
+                    row.update(vocab=len(nlp.vocab), strings=len(nlp.vocab.strings), rss_mb=current_rss_mb(),
+                               reloads=0, reload_seconds=0.0)
+                print(f"{mode:>7} {i:>10,} docs  vocab={row['vocab']:>10,}  strings={row['strings']:>10,}  "
+                      f"rss={row['rss_mb']:.0f} MB  reloads={row['reloads']}")
+                rows.append(row)
+        del nlp
+    pd.DataFrame(rows).to_csv(args.report, index=False)
+    print(f"Soak metrics written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
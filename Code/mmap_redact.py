@@ -0,0 +1,155 @@
+"""
+Length-preserving, memory-mapped redaction for very large text and log files.
+
+Instead of substituting ``[NAME REDACTED]``-style placeholders (which shifts every later
+offset and forces a full rewrite), each byte of a detected entity is overwritten with a
+mask character, e.g. ``X``. The file is memory-mapped, detection runs over windows that
+end on line breaks, and only the entity byte ranges are written, so file size and every
+byte offset stay valid for downstream indexes.
+
+Either mask the file in place or into a copy-on-write clone (reflink where the filesystem
+supports it, a regular copy otherwise):
+    python mmap_redact.py big_export.log --output big_export.masked.log --model "PII Model"
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from span_resolver import resolve_spans
+
+DEFAULT_WINDOW_BYTES = 256 * 1024
+DEFAULT_MASK = "X"
+FICLONE = 0x40049409  # Linux ioctl for reflink copies
+
+
+def clone_file(src: str, dst: str) -> str:
+    """Copy ``src`` to ``dst`` as a reflink (copy-on-write) clone when possible."""
+    try:
+        import fcntl
+
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return "reflink"
+    except (ImportError, OSError):
+        shutil.copyfile(src, dst)
+        return "copy"
+
+
+def _window_end(mm, start: int, limit: int) -> int:
+    """End offset for a window starting at ``start``: after the last newline, else whitespace,
+    else the last UTF-8 character boundary before ``limit``."""
+    if limit >= len(mm):
+        return len(mm)
+    for sep in (b"\n", b" "):
+        cut = mm.rfind(sep, start, limit)
+        if cut != -1:
+            return cut + 1
+    end = limit
+    while end > start and (mm[end] & 0xC0) == 0x80:  # continuation byte
+        end -= 1
+    return end if end > start else limit
+
+
+def iter_windows(mm, window_bytes: int = DEFAULT_WINDOW_BYTES) -> Iterator[Tuple[str, int]]:
+    """Yield ``(text, byte_offset)`` windows covering the whole mapping."""
+    start = 0
+    while start < len(mm):
+        end = _window_end(mm, start, start + window_bytes)
+        yield mm[start:end].decode("utf-8", errors="surrogateescape"), start
+        start = end
+
+
+def char_spans_to_bytes(text: str, spans: List[Tuple]) -> List[Tuple[int, int, str]]:
+    """Convert character offsets in ``text`` to UTF-8 byte offsets (spans sorted, non-overlapping)."""
+    if text.isascii():
+        return [(s[0], s[1], s[2]) for s in spans]
+    converted = []
+    char_pos = byte_pos = 0
+    for start, end, label, *_ in spans:
+        byte_pos += len(text[char_pos:start].encode("utf-8", errors="surrogateescape"))
+        byte_start = byte_pos
+        byte_pos += len(text[start:end].encode("utf-8", errors="surrogateescape"))
+        converted.append((byte_start, byte_pos, label))
+        char_pos = end
+    return converted
+
+
+def redact_file(nlp, path: str, output: Optional[str] = None, mask: str = DEFAULT_MASK,
+                window_bytes: int = DEFAULT_WINDOW_BYTES, policy: str = "longest",
+                batch_size: int = 8, spans_out: Optional[str] = None) -> Dict:
+    """
+    Mask every detected entity in ``path`` (or in a clone written to ``output``) byte for byte.
+    Returns run statistics; ``spans_out`` receives one JSON line per masked byte range.
+    """
+    mask_byte = mask.encode("ascii")
+    if len(mask_byte) != 1:
+        raise ValueError("The mask must be a single ASCII character.")
+
+    target = path
+    copy_mode = None
+    if output:
+        copy_mode = clone_file(path, output)
+        target = output
+
+    stats = {"file": target, "copy": copy_mode, "bytes": os.path.getsize(target),
+             "windows": 0, "entities": 0, "masked_bytes": 0}
+    start_time = time.perf_counter()
+    if stats["bytes"] == 0:
+        stats["seconds"] = 0.0
+        return stats
+
+    spans_file = open(spans_out, "w", encoding="utf-8") if spans_out else None
+    try:
+        with open(target, "r+b") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as mm:
+            docs = nlp.pipe(iter_windows(mm, window_bytes), as_tuples=True, batch_size=batch_size)
+            for doc, offset in docs:
+                stats["windows"] += 1
+                spans = resolve_spans([(e.start_char, e.end_char, e.label_.lower()) for e in doc.ents],
+                                      policy=policy)
+                for start, end, label in char_spans_to_bytes(doc.text, spans):
+                    mm[offset + start:offset + end] = mask_byte * (end - start)
+                    stats["entities"] += 1
+                    stats["masked_bytes"] += end - start
+                    if spans_file:
+                        spans_file.write(json.dumps({"start": offset + start, "end": offset + end,
+                                                     "label": label}) + "\n")
+            mm.flush()
+    finally:
+        if spans_file:
+            spans_file.close()
+
+    stats["seconds"] = time.perf_counter() - start_time
+    stats["mb_per_second"] = stats["bytes"] / 1e6 / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    import spacy
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="UTF-8 text or log file to mask")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--in-place", action="store_true", help="Overwrite entity bytes in the input file")
+    target.add_argument("--output", help="Mask a copy-on-write clone written to this path")
+    parser.add_argument("--model", default="PII Model")
+    parser.add_argument("--mask", default=DEFAULT_MASK, help="Single ASCII character written over entity bytes")
+    parser.add_argument("--window-bytes", type=int, default=DEFAULT_WINDOW_BYTES)
+    parser.add_argument("--policy", default="longest", help="Overlap resolution policy")
+    parser.add_argument("--spans-out", default=None, help="Write masked byte ranges as JSON Lines")
+    args = parser.parse_args(argv)
+
+    nlp = spacy.load(args.model)
+    # Windows are bounded by --window-bytes; make sure spaCy accepts them
+    nlp.max_length = max(nlp.max_length, args.window_bytes + 1)
+    stats = redact_file(nlp, args.path, output=args.output, mask=args.mask, window_bytes=args.window_bytes,
+                        policy=args.policy, spans_out=args.spans_out)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Versioned model registry with hot swapping.
+
+A registry is a directory of immutable model versions plus a pointer to the current one:
+
+    models/
+      CURRENT               "v0003"; replaced atomically by ``activate``
+      v0001/ ... v0003/     spaCy model directories, each with a version.json holding its
+                            labels, pipeline, SHA-256 of the training data, training
+                            settings and benchmark numbers (precision / recall / F1 and
+                            words per second on a test set)
+
+``HotSwapModel`` serves the current version to a long-running process (the app, sharding
+workers, the streaming mode). A background thread polls ``CURRENT``. When it changes, the
+new version is loaded and warmed up next to the old one, and then becomes the active
+model in one atomic step. Work that already holds a lease on the old version (``with
+model.lease() as (version, nlp)``, or one ``pipe`` call) finishes on it. The old model is
+released once its last lease ends (draining). A version that fails to load is skipped and
+the old model keeps serving.
+
+    python model_registry.py register "PII Model" --registry models --train Training_Set.csv \
+        --test Testing_Set.csv --activate
+    python model_registry.py list --registry models
+    python model_registry.py activate v0002 --registry models     # roll back
+"""
+
+import argparse
+import contextlib
+import gc
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CURRENT_FILE = "CURRENT"
+VERSION_FILE = "version.json"
+DEFAULT_POLL_SECONDS = 10.0
+DEFAULT_WARMUP_DOCS = 32
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_registry(path) -> bool:
+    return (Path(path) / CURRENT_FILE).is_file()
+
+
+class ModelRegistry:
+    """Versions under ``root`` (see the module docstring)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, version: str) -> Path:
+        return self.root / version
+
+    def versions(self) -> List[Dict]:
+        found = []
+        for meta_path in sorted(self.root.glob(f"v*/{VERSION_FILE}")):
+            found.append(json.loads(meta_path.read_text(encoding="utf-8")))
+        return found
+
+    def current(self) -> Optional[str]:
+        try:
+            return (self.root / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, version: str) -> None:
+        if not (self.path(version) / VERSION_FILE).is_file():
+            raise ValueError(f"Unknown model version '{version}' in {self.root}")
+        tmp = self.root / (CURRENT_FILE + ".tmp")
+        tmp.write_text(version, encoding="utf-8")
+        os.replace(tmp, self.root / CURRENT_FILE)
+
+    def register(self, model_dir: str, train_data: Optional[str] = None, test_data: Optional[str] = None,
+                 notes: str = "", activate: bool = False) -> Dict:
+        """Copy ``model_dir`` in as the next version, with its metadata and (with ``test_data``) a benchmark."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        numbers = [int(p.name[1:]) for p in self.root.glob("v[0-9]*") if p.name[1:].isdigit()]
+        version = f"v{max(numbers, default=0) + 1:04d}"
+        staging = self.root / f".{version}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(model_dir, staging)
+
+        spacy_meta = json.loads((staging / "meta.json").read_text(encoding="utf-8"))
+        meta = {
+            "version": version,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": str(Path(model_dir).resolve()),
+            "labels": spacy_meta.get("labels", {}).get("ner", []),
+            "pipeline": spacy_meta.get("pipeline", []),
+            "spacy_version": spacy_meta.get("spacy_version"),
+            "training": spacy_meta.get("training", {}),
+            "training_data": {"path": train_data, "sha256": file_sha256(train_data)} if train_data else None,
+            "benchmark": benchmark(str(staging), test_data) if test_data else None,
+            "notes": notes,
+        }
+        (staging / VERSION_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        # The version only becomes visible once it is complete
+        os.replace(staging, self.path(version))
+        if activate or self.current() is None:
+            self.activate(version)
+        return meta
+
+
+def benchmark(model_dir: str, test_data: str) -> Dict:
+    """Precision / recall / F1 and words per second of a model on an annotated test CSV."""
+    import spacy
+
+    from ner_training import build_examples, evaluate_ner, load_training_data, measure_words_per_second
+
+    nlp = spacy.load(model_dir)
+    examples = build_examples(nlp, load_training_data(test_data), log=lambda *_: None)
+    scores = evaluate_ner(nlp, examples)
+    return {
+        "test_data": {"path": test_data, "sha256": file_sha256(test_data)},
+        "precision": scores["precision"],
+        "recall": scores["recall"],
+        "f1": scores["f1"],
+        "words_per_second": measure_words_per_second(nlp, [eg.reference.text for eg in examples]),
+    }
+
+
+# -----------------------------
+# Hot swapping
+# -----------------------------
+class _Slot:
+    __slots__ = ("version", "nlp", "in_flight")
+
+    def __init__(self, version: str, nlp):
+        self.version = version
+        self.nlp = nlp
+        self.in_flight = 0
+
+
+def _default_wrap(nlp):
+    from managed_model import ManagedModel
+
+    return ManagedModel(nlp)
+
+
+def _default_warmup() -> List[str]:
+    from managed_model import random_pii_texts
+
+    return list(random_pii_texts(DEFAULT_WARMUP_DOCS))
+
+
+class HotSwapModel:
+    """
+    Serves the registry's current version and swaps in new ones in the background (see
+    the module docstring). Usable wherever an ``nlp`` is expected: ``pipe`` and
+    ``__call__`` hold a lease for their duration, other attributes go to the active model.
+    """
+
+    def __init__(self, registry: ModelRegistry, poll_seconds: float = DEFAULT_POLL_SECONDS,
+                 warmup_texts: Optional[Iterable[str]] = None, wrap: Callable = _default_wrap,
+                 log: Callable = lambda *_: None):
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.warmup_texts = list(warmup_texts) if warmup_texts is not None else _default_warmup()
+        self.wrap = wrap
+        self.log = log
+        self.swaps = 0
+        self.failed: Dict[str, str] = {}
+        self.loading: Optional[str] = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        version = registry.current()
+        if version is None:
+            raise FileNotFoundError(f"No current model version in {registry.root}")
+        self._active = _Slot(version, self._load(version))
+
+    def _load(self, version: str):
+        import spacy
+
+        nlp = self.wrap(spacy.load(str(self.registry.path(version))))
+        for _ in nlp.pipe(self.warmup_texts):
+            pass
+        return nlp
+
+    @property
+    def version(self) -> str:
+        return self.__dict__["_active"].version
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper does not define itself
+        return getattr(self.__dict__["_active"].nlp, name)
+
+    @contextlib.contextmanager
+    def lease(self) -> Iterator[Tuple[str, object]]:
+        """``(version, nlp)`` that stays loaded until the block ends, even across a swap."""
+        with self._cond:
+            slot = self._active
+            slot.in_flight += 1
+        try:
+            yield slot.version, slot.nlp
+        finally:
+            with self._cond:
+                slot.in_flight -= 1
+                self._cond.notify_all()
+
+    def pipe(self, texts: Iterable[str], **kwargs) -> Iterator:
+        with self.lease() as (_, nlp):
+            yield from nlp.pipe(texts, **kwargs)
+
+    def __call__(self, text: str, **kwargs):
+        with self.lease() as (_, nlp):
+            return nlp(text, **kwargs)
+
+    def check(self) -> bool:
+        """Start loading the registry's current version if it is new; True if a load started."""
+        target = self.registry.current()
+        with self._cond:
+            if target is None or target in (self._active.version, self.loading) or target in self.failed:
+                return False
+            self.loading = target
+        threading.Thread(target=self._swap_to, args=(target,), name=f"load-{target}", daemon=True).start()
+        return True
+
+    def _swap_to(self, version: str) -> None:
+        start = time.perf_counter()
+        try:
+            nlp = self._load(version)
+        except Exception as e:  # keep serving the old version
+            self.failed[version] = str(e)
+            self.log(f"Loading model {version} failed: {e}")
+            with self._cond:
+                self.loading = None
+                self._cond.notify_all()
+            return
+        with self._cond:
+            old = self._active
+            self._active = _Slot(version, nlp)
+            self.loading = None
+            self.swaps += 1
+            self._cond.notify_all()
+            self.log(f"Switched to model {version} (loaded and warmed up in {time.perf_counter() - start:.1f}s)")
+            while old.in_flight:
+                self._cond.wait()
+        old.nlp = None
+        gc.collect()
+        self.log(f"Released model {old.version}")
+
+    def start(self) -> "HotSwapModel":
+        """Poll the registry every ``poll_seconds`` in a daemon thread."""
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name="model-registry-poll", daemon=True)
+            self._poller.start()
+        return self
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except OSError as e:
+                self.log(f"Model registry not readable: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no version is loading; True if idle."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.loading is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def metrics(self) -> Dict:
+        slot = self._active
+        metrics = slot.nlp.metrics() if hasattr(slot.nlp, "metrics") else {}
+        return {**metrics, "version": slot.version, "loading": self.loading, "swaps": self.swaps,
+                "in_flight": slot.in_flight}
+
+
+def model_version(nlp) -> Optional[str]:
+    """Version served by ``nlp`` (None for a model loaded straight from a directory)."""
+    return nlp.version if isinstance(nlp, HotSwapModel) else None
+
+
+@contextlib.contextmanager
+def lease(nlp) -> Iterator[Tuple[Optional[str], object]]:
+    """``HotSwapModel.lease`` for hot-swapped models; ``(None, nlp)`` for any other model."""
+    if isinstance(nlp, HotSwapModel):
+        with nlp.lease() as leased:
+            yield leased
+    else:
+        yield None, nlp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registry", default="models", help="Registry directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="Add a trained model directory as a new version")
+    register.add_argument("model_dir")
+    register.add_argument("--train", default=None, help="Training CSV (its SHA-256 is recorded)")
+    register.add_argument("--test", default=None, help="Annotated test CSV to benchmark the model on")
+    register.add_argument("--notes", default="")
+    register.add_argument("--activate", action="store_true", help="Make it the current version")
+    commands.add_parser("list", help="List versions")
+    commands.add_parser("activate", help="Make a version current").add_argument("version")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.registry)
+    if args.command == "register":
+        meta = registry.register(args.model_dir, args.train, args.test, args.notes, args.activate)
+        print(json.dumps(meta, indent=2))
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"Current version: {args.version}")
+    else:
+        current = registry.current()
+        for meta in registry.versions():
+            bench = meta.get("benchmark") or {}
+            score = f"F1={bench['f1']:.4f} {bench['words_per_second']:,.0f} wps" if bench else "not benchmarked"
+            marker = "*" if meta["version"] == current else " "
+            print(f"{marker} {meta['version']}  {meta['created']}  {score}  labels={','.join(meta['labels'])}"
+                  f"{'  ' + meta['notes'] if meta['notes'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
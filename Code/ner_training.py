@@ -0,0 +1,252 @@
+"""
+Reusable training helpers for the custom spaCy PII NER model.
+
+The main pipeline script and the tooling around it (hyperparameter sweep, etc.)
+share these functions so that every run trains and scores the model the same way.
+"""
+
+import ast
+import math
+import random
+import time
+import warnings
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import spacy
+from spacy.training import Example, offsets_to_biluo_tags
+from spacy.util import minibatch, compounding
+
+from span_resolver import resolve_annotations
+
+Entity = Tuple[int, int, str]
+TrainingRecord = Tuple[str, Dict[str, List[Entity]]]
+
+# Defaults used by the original training section
+DEFAULT_ITERATIONS = 20
+DEFAULT_DROPOUT = 0.5
+DEFAULT_BATCH_SIZE_START = 4
+DEFAULT_BATCH_SIZE_END = 32
+DEFAULT_BATCH_COMPOUND = 1.001
+# Length-bucketed batching (``batch_tokens``): documents in one bucket differ in length
+# by at most this factor
+DEFAULT_BUCKET_RATIO = 1.25
+
+warnings.filterwarnings("ignore", category=UserWarning, module="spacy.training.iob_utils")
+
+
+def load_training_data(csv_path: str, nrows: Optional[int] = None,
+                       overlap_policy: str = "longest") -> List[TrainingRecord]:
+    """
+    Read an annotated CSV ('text' + 'True Predictions') into (text, annotations) pairs.
+    Overlapping annotations are resolved with ``span_resolver`` using ``overlap_policy``.
+    """
+    return records_from_frame(pd.read_csv(csv_path, nrows=nrows), overlap_policy)
+
+
+def records_from_frame(dataset: pd.DataFrame, overlap_policy: str = "longest") -> List[TrainingRecord]:
+    """(text, annotations) pairs from an already loaded annotated DataFrame."""
+    training_data = []
+    for text, raw_entities in zip(dataset["text"], dataset["True Predictions"]):
+        entities = resolve_annotations(ast.literal_eval(raw_entities), policy=overlap_policy)
+        training_data.append((text, {"entities": entities}))
+    return training_data
+
+
+def split_dev(training_data: List[TrainingRecord], dev_fraction: float,
+              seed: int = 0) -> Tuple[List[TrainingRecord], List[TrainingRecord]]:
+    """Deterministically hold out ``dev_fraction`` of the records as a dev split."""
+    shuffled = list(training_data)
+    random.Random(seed).shuffle(shuffled)
+    n_dev = int(len(shuffled) * dev_fraction)
+    return shuffled[n_dev:], shuffled[:n_dev]
+
+
+def create_blank_nlp(labels: Iterable[str], model: Optional[Dict] = None):
+    """
+    Blank English pipeline with a single NER component holding ``labels``. ``model``
+    overrides the component's default architecture config (see ``distillation.py``).
+    """
+    nlp = spacy.blank("en")
+    ner = nlp.add_pipe("ner", config={"model": model} if model else {})
+    for label in sorted(set(labels)):
+        ner.add_label(label)
+    return nlp
+
+
+def build_examples(nlp, training_data: List[TrainingRecord], log: Callable = print) -> List[Example]:
+    """Convert (text, annotations) pairs into Examples, skipping misaligned records."""
+    examples = []
+    for index, (text, annotations) in enumerate(training_data):
+        doc = nlp.make_doc(text)
+        # Check alignment
+        try:
+            offsets_to_biluo_tags(doc, annotations["entities"])
+        except Exception as e:
+            log(f"Skipping misaligned entity in record {index}: {e}")
+            continue
+        examples.append(Example.from_dict(doc, annotations))
+    return examples
+
+
+def labels_of(training_data: List[TrainingRecord]) -> List[str]:
+    return sorted({ent[2] for _, annotations in training_data for ent in annotations["entities"]})
+
+
+def length_buckets(examples: List[Example], bucket_ratio: float = DEFAULT_BUCKET_RATIO) -> List[List[Example]]:
+    """Group examples into buckets whose token lengths differ by at most ``bucket_ratio``."""
+    buckets: Dict[int, List[Example]] = {}
+    scale = math.log(bucket_ratio)
+    for eg in examples:
+        buckets.setdefault(int(math.log(max(len(eg.reference), 1)) / scale), []).append(eg)
+    return [buckets[key] for key in sorted(buckets)]
+
+
+def bucketed_batches(examples: List[Example], batch_tokens: int, bucket_ratio: float = DEFAULT_BUCKET_RATIO,
+                     rng: Optional[random.Random] = None) -> Iterator[List[Example]]:
+    """
+    Batches of similar-length examples holding at most ``batch_tokens`` padded tokens
+    (batch size x longest document) each. Examples are shuffled inside their bucket and
+    the batch order is shuffled, so every epoch still sees a different order. A document
+    longer than the budget gets a batch of its own.
+    """
+    rng = rng or random.Random()
+    batches = []
+    for bucket in length_buckets(examples, bucket_ratio):
+        rng.shuffle(bucket)
+        batch, longest = [], 0
+        for eg in bucket:
+            n_tokens = len(eg.reference)
+            if batch and max(longest, n_tokens) * (len(batch) + 1) > batch_tokens:
+                batches.append(batch)
+                batch, longest = [], 0
+            batch.append(eg)
+            longest = max(longest, n_tokens)
+        if batch:
+            batches.append(batch)
+    rng.shuffle(batches)
+    return iter(batches)
+
+
+def train_ner(
+    nlp,
+    examples: List[Example],
+    iterations: int = DEFAULT_ITERATIONS,
+    dropout: float = DEFAULT_DROPOUT,
+    batch_size_start: float = DEFAULT_BATCH_SIZE_START,
+    batch_size_end: float = DEFAULT_BATCH_SIZE_END,
+    batch_compound: float = DEFAULT_BATCH_COMPOUND,
+    batch_tokens: Optional[int] = None,
+    bucket_ratio: float = DEFAULT_BUCKET_RATIO,
+    seed: Optional[int] = None,
+    dev_examples: Optional[List[Example]] = None,
+    eval_every: int = 1,
+    patience: Optional[int] = None,
+    min_delta: float = 0.0,
+    checkpoint_dir: Optional[str] = None,
+    log: Callable = print,
+):
+    """
+    Train the NER component of ``nlp`` in place and return it.
+
+    Batches follow the ``compounding(batch_size_start, batch_size_end, batch_compound)``
+    schedule over the examples in list order, unless ``batch_tokens`` is given: then they
+    are length-bucketed with a padded-token budget (see ``bucketed_batches``).
+
+    With ``dev_examples`` the model is scored every ``eval_every`` iterations; the best
+    state (by dev entity F1) is kept, optionally written to ``checkpoint_dir`` each time it
+    improves, and restored before returning. Training stops early once F1 has not improved
+    by more than ``min_delta`` for ``patience`` evaluations. A summary of the run is stored
+    in ``nlp.meta["training"]``.
+    """
+    if seed is not None:
+        spacy.util.fix_random_seed(seed)
+
+    # Initialize the optimizer
+    optimizer = nlp.begin_training()
+
+    best_f1 = float("-inf")
+    best_bytes = None
+    best_iteration = None
+    evals_without_improvement = 0
+    history = []
+
+    # Training loop
+    rng = random.Random(seed)
+    iterations_run = 0
+    update_words = 0
+    update_seconds = 0.0
+    for i in range(iterations):
+        losses = {}
+        if batch_tokens:
+            batches = bucketed_batches(examples, batch_tokens, bucket_ratio, rng)
+        else:
+            batches = minibatch(examples, size=compounding(batch_size_start, batch_size_end, batch_compound))
+        for batch in batches:
+            start = time.perf_counter()
+            nlp.update(batch, losses=losses, drop=dropout, sgd=optimizer)
+            update_seconds += time.perf_counter() - start
+            update_words += sum(len(eg.reference) for eg in batch)
+        iterations_run = i + 1
+        log(f"Iteration {i + 1}, Losses: {losses}")
+
+        if not dev_examples or ((i + 1) % eval_every != 0 and i + 1 != iterations):
+            continue
+
+        scores = evaluate_ner(nlp, dev_examples)
+        history.append({"iteration": i + 1, "losses": {k: float(v) for k, v in losses.items()}, **scores})
+        per_label = ", ".join(f"{label}={s['f1']:.3f}" for label, s in sorted(scores["per_label"].items()))
+        log(f"Iteration {i + 1}, Dev F1: {scores['f1']:.4f} ({per_label})")
+
+        if scores["f1"] > best_f1 + min_delta:
+            best_f1 = scores["f1"]
+            best_iteration = i + 1
+            best_bytes = nlp.to_bytes()
+            evals_without_improvement = 0
+            if checkpoint_dir:
+                nlp.to_disk(checkpoint_dir)
+                log(f"Saved best checkpoint (iteration {i + 1}) to {checkpoint_dir}")
+        else:
+            evals_without_improvement += 1
+            if patience is not None and evals_without_improvement >= patience:
+                log(f"Dev F1 has not improved for {patience} evaluation(s); stopping after iteration {i + 1}")
+                break
+
+    if best_bytes is not None:
+        nlp.from_bytes(best_bytes)
+        log(f"Restored best model from iteration {best_iteration} (dev F1 {best_f1:.4f})")
+
+    nlp.meta["training"] = {
+        "iterations_run": iterations_run,
+        "train_words_per_second": update_words / update_seconds if update_seconds else 0.0,
+        "best_iteration": best_iteration,
+        "best_dev_f1": best_f1 if best_bytes is not None else None,
+        "history": history,
+    }
+    return nlp
+
+
+def evaluate_ner(nlp, examples: List[Example]) -> Dict:
+    """Entity-level precision/recall/F1, overall and per label."""
+    scores = nlp.evaluate(examples)
+    per_label = {
+        label: {"precision": s["p"], "recall": s["r"], "f1": s["f"]}
+        for label, s in (scores.get("ents_per_type") or {}).items()
+    }
+    return {
+        "precision": scores.get("ents_p") or 0.0,
+        "recall": scores.get("ents_r") or 0.0,
+        "f1": scores.get("ents_f") or 0.0,
+        "per_label": per_label,
+    }
+
+
+def measure_words_per_second(nlp, texts: List[str], batch_size: int = 64, repeats: int = 1) -> float:
+    """Inference throughput of ``nlp`` over ``texts`` in words (tokens) per second."""
+    n_words = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for doc in nlp.pipe(texts, batch_size=batch_size):
+            n_words += len(doc)
+    elapsed = time.perf_counter() - start
+    return n_words / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,77 @@
+"""
+Chunked CSV output for batch results.
+
+Output chunks are appended to a file as they are produced, optionally through gzip or a
+zip archive, so the full result never has to be held in memory as a DataFrame, a CSV
+string and an encoded byte string at once.
+"""
+
+import gzip
+import io
+import os
+import zipfile
+from typing import List, Optional
+
+import pandas as pd
+
+COMPRESSIONS = ("none", "gzip", "zip")
+
+SUFFIXES = {"none": ".csv", "gzip": ".csv.gz", "zip": ".zip"}
+MIME_TYPES = {"none": "text/csv", "gzip": "application/gzip", "zip": "application/zip"}
+
+
+def output_filename(stem: str, compression: str = "none") -> str:
+    return stem + SUFFIXES[compression]
+
+
+class ChunkedCsvWriter:
+    """
+    Append DataFrame chunks to ``path`` as one CSV (header written once).
+
+    The first chunk fixes the column order, unless ``columns`` gives the header up front;
+    later chunks are aligned to it. Columns that appear only in later chunks cannot be
+    added to an already-written header and are reported in ``dropped_columns``.
+    """
+
+    def __init__(self, path: str, compression: str = "none", arcname: Optional[str] = None,
+                 columns: Optional[List[str]] = None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Choose one of {COMPRESSIONS}.")
+        self.path = path
+        self.compression = compression
+        self.columns = list(columns) if columns is not None else None
+        self.rows = 0
+        self.dropped_columns = set()
+        self._started = False
+        self._archive = None
+        if compression == "gzip":
+            self._stream = gzip.open(path, "wt", encoding="utf-8", newline="")
+        elif compression == "zip":
+            self._archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+            member = arcname or os.path.basename(path)[: -len(SUFFIXES["zip"])] + ".csv"
+            self._stream = io.TextIOWrapper(self._archive.open(member, "w", force_zip64=True),
+                                            encoding="utf-8", newline="")
+        else:
+            self._stream = open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(df.columns)
+        else:
+            self.dropped_columns.update(c for c in df.columns if c not in self.columns)
+            df = df.reindex(columns=self.columns)
+        df.to_csv(self._stream, index=False, header=not self._started)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self) -> None:
+        self._stream.close()
+        if self._archive is not None:
+            self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,289 @@
+"""
+Text extraction from PDF files and uploads.
+
+Extraction goes page by page through an ordered list of backends: a page that the first
+backend fails on (or returns no text for) is retried with the next backend, so one bad
+page no longer means re-reading the whole document. Available backends:
+  - pdfplumber (pdfminer.six; careful layout handling, slow),
+  - pypdfium2 (PDFium bindings; typically an order of magnitude faster),
+  - pypdf / PyPDF2.
+The order comes from the ``backends`` argument, the ``PDF_BACKENDS`` environment variable
+(e.g. ``PDF_BACKENDS=pypdfium2,pdfplumber``) or ``DEFAULT_BACKENDS``; only installed
+backends are used. Compare them on your own documents with:
+    python pdf_extract.py bench docs/*.pdf
+
+Results are cached by the SHA-256 of the PDF bytes (plus the backend order) in an
+in-process LRU cache, so re-uploads and re-runs skip extraction. An on-disk cache can be
+enabled with ``PDF_TEXT_CACHE_DIR``; note that it stores the raw, un-anonymized text.
+"""
+
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+PDF_EXTENSIONS = (".pdf",)
+
+DEFAULT_BACKENDS = ("pdfplumber", "pypdfium2", "pypdf", "PyPDF2")
+BACKEND_MODULES = {"pdfplumber": "pdfplumber", "pypdfium2": "pypdfium2", "pypdf": "pypdf", "PyPDF2": "PyPDF2"}
+DEFAULT_CACHE_ENTRIES = 64
+
+# (page count, page_text(i), close)
+OpenedPdf = Tuple[int, Callable[[int], str], Callable[[], None]]
+
+
+def _open_pdfplumber(data: bytes) -> OpenedPdf:
+    import pdfplumber  # type: ignore
+
+    pdf = pdfplumber.open(io.BytesIO(data))
+
+    def page_text(i: int) -> str:
+        page = pdf.pages[i]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()  # drop the page's parsed layout objects
+
+    return len(pdf.pages), page_text, pdf.close
+
+
+def _open_pypdfium2(data: bytes) -> OpenedPdf:
+    import pypdfium2 as pdfium  # type: ignore
+
+    pdf = pdfium.PdfDocument(data)
+
+    def page_text(i: int) -> str:
+        page = pdf[i]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+    return len(pdf), page_text, pdf.close
+
+
+def _pypdf_opener(module: str) -> Callable[[bytes], OpenedPdf]:
+    def open_pdf(data: bytes) -> OpenedPdf:
+        reader = importlib.import_module(module).PdfReader(io.BytesIO(data))
+        return len(reader.pages), lambda i: reader.pages[i].extract_text() or "", lambda: None
+    return open_pdf
+
+
+BACKENDS: Dict[str, Callable[[bytes], OpenedPdf]] = {
+    "pdfplumber": _open_pdfplumber,
+    "pypdfium2": _open_pypdfium2,
+    "pypdf": _pypdf_opener("pypdf"),
+    "PyPDF2": _pypdf_opener("PyPDF2"),
+}
+
+
+def available_backends(order: Optional[Sequence[str]] = None) -> List[str]:
+    """Installed backends, in ``order`` (default: ``PDF_BACKENDS`` or ``DEFAULT_BACKENDS``)."""
+    if order is None:
+        configured = os.environ.get("PDF_BACKENDS")
+        order = [b.strip() for b in configured.split(",") if b.strip()] if configured else DEFAULT_BACKENDS
+    unknown = [b for b in order if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown PDF backend(s) {unknown}. Choose from {list(BACKENDS)}.")
+    return [b for b in order if importlib.util.find_spec(BACKEND_MODULES[b]) is not None]
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+_memory_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+
+def _cache_key(data: bytes, backends: Sequence[str]) -> str:
+    return hashlib.sha256(data).hexdigest() + "-" + "+".join(backends)
+
+
+def _cache_get(key: str, cache_dir: Optional[str]) -> Optional[List[str]]:
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+    if cache_dir:
+        path = Path(cache_dir) / f"{key}.json"
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                pages = json.load(f)
+            _cache_put(key, pages, None)
+            return pages
+    return None
+
+
+def _cache_put(key: str, pages: List[str], cache_dir: Optional[str]) -> None:
+    _memory_cache[key] = pages
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > DEFAULT_CACHE_ENTRIES:
+        _memory_cache.popitem(last=False)
+    if cache_dir:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        tmp = Path(cache_dir) / f"{key}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp, Path(cache_dir) / f"{key}.json")
+
+
+def clear_cache() -> None:
+    _memory_cache.clear()
+
+
+# -----------------------------
+# Extraction
+# -----------------------------
+def _read_bytes(file) -> bytes:
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, "read"):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return file.read()
+    with open(file, "rb") as f:
+        return f.read()
+
+
+def extract_pdf_pages(file, backends: Optional[Sequence[str]] = None, use_cache: bool = True,
+                      cache_dir: Optional[str] = None, stats: Optional[Dict] = None) -> List[str]:
+    """
+    Text of every page of a PDF (path, bytes or file-like such as an UploadedFile).
+
+    Each page is taken from the first backend that returns non-empty text for it; later
+    backends are only opened when a page needs them. ``stats`` (if given) receives the
+    backend used per page and whether the result came from the cache.
+    """
+    backends = available_backends(backends)
+    if not backends:
+        raise RuntimeError("No PDF backend installed. Install pdfplumber, pypdfium2, pypdf or PyPDF2.")
+    data = _read_bytes(file)
+    cache_dir = cache_dir or os.environ.get("PDF_TEXT_CACHE_DIR")
+    key = _cache_key(data, backends)
+    if use_cache:
+        cached = _cache_get(key, cache_dir)
+        if cached is not None:
+            if stats is not None:
+                stats["cached"] = True
+            return cached
+
+    opened: Dict[str, Optional[OpenedPdf]] = {}
+    errors = []
+
+    def get(backend: str) -> Optional[OpenedPdf]:
+        if backend not in opened:
+            try:
+                opened[backend] = BACKENDS[backend](data)
+            except Exception as e:
+                errors.append(f"{backend}: {e}")
+                opened[backend] = None
+        return opened[backend]
+
+    try:
+        page_count = next((pdf[0] for pdf in map(get, backends) if pdf is not None), None)
+        if page_count is None:
+            raise RuntimeError(f"Failed to read PDF: {'; '.join(errors)}")
+        pages, used = [], []
+        for i in range(page_count):
+            text, source = "", None
+            for backend in backends:
+                pdf = get(backend)
+                if pdf is None or i >= pdf[0]:
+                    continue
+                try:
+                    text = pdf[1](i)
+                except Exception:
+                    continue
+                if text.strip():
+                    source = backend
+                    break
+            pages.append(text)
+            used.append(source)
+    finally:
+        for pdf in opened.values():
+            if pdf is not None:
+                pdf[2]()
+
+    if use_cache:
+        _cache_put(key, pages, cache_dir)
+    if stats is not None:
+        stats.update({"cached": False, "pages": len(pages), "page_backends": used})
+    return pages
+
+
+def extract_pdf_text(file, backends: Optional[Sequence[str]] = None, use_cache: bool = True) -> str:
+    """
+    Extract text from a PDF UploadedFile or path-like, page by page with backend fallback.
+    Returns a single string with a newline after every page.
+    """
+    return "".join(page + "\n" for page in extract_pdf_pages(file, backends, use_cache))
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def benchmark_backends(paths: Sequence[str], backends: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Pages/second, characters and empty or failed pages per backend over ``paths``."""
+    results = []
+    documents = [_read_bytes(p) for p in paths]
+    for backend in available_backends(backends or list(BACKENDS)):
+        row = {"backend": backend, "pages": 0, "empty_pages": 0, "failed_documents": 0, "chars": 0, "seconds": 0.0}
+        for data in documents:
+            start = time.perf_counter()
+            try:
+                pages = extract_pdf_pages(data, [backend], use_cache=False)
+            except Exception:
+                row["failed_documents"] += 1
+                pages = []
+            row["seconds"] += time.perf_counter() - start
+            row["pages"] += len(pages)
+            row["empty_pages"] += sum(1 for p in pages if not p.strip())
+            row["chars"] += sum(len(p) for p in pages)
+        row["pages_per_second"] = row["pages"] / row["seconds"] if row["seconds"] else 0.0
+        results.append(row)
+    return results
+
+
+def recommend_order(results: List[Dict], min_char_ratio: float = 0.95) -> List[str]:
+    """Fastest first among backends that extract nearly as much text as the best one."""
+    best_chars = max((r["chars"] for r in results), default=0)
+    complete = [r for r in results if r["failed_documents"] == 0 and r["chars"] >= min_char_ratio * best_chars]
+    rest = [r for r in results if r not in complete]
+    ordered = sorted(complete, key=lambda r: -r["pages_per_second"]) + sorted(rest, key=lambda r: -r["chars"])
+    return [r["backend"] for r in ordered]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="Time every installed backend on the given PDFs")
+    bench.add_argument("paths", nargs="+")
+    extract = commands.add_parser("extract", help="Print the text of a PDF")
+    extract.add_argument("path")
+    extract.add_argument("--backends", default=None, help="Comma-separated backend order")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        results = benchmark_backends(args.paths)
+        for r in results:
+            print(f"{r['backend']:<11} {r['pages']:>6} pages  {r['pages_per_second']:>9.1f} pages/s  "
+                  f"{r['chars']:>10} chars  {r['empty_pages']:>4} empty  {r['failed_documents']:>3} failed")
+        print(f"Suggested setting: PDF_BACKENDS={','.join(recommend_order(results))}")
+    else:
+        stats = {}
+        pages = extract_pdf_pages(args.path, args.backends.split(",") if args.backends else None,
+                                  use_cache=False, stats=stats)
+        print("".join(page + "\n" for page in pages))
+        print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Hashed inverted index of detected PII: "which documents contained this value?".
+
+Batch runs can feed every entity they find into a ``PiiIndexWriter``. The index stores
+no PII. Each entity value is normalized per label (digits only for phone / SSN / card
+numbers, case-folded with collapsed whitespace otherwise). It is then reduced to an 8-byte
+key: the truncated HMAC-SHA256 of label and value under a secret salt
+(``PII_INDEX_SALT``). A posting holds that key plus the document (source and row), the
+column and the character offsets. Without the salt the keys cannot be tested against
+guessed SSNs or e-mails. The manifest only stores a fingerprint of the salt, so a query
+with the wrong salt fails instead of silently finding nothing. Distinct values share a key
+with probability ~n²/2^65, so a hit is a pointer to re-check, not proof.
+
+Layout of an index directory (appended to incrementally, safe to read while it grows):
+  - ``seg-NNNNN.keys.npy`` / ``seg-NNNNN.postings.npy``: one segment per flush, sorted
+    by key (uint64) with parallel postings (doc id, column id, start, end),
+  - ``docs.jsonl`` + ``docs.idx``: document table (source, row) and the byte offset of
+    each of its lines,
+  - ``index.json``: manifest listing the committed segments and documents. It is rewritten
+    atomically after every flush, so a crashed run leaves a readable index.
+Lookups memory-map every segment and binary-search the keys, so they take milliseconds.
+A query root may hold several index directories (e.g. one per shard); they are all searched.
+
+    PII_INDEX_SALT=... python sharding.py local data/ --workers 4 --out-dir run --index
+    PII_INDEX_SALT=... python pii_index.py query run/index 123-45-6789 --label ssn
+    PII_INDEX_SALT=... python pii_index.py compact run/index/shard-00000
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SALT_ENV_VAR = "PII_INDEX_SALT"
+MIN_SALT_BYTES = 16
+INDEX_VERSION = 1
+MANIFEST = "index.json"
+DEFAULT_FLUSH_POSTINGS = 1_000_000
+DIGIT_LABELS = ("phone", "ssn", "credit_card")
+
+POSTING_DTYPE = np.dtype([("doc", "<u4"), ("column", "<u2"), ("start", "<u4"), ("end", "<u4")])
+WHITESPACE = re.compile(r"\s+")
+
+
+def load_salt(path: Optional[str] = None) -> bytes:
+    """The index salt from ``path`` or the ``PII_INDEX_SALT`` environment variable."""
+    if path:
+        with open(path, "rb") as f:
+            salt = f.read().strip()
+    else:
+        salt = os.environ.get(SALT_ENV_VAR, "").encode("utf-8")
+    if len(salt) < MIN_SALT_BYTES:
+        raise ValueError(f"Index salt from {path or SALT_ENV_VAR} must be at least {MIN_SALT_BYTES} bytes.")
+    return salt
+
+
+def normalize(label: str, value: str) -> str:
+    """Canonical form of ``value`` so that formatting differences map to the same key."""
+    label = label.lower()
+    if label in DIGIT_LABELS:
+        digits = re.sub(r"\D", "", value)
+        if digits:
+            return digits
+    value = WHITESPACE.sub(" ", value).strip().casefold()
+    if label == "url":
+        value = value.rstrip("/")
+    return value.strip(" .,;:\"'()[]")
+
+
+def _salt_fingerprint(salt: bytes) -> str:
+    return hmac.new(salt, b"pii-index-salt-check", hashlib.sha256).hexdigest()[:16]
+
+
+class _Hasher:
+    def __init__(self, salt: bytes):
+        self._salt = salt
+
+    def __call__(self, label: str, value: str) -> int:
+        message = f"{label.lower()}\x1f{normalize(label, value)}".encode("utf-8")
+        return int.from_bytes(hmac.new(self._salt, message, hashlib.sha256).digest()[:8], "little")
+
+
+def _next_segment(segments: List[Dict]) -> str:
+    """Name after the highest listed segment (compaction leaves gaps, so not ``len(segments)``)."""
+    return f"seg-{max((int(s['name'].split('-')[1]) for s in segments), default=-1) + 1:05d}"
+
+
+def _write_json_atomic(path: Path, data: Dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+class PiiIndexWriter:
+    """
+    Appends postings to the index in ``directory`` (created, or continued if it exists).
+    ``add`` has the signature of the ``on_spans`` hook of ``pii_pipeline.process_tables``;
+    buffered postings are written as a segment every ``flush_postings`` and on ``close``.
+    """
+
+    def __init__(self, directory: str, salt: bytes, flush_postings: int = DEFAULT_FLUSH_POSTINGS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_postings = flush_postings
+        self._hash = _Hasher(salt)
+        manifest_path = self.directory / MANIFEST
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if self.manifest["salt_check"] != _salt_fingerprint(salt):
+                raise ValueError(f"{directory} was built with a different salt.")
+        else:
+            self.manifest = {"version": INDEX_VERSION, "salt_check": _salt_fingerprint(salt), "hash_bytes": 8,
+                             "segments": [], "docs": 0, "docs_bytes": 0, "postings": 0, "columns": [],
+                             "labels": []}
+        self._columns = {name: i for i, name in enumerate(self.manifest["columns"])}
+        self._labels = set(self.manifest["labels"])
+        self._keys: List[int] = []
+        self._postings: List[Tuple[int, int, int, int]] = []
+        self._new_docs: List[bytes] = []
+        # Row -> doc id of the source being added; kept across flushes, since a flush can
+        # fall between two columns of the same rows
+        self._source: Optional[str] = None
+        self._doc_ids: Dict[int, int] = {}
+
+    def __enter__(self) -> "PiiIndexWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _doc_id(self, source: str, row: int) -> int:
+        if source != self._source:
+            self._source, self._doc_ids = source, {}
+        doc = self._doc_ids.get(row)
+        if doc is None:
+            doc = self.manifest["docs"] + len(self._new_docs)
+            self._doc_ids[row] = doc
+            self._new_docs.append((json.dumps({"source": source, "row": row}, ensure_ascii=False) + "\n")
+                                  .encode("utf-8"))
+        return doc
+
+    def add(self, source: str, rows: Sequence[int], column: str, texts: Sequence[str], spans: Iterable) -> None:
+        """Index the entities ``spans`` (``DocSpans`` or ``(start, end, label)`` lists) of ``texts``."""
+        column_id = self._columns.setdefault(column, len(self._columns))
+        for row, text, ents in zip(rows, texts, spans):
+            ents = ents.tuples() if hasattr(ents, "tuples") else ents
+            if not len(ents):
+                continue
+            doc = self._doc_id(source, int(row))
+            for start, end, label in ents:
+                self._keys.append(self._hash(label, text[start:end]))
+                self._postings.append((doc, column_id, start, end))
+                self._labels.add(label.lower())
+        if len(self._keys) >= self.flush_postings:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered postings as a new segment and commit it to the manifest."""
+        if not self._keys and not self._new_docs:
+            return
+        segments = self.manifest["segments"]
+        if self._keys:
+            keys = np.array(self._keys, dtype="<u8")
+            postings = np.array(self._postings, dtype=POSTING_DTYPE)
+            order = np.argsort(keys, kind="stable")
+            name = _next_segment(segments)
+            np.save(self.directory / f"{name}.keys.npy", keys[order])
+            np.save(self.directory / f"{name}.postings.npy", postings[order])
+            segments.append({"name": name, "postings": len(keys)})
+        # Documents are appended before the manifest points at them
+        offsets = []
+        with open(self.directory / "docs.jsonl", "ab") as f:
+            f.truncate(self.manifest["docs_bytes"])
+            position = self.manifest["docs_bytes"]
+            for line in self._new_docs:
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+        with open(self.directory / "docs.idx", "ab") as f:
+            f.truncate(self.manifest["docs"] * 8)
+            f.write(np.array(offsets, dtype="<u8").tobytes())
+        self.manifest.update(docs=self.manifest["docs"] + len(self._new_docs), docs_bytes=position,
+                             postings=self.manifest["postings"] + len(self._keys),
+                             columns=sorted(self._columns, key=self._columns.get), labels=sorted(self._labels))
+        _write_json_atomic(self.directory / MANIFEST, self.manifest)
+        self._keys, self._postings, self._new_docs = [], [], []
+
+    def close(self) -> None:
+        self.flush()
+
+
+def compact(directory: str, salt: bytes) -> Dict:
+    """Merge all segments of one index directory into a single segment."""
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+    if manifest["salt_check"] != _salt_fingerprint(salt):
+        raise ValueError(f"{directory} was built with a different salt.")
+    old = manifest["segments"]
+    if len(old) < 2:
+        return manifest
+    keys = np.concatenate([np.load(directory / f"{s['name']}.keys.npy") for s in old])
+    postings = np.concatenate([np.load(directory / f"{s['name']}.postings.npy") for s in old])
+    order = np.argsort(keys, kind="stable")
+    name = _next_segment(old)
+    np.save(directory / f"{name}.keys.npy", keys[order])
+    np.save(directory / f"{name}.postings.npy", postings[order])
+    manifest["segments"] = [{"name": name, "postings": len(keys)}]
+    _write_json_atomic(directory / MANIFEST, manifest)
+    for segment in old:
+        for suffix in (".keys.npy", ".postings.npy"):
+            (directory / f"{segment['name']}{suffix}").unlink()
+    return manifest
+
+
+# -----------------------------
+# Querying
+# -----------------------------
+class _IndexDir:
+    def __init__(self, directory: Path, salt: bytes):
+        self.directory = directory
+        self.manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        if self.manifest["salt_check"] != _salt_fingerprint(salt):
+            raise ValueError(f"{directory} was built with a different salt.")
+        self.segments = [(np.load(directory / f"{s['name']}.keys.npy", mmap_mode="r"),
+                          np.load(directory / f"{s['name']}.postings.npy", mmap_mode="r"))
+                         for s in self.manifest["segments"]]
+        self.doc_offsets = np.memmap(directory / "docs.idx", dtype="<u8", mode="r", shape=(self.manifest["docs"],)) \
+            if self.manifest["docs"] else np.zeros(0, dtype="<u8")
+
+    def postings(self, key: int) -> Iterator:
+        for keys, postings in self.segments:
+            lo, hi = np.searchsorted(keys, key, "left"), np.searchsorted(keys, key, "right")
+            yield from postings[lo:hi]
+
+    def document(self, doc: int, handle) -> Dict:
+        handle.seek(int(self.doc_offsets[doc]))
+        return json.loads(handle.readline())
+
+
+class PiiIndexReader:
+    """Searches every index directory under ``root`` (including ``root`` itself)."""
+
+    def __init__(self, root: str, salt: bytes):
+        self._hash = _Hasher(salt)
+        self.indexes = [_IndexDir(path.parent, salt) for path in sorted(Path(root).rglob(MANIFEST))]
+        if not self.indexes:
+            raise FileNotFoundError(f"No PII index ({MANIFEST}) found under {root}")
+        self.labels = sorted({label for index in self.indexes for label in index.manifest["labels"]})
+
+    def lookup(self, value: str, label: Optional[str] = None) -> List[Dict]:
+        """Every posting of ``value`` (under ``label``, or under every label in the index)."""
+        hits = []
+        for label in [label.lower()] if label else self.labels:
+            key = self._hash(label, value)
+            for index in self.indexes:
+                found = list(index.postings(key))
+                if not found:
+                    continue
+                columns = index.manifest["columns"]
+                with open(index.directory / "docs.jsonl", "rb") as handle:
+                    for doc, column, start, end in found:
+                        hits.append({**index.document(int(doc), handle), "column": columns[int(column)],
+                                     "label": label, "start": int(start), "end": int(end)})
+        return hits
+
+    def stats(self) -> Dict:
+        return {
+            "indexes": len(self.indexes),
+            "segments": sum(len(i.segments) for i in self.indexes),
+            "documents": sum(i.manifest["docs"] for i in self.indexes),
+            "postings": sum(i.manifest["postings"] for i in self.indexes),
+            "labels": self.labels,
+            "bytes": sum(f.stat().st_size for i in self.indexes for f in i.directory.iterdir()),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--salt-file", default=None, help=f"Salt file (default: ${SALT_ENV_VAR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="Documents containing a value")
+    query.add_argument("root", help="Index directory, or a folder of index directories")
+    query.add_argument("value")
+    query.add_argument("--label", default=None, help="Only look the value up under this label")
+    query.add_argument("--json", action="store_true", help="Print the hits as JSON Lines")
+    commands.add_parser("stats", help="Size of the index").add_argument("root")
+    commands.add_parser("compact", help="Merge the segments of one index directory").add_argument("directory")
+    args = parser.parse_args(argv)
+
+    salt = load_salt(args.salt_file)
+    if args.command == "compact":
+        manifest = compact(args.directory, salt)
+        print(f"{args.directory}: {len(manifest['segments'])} segment(s), {manifest['postings']:,} postings")
+        return
+    reader = PiiIndexReader(args.root, salt)
+    if args.command == "stats":
+        print(json.dumps(reader.stats(), indent=2))
+        return
+    start = time.perf_counter()
+    hits = reader.lookup(args.value, args.label)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        if args.json:
+            print(json.dumps(hit, ensure_ascii=False))
+        else:
+            print(f"{hit['source']}  row {hit['row']}  {hit['column']}  {hit['label']} [{hit['start']}:{hit['end']}]")
+    print(f"{len(hits)} hit(s) in {len({(h['source'], h['row']) for h in hits})} document(s), {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
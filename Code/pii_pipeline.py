@@ -0,0 +1,254 @@
+"""
+Detection and anonymization pipeline shared by the Streamlit app and batch tooling.
+"""
+
+import json
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+import pandas as pd
+
+from batch_io import DEFAULT_CHUNKSIZE, iter_table_chunks, source_name, table_columns
+from budget_batching import BudgetBatcher
+from column_profiler import FREE_TEXT, STRUCTURED, profile_columns, redact_structured
+from prefilter import candidate_mask
+from span_resolver import resolve_entities, resolve_spans
+from spans import DocSpans, SpanBatch
+
+REPLACEMENTS = {
+    "name": "[NAME REDACTED]",
+    "email": "[EMAIL REDACTED]",
+    "phone": "[PHONE REDACTED]",
+    "address": "[ADDRESS REDACTED]",
+    "credit_card": "[CREDIT CARD REDACTED]",
+    "company": "[COMPANY REDACTED]",
+    "url": "[URL REDACTED]",
+    "ssn": "[SSN REDACTED]",
+}
+
+DEFAULT_BATCH_SIZE = 64
+
+
+def doc_entities(doc, offset: int = 0) -> List[Dict]:
+    ents = []
+    for ent in doc.ents:
+        ents.append({
+            "start": ent.start_char + offset,
+            "end": ent.end_char + offset,
+            "label": ent.label_.lower(),
+            "text": ent.text,
+        })
+    return ents
+
+
+def predict(nlp, text: str, batcher: Optional[BudgetBatcher] = None) -> List[Dict]:
+    """Entities of one text; texts longer than the batcher's ``max_doc_chars`` are split into pieces."""
+    return predict_many(nlp, [text], batcher=batcher or BudgetBatcher())[0]
+
+
+def _pipe_docs(nlp, texts: List[str], batch_size: int, batcher: Optional[BudgetBatcher]) -> Iterator[Tuple[int, int, object]]:
+    """``(text index, char offset, doc)`` per text, or per piece when ``batcher`` splits a text."""
+    if batcher is not None:
+        return batcher.pipe(nlp, texts)
+    return ((i, 0, doc) for i, doc in enumerate(nlp.pipe(texts, batch_size=batch_size)))
+
+
+def _expand(kept_results: List, keep: Optional[List[bool]], empty: Callable) -> List:
+    """Put results for the kept texts back in place, with ``empty()`` for filtered-out texts."""
+    if keep is None:
+        return kept_results
+    kept = iter(kept_results)
+    return [next(kept) if k else empty() for k in keep]
+
+
+def predict_many(nlp, texts: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                 prefilter: Optional[Pattern] = None, stats: Optional[Counter] = None,
+                 batcher: Optional[BudgetBatcher] = None) -> List[List[Dict]]:
+    """
+    Run ``nlp.pipe`` over ``texts`` and return one entity list per text.
+
+    With a ``prefilter`` (see ``prefilter.build_prefilter``) texts without any PII cue get an
+    empty list without going through the model. ``stats`` counts 'rows' and 'skipped'.
+    With a ``batcher`` (see ``budget_batching.BudgetBatcher``) batches are formed by size
+    budget instead of ``batch_size`` and very long texts are split.
+    """
+    texts = list(texts)
+    keep = candidate_mask(texts, prefilter) if prefilter is not None else None
+    kept = texts if keep is None else [t for t, k in zip(texts, keep) if k]
+    kept_results = [[] for _ in kept]
+    for i, offset, doc in _pipe_docs(nlp, kept, batch_size, batcher):
+        kept_results[i].extend(doc_entities(doc, offset))
+    if stats is not None:
+        stats["rows"] += len(texts)
+        stats["skipped"] += len(texts) - len(kept)
+    return _expand(kept_results, keep, list)
+
+
+def predict_spans(nlp, texts: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                  prefilter: Optional[Pattern] = None, stats: Optional[Counter] = None,
+                  batcher: Optional[BudgetBatcher] = None) -> SpanBatch:
+    """
+    Like ``predict_many``, but collects the entities straight from the docs into a compact
+    ``SpanBatch`` (int32 offsets, uint8 label codes, no per-entity dicts or text copies).
+    """
+    texts = list(texts)
+    keep = candidate_mask(texts, prefilter) if prefilter is not None else None
+    kept = texts if keep is None else [t for t, k in zip(texts, keep) if k]
+    if batcher is None:
+        docs = iter(nlp.pipe(kept, batch_size=batch_size))
+        batch = SpanBatch.from_docs(docs if keep is None else (next(docs) if k else None for k in keep))
+    else:
+        entity_lists = [[] for _ in kept]
+        for i, offset, doc in batcher.pipe(nlp, kept):
+            entity_lists[i].extend((e.start_char + offset, e.end_char + offset, e.label_) for e in doc.ents)
+        batch = SpanBatch.from_entity_lists(_expand(entity_lists, keep, list))
+    if stats is not None:
+        stats["rows"] += len(texts)
+        stats["skipped"] += len(texts) - len(kept)
+    return batch
+
+
+# ``replace(value, label)`` returns the replacement of one entity (e.g. a ``surrogates.SurrogateGenerator``)
+Replacer = Callable[[str, str], str]
+# ``on_spans(rows, column, texts, spans)`` receives the entities found in a chunk: the chunk
+# positions of the rows, the column, the cell texts and one span collection per text
+SpansHook = Callable[[List[int], str, List[str], Iterable], None]
+
+
+def anonymize(text: str, ents: Union[List[Dict], DocSpans], policy: str = "longest",
+              replace: Optional[Replacer] = None) -> str:
+    # resolve overlaps, then stitch the untouched gaps and replacements together in one pass
+    if isinstance(ents, DocSpans):
+        spans = resolve_spans(ents.tuples(), policy=policy)
+    else:
+        spans = [(e["start"], e["end"], e["label"].lower()) for e in resolve_entities(ents, policy=policy)]
+    parts = []
+    last = 0
+    for start, end, label in spans:
+        parts.append(text[last:start])
+        parts.append(replace(text[start:end], label) if replace else REPLACEMENTS.get(label, "[REDACTED]"))
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def process_chunk(nlp, df: pd.DataFrame, text_col: str = "text", policy: str = "longest",
+                  batch_size: int = DEFAULT_BATCH_SIZE, prefilter: Optional[Pattern] = None,
+                  stats: Optional[Counter] = None, batcher: Optional[BudgetBatcher] = None,
+                  replace: Optional[Replacer] = None, on_spans: Optional[SpansHook] = None) -> pd.DataFrame:
+    """
+    Add 'predictions' (compact JSON ``[[start, end, label], ...]``) and 'anonymized_text'
+    columns for ``text_col`` of one chunk. Entities get placeholders, or ``replace(value, label)``.
+    """
+    texts = df[text_col].astype(str).tolist()
+    batch = predict_spans(nlp, texts, batch_size=batch_size, prefilter=prefilter, stats=stats, batcher=batcher)
+    if on_spans is not None:
+        on_spans(list(range(len(texts))), text_col, texts, batch)
+    out_df = df.copy()
+    out_df["predictions"] = batch.to_json_rows()
+    out_df["anonymized_text"] = [anonymize(t, spans, policy, replace) for t, spans in zip(texts, batch)]
+    return out_df
+
+
+def process_chunk_profiled(nlp, df: pd.DataFrame, profile: Dict[str, Dict], policy: str = "longest",
+                           batch_size: int = DEFAULT_BATCH_SIZE, prefilter: Optional[Pattern] = None,
+                           stats: Optional[Counter] = None, batcher: Optional[BudgetBatcher] = None,
+                           replace: Optional[Replacer] = None, on_spans: Optional[SpansHook] = None
+                           ) -> pd.DataFrame:
+    """
+    Anonymize every PII column of one chunk in place according to ``profile``: structured
+    columns are redacted wholesale (or cell by cell with ``replace``), free-text columns go
+    through the model, non-PII columns are left as they are. A 'predictions' column holds
+    the free-text entities as JSON keyed by column name (``{column: [[start, end, label], ...]}``).
+    ``on_spans`` sees the whole cell as one entity for structured columns.
+    """
+    out_df = df.copy()
+    predictions = [{} for _ in range(len(df))]
+    for column, info in profile.items():
+        if info["kind"] == STRUCTURED and on_spans is not None:
+            cells = df[column].astype("string")
+            rows = [i for i, v in enumerate(cells) if not pd.isna(v) and v.strip()]
+            texts = [cells.iloc[i] for i in rows]
+            on_spans(rows, column, texts, [[(0, len(t), info["label"])] for t in texts])
+        if info["kind"] == STRUCTURED:
+            if replace is None:
+                out_df[column] = redact_structured(df[column], REPLACEMENTS.get(info["label"], "[REDACTED]"))
+            else:
+                out_df[column] = df[column].map(
+                    lambda v, label=info["label"]: v if pd.isna(v) or not str(v).strip() else replace(str(v), label))
+        elif info["kind"] == FREE_TEXT:
+            present = df[column].notna().to_numpy()
+            texts = df[column][present].astype(str).tolist()
+            batch = predict_spans(nlp, texts, batch_size=batch_size, prefilter=prefilter, stats=stats, batcher=batcher)
+            if on_spans is not None:
+                on_spans(present.nonzero()[0].tolist(), column, texts, batch)
+            all_spans = iter(batch)
+            anonymized = out_df[column].astype(object).tolist()
+            for i, is_present in enumerate(present):
+                if not is_present:
+                    continue
+                ents = next(all_spans)
+                if len(ents):
+                    predictions[i][column] = ents.to_list()
+                    anonymized[i] = anonymize(anonymized[i] if isinstance(anonymized[i], str) else str(anonymized[i]),
+                                              ents, policy, replace)
+            out_df[column] = anonymized
+    out_df["predictions"] = [json.dumps(p, ensure_ascii=False) for p in predictions]
+    return out_df
+
+
+def process_tables(nlp, sources: Iterable, text_col: Optional[str] = "text", policy: str = "longest",
+                   chunksize: int = DEFAULT_CHUNKSIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                   on_profile: Optional[Callable[[str, Dict[str, Dict]], None]] = None,
+                   prefilter: Optional[Pattern] = None, stats: Optional[Counter] = None,
+                   profiles: Optional[Dict[str, Dict[str, Dict]]] = None,
+                   batcher: Optional[BudgetBatcher] = None, replace: Optional[Replacer] = None,
+                   on_spans: Optional[Callable[[str, List[int], str, List[str], Iterable], None]] = None,
+                   ) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Stream every source (CSV / XLSX / Parquet) chunk by chunk through detection and
+    anonymization, yielding ``(source_name, output_chunk)`` pairs.
+
+    With ``text_col=None`` each source's columns are profiled from its first chunk
+    (reported through ``on_profile``) and every PII column is anonymized in place;
+    otherwise only ``text_col`` is run through the model. ``profiles`` maps source names to
+    precomputed column profiles (used e.g. when one file is processed in several shards).
+    ``prefilter``, ``stats`` and ``batcher`` are passed on to ``predict_spans``; ``replace``
+    replaces the placeholders (see ``process_chunk``). ``on_spans(source, rows, column, texts,
+    spans)`` receives every chunk's entities with row numbers counted from the start of the
+    source (e.g. ``pii_index.PiiIndexWriter.add``).
+    """
+    for source in sources:
+        profile = (profiles or {}).get(source_name(source))
+        first_row = 0
+        for df in iter_table_chunks(source, chunksize=chunksize):
+            chunk_hook = None
+            if on_spans is not None:
+                def chunk_hook(rows, column, texts, spans, name=source_name(source), offset=first_row):
+                    on_spans(name, [offset + r for r in rows], column, texts, spans)
+            first_row += len(df)
+            if text_col is None:
+                if profile is None:
+                    profile = profile_columns(df)
+                    if on_profile:
+                        on_profile(source_name(source), profile)
+                yield source_name(source), process_chunk_profiled(nlp, df, profile, policy, batch_size,
+                                                                    prefilter, stats, batcher, replace, chunk_hook)
+                continue
+            if text_col not in df.columns:
+                raise KeyError(f"Column '{text_col}' not found in {source_name(source)}. "
+                               f"Available columns: {list(df.columns)}")
+            yield source_name(source), process_chunk(nlp, df, text_col, policy, batch_size, prefilter, stats,
+                                                     batcher, replace, chunk_hook)
+
+
+def output_columns(sources: Iterable, text_col: Optional[str] = "text") -> List[str]:
+    """
+    Header of ``process_tables`` output over ``sources``: every input column (in order of
+    first appearance) followed by the result columns, so files with different columns all keep theirs.
+    """
+    columns = []
+    for source in sources:
+        columns.extend(c for c in table_columns(source) if c not in columns)
+    results = ["predictions"] if text_col is None else ["predictions", "anonymized_text"]
+    return columns + [c for c in results if c not in columns]
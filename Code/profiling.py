@@ -0,0 +1,261 @@
+"""
+On-demand profiling for pipeline and training runs.
+
+``profiled(name, output_dir)`` wraps a block with one of two profilers:
+  - ``sample`` (default): a background thread samples the profiled thread's stack every
+    ``interval`` seconds and writes ``<name>.collapsed`` (one ``frame;frame;frame count``
+    line per stack, the input format of flamegraph.pl and speedscope),
+  - ``cprofile``: deterministic cProfile, written to ``<name>.pstats`` (snakeviz, pstats).
+With ``memory=True`` tracemalloc runs as well. Either way ``<name>.summary.txt`` lists the
+time per component (tokenizer, ner/model, pandas, JSON, openpyxl, PDF, ...), the top-N
+functions and, with tracemalloc, the top allocation sites and the peak.
+
+Switches:
+  - ``PII_PROFILE=sample|cprofile`` (plus ``PII_PROFILE_MEMORY=1``, ``PII_PROFILE_DIR``,
+    default ``Profiles/``) turns on ``maybe_profiled`` blocks, e.g. the training run in
+    PII_Detection_and_Anonymization.py,
+  - ``--profile`` / ``--profile-memory`` on ``sharding.py`` workers, and the
+    "Profile batch runs" toggle in the app's sidebar,
+  - any script: ``python profiling.py --mode sample -- script.py args`` (``--output-dir``
+    defaults to ``Profiles/``).
+"""
+
+import argparse
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MODES = ("sample", "cprofile")
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 25
+# Kept apart from model directories and results, so profiles are never shipped with them
+DEFAULT_PROFILE_DIR = "Profiles"
+
+# First matching path fragment wins; checked against the code object's filename
+COMPONENTS = (
+    ("spacy/tokenizer", "tokenizer"),
+    # Lexeme attributes (lower, shape, like_num, ...) are computed while tokenizing
+    ("spacy/lang", "tokenizer"),
+    ("spacy/lexeme", "tokenizer"),
+    ("spacy/vocab", "tokenizer"),
+    ("spacy/pipeline", "ner/model"),
+    ("spacy/ml", "ner/model"),
+    ("thinc", "ner/model"),
+    ("numpy", "numpy"),
+    ("spacy", "spacy (other)"),
+    ("pandas", "pandas"),
+    ("openpyxl", "openpyxl"),
+    ("pyarrow", "pyarrow"),
+    ("json", "json"),
+    ("pdfplumber", "pdf"),
+    ("pdfminer", "pdf"),
+    ("pypdfium2", "pdf"),
+    ("PyPDF2", "pdf"),
+    ("pypdf", "pdf"),
+    ("streamlit", "streamlit"),
+    ("faker", "faker"),
+)
+
+
+def component_of(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    for fragment, component in COMPONENTS:
+        if fragment in path:
+            return component
+    if "site-packages" in path or "/lib/python" in path:
+        return "other libraries"
+    return "project code"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+# -----------------------------
+# Sampling profiler
+# -----------------------------
+class StackSampler:
+    """Samples one thread's call stack from a daemon thread; ``stacks`` counts root-first stacks."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.leaf_files: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack, leaf = [], frame.f_code.co_filename
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.leaf_files[leaf] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(";".join(_frame_label(code).replace(";", ":") for code in stack) + f" {count}\n")
+
+    def components(self) -> Dict[str, float]:
+        """Share of samples per component of the innermost frame."""
+        total = sum(self.leaf_files.values()) or 1
+        shares = Counter()
+        for filename, count in self.leaf_files.items():
+            shares[component_of(filename)] += count / total
+        return dict(shares.most_common())
+
+    def top_functions(self, n: int) -> List[Tuple[str, float, float]]:
+        """``(function, self share, inclusive share)`` of the ``n`` functions with most self samples."""
+        total = sum(self.stacks.values()) or 1
+        self_counts, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for code in set(stack):
+                inclusive[code] += count
+        return [(_frame_label(code), c / total, inclusive[code] / total) for code, c in self_counts.most_common(n)]
+
+
+# -----------------------------
+# Reports
+# -----------------------------
+def _cprofile_components(stats: pstats.Stats) -> Dict[str, float]:
+    shares = Counter()
+    total = sum(s[2] for s in stats.stats.values()) or 1
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        shares[component_of(filename)] += tottime / total
+    return dict(shares.most_common())
+
+
+def _memory_lines(snapshot, peak: int, top: int) -> List[str]:
+    lines = [f"Peak traced memory: {peak / 2**20:.1f} MiB", f"Top {top} allocation sites (live at the end):"]
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size / 2**20:9.2f} MiB  {stat.count:>9} blocks  {frame.filename}:{frame.lineno}")
+    return lines
+
+
+def write_summary(path: str, name: str, seconds: float, components: Dict[str, float], top_lines: List[str],
+                  memory_lines: Optional[List[str]] = None) -> None:
+    lines = [f"Profile of '{name}': {seconds:.2f}s wall time", "", "Time by component (self time):"]
+    lines += [f"  {share:7.1%}  {component}" for component, share in components.items()]
+    lines += ["", *top_lines]
+    if memory_lines:
+        lines += ["", *memory_lines]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@contextlib.contextmanager
+def profiled(name: str, output_dir: str = ".", mode: str = "sample", memory: bool = False,
+             top: int = DEFAULT_TOP, interval: float = DEFAULT_INTERVAL) -> Iterator[Dict]:
+    """
+    Profile the block (see the module docstring). Yields a dict that receives the paths of
+    the written files ('summary', 'collapsed' or 'pstats') when the block ends.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode '{mode}'. Choose from {MODES}.")
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    files: Dict[str, str] = {}
+    if memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if mode == "cprofile" else None
+    sampler = StackSampler(interval=interval) if mode == "sample" else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    else:
+        sampler.start()
+    try:
+        yield files
+    finally:
+        if profiler:
+            profiler.disable()
+        else:
+            sampler.stop()
+        seconds = time.perf_counter() - start
+        memory_lines = None
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory_lines = _memory_lines(snapshot, peak, top)
+
+        if profiler:
+            files["pstats"] = str(out / f"{name}.pstats")
+            profiler.dump_stats(files["pstats"])
+            buffer = io.StringIO()
+            stats = pstats.Stats(profiler, stream=buffer)
+            stats.sort_stats("tottime").print_stats(top)
+            components = _cprofile_components(stats)
+            top_lines = [f"Top {top} functions by self time (cProfile):", buffer.getvalue().strip()]
+        else:
+            files["collapsed"] = str(out / f"{name}.collapsed")
+            sampler.write_collapsed(files["collapsed"])
+            components = sampler.components()
+            top_lines = [f"Top {top} functions by self time ({sum(sampler.stacks.values())} samples "
+                         f"every {interval * 1000:.0f} ms):", "     self  inclusive  function"]
+            top_lines += [f"  {s:7.1%}  {i:9.1%}  {label}" for label, s, i in sampler.top_functions(top)]
+        files["summary"] = str(out / f"{name}.summary.txt")
+        write_summary(files["summary"], name, seconds, components, top_lines, memory_lines)
+
+
+def maybe_profiled(name: str, output_dir: str = DEFAULT_PROFILE_DIR):
+    """``profiled`` configured from ``PII_PROFILE`` / ``PII_PROFILE_MEMORY`` / ``PII_PROFILE_DIR``; a no-op when unset."""
+    mode = os.environ.get("PII_PROFILE", "").strip().lower()
+    if not mode or mode in ("0", "off", "false"):
+        return contextlib.nullcontext({})
+    return profiled(name, os.environ.get("PII_PROFILE_DIR") or output_dir,
+                    mode="sample" if mode in ("1", "on", "true") else mode,
+                    memory=os.environ.get("PII_PROFILE_MEMORY", "").lower() in ("1", "on", "true"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", default="sample", choices=MODES)
+    parser.add_argument("--memory", action="store_true", help="Also trace allocations with tracemalloc")
+    parser.add_argument("--output-dir", default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--name", default=None, help="File name stem (default: the script name)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Sampling interval in seconds")
+    parser.add_argument("script", help="Python script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the script")
+    args = parser.parse_args(argv)
+
+    sys.argv = [args.script, *args.args]
+    sys.path.insert(0, str(Path(args.script).resolve().parent))
+    name = args.name or Path(args.script).stem
+    with profiled(name, args.output_dir, args.mode, args.memory, args.top, args.interval) as files:
+        try:
+            runpy.run_path(args.script, run_name="__main__")
+        except SystemExit:
+            pass
+    for kind, path in files.items():
+        print(f"{kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Headless evaluation reporting from aggregated per-label counts.
+
+Instead of one list entry per entity, the evaluation is reduced to a ``Counter`` of
+``(true_label, predicted_label)`` pairs (``"O"`` marks a missed or spurious entity), so
+memory stays O(labels^2) however large the test set is. Metrics, ROC / precision-recall
+points and the confusion matrix are all derived from that table. Plots are rendered with
+the non-interactive Agg backend and matplotlib is only imported when plots are requested.
+
+Example:
+    python reporting.py --results Results.xlsx --output-dir Report --formats png svg
+"""
+
+import argparse
+import ast
+import csv
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+OUTSIDE = "O"
+
+Span = Tuple[int, int, str]
+
+
+def update_counts(counts: Counter, true_spans: Iterable[Span], predicted_spans: Iterable[Span]) -> Counter:
+    """Add one document's exact-match comparison to ``counts`` and return it."""
+    true_set = {tuple(s) for s in true_spans}
+    predicted_set = {tuple(s) for s in predicted_spans}
+    for span in true_set:
+        counts[(span[2], span[2] if span in predicted_set else OUTSIDE)] += 1
+    for span in predicted_set - true_set:
+        counts[(OUTSIDE, span[2])] += 1
+    return counts
+
+
+def count_table(documents: Iterable[Tuple[Iterable[Span], Iterable[Span]]]) -> Counter:
+    """Aggregate ``(true_spans, predicted_spans)`` pairs into a confusion Counter."""
+    counts = Counter()
+    for true_spans, predicted_spans in documents:
+        update_counts(counts, true_spans, predicted_spans)
+    return counts
+
+
+def labels_in(counts: Counter) -> List[str]:
+    return sorted({label for pair in counts for label in pair})
+
+
+def _ratio(num: float, den: float) -> float:
+    return num / den if den else 0.0
+
+
+def summarize(counts: Counter) -> Dict:
+    """Per-label and averaged metrics, confusion matrix, ROC and PR points from ``counts``."""
+    labels = labels_in(counts)
+    total = sum(counts.values())
+    true_totals = Counter()
+    predicted_totals = Counter()
+    for (true_label, predicted_label), n in counts.items():
+        true_totals[true_label] += n
+        predicted_totals[predicted_label] += n
+
+    per_label = {}
+    for label in labels:
+        tp = counts[(label, label)]
+        fp = predicted_totals[label] - tp
+        fn = true_totals[label] - tp
+        tn = total - tp - fp - fn
+        precision = _ratio(tp, tp + fp)
+        recall = _ratio(tp, tp + fn)
+        fpr = _ratio(fp, fp + tn)
+        per_label[label] = {
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "support": true_totals[label],
+            "precision": precision,
+            "recall": recall,
+            "f1": _ratio(2 * precision * recall, precision + recall),
+            # With hard predictions the ROC/PR curves reduce to these operating points
+            "roc": {"fpr": [0.0, fpr, 1.0], "tpr": [0.0, recall, 1.0],
+                    "auc": (1 + recall - fpr) / 2 if 0 < tp + fn < total else None},
+            "pr": {"recall": [1.0, recall, 0.0],
+                   "precision": [_ratio(tp + fn, total), precision, 1.0]},
+        }
+
+    # The outside pseudo-label's "support" is the false-positive count and its scores are
+    # always 0, so it is left out of the support-weighted averages
+    entity_labels = [l for l in labels if l != OUTSIDE]
+    supported = sum(true_totals[l] for l in entity_labels)
+    weighted = {
+        metric: _ratio(sum(per_label[l][metric] * true_totals[l] for l in entity_labels), supported)
+        for metric in ("precision", "recall", "f1")
+    }
+
+    tp = sum(counts[(l, l)] for l in entity_labels)
+    fp = sum(counts[(OUTSIDE, l)] for l in entity_labels)
+    fn = sum(counts[(l, OUTSIDE)] for l in entity_labels)
+    entity_precision = _ratio(tp, tp + fp)
+    entity_recall = _ratio(tp, tp + fn)
+
+    return {
+        "total": total,
+        "labels": labels,
+        "accuracy": _ratio(sum(counts[(l, l)] for l in labels), total),
+        "weighted": weighted,
+        "entity_micro": {
+            "tp": tp, "fp": fp, "fn": fn,
+            "precision": entity_precision,
+            "recall": entity_recall,
+            "f1": _ratio(2 * entity_precision * entity_recall, entity_precision + entity_recall),
+        },
+        "per_label": per_label,
+        "confusion_matrix": [[counts[(t, p)] for p in labels] for t in labels],
+    }
+
+
+def write_count_table(counts: Counter, path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["true_label", "predicted_label", "count"])
+        for (true_label, predicted_label), n in sorted(counts.items()):
+            writer.writerow([true_label, predicted_label, n])
+
+
+def write_plots(summary: Dict, output_dir: str, formats: Sequence[str] = ("png", "svg")) -> List[str]:
+    """Render metric, confusion-matrix, ROC and PR figures headlessly; return written paths."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    written = []
+
+    def save(fig, name):
+        for fmt in formats:
+            path = os.path.join(output_dir, f"{name}.{fmt}")
+            fig.savefig(path, format=fmt, bbox_inches="tight")
+            written.append(path)
+        plt.close(fig)
+
+    labels = summary["labels"]
+
+    # Model performance metrics
+    fig, ax = plt.subplots(figsize=(10, 6))
+    metrics = ["Precision", "Recall", "F1 Score", "Accuracy"]
+    weighted = summary["weighted"]
+    ax.bar(metrics, [weighted["precision"], weighted["recall"], weighted["f1"], summary["accuracy"]],
+           color=["skyblue", "orange", "green", "red"])
+    ax.set_ylim(0, 1)
+    ax.set_title("Model Performance Metrics")
+    ax.set_xlabel("Metrics")
+    ax.set_ylabel("Score")
+    save(fig, "metrics")
+
+    # Confusion matrix heatmap
+    fig, ax = plt.subplots(figsize=(12, 8))
+    matrix = summary["confusion_matrix"]
+    image = ax.imshow(matrix, cmap="Blues")
+    fig.colorbar(image, ax=ax)
+    ax.set_xticks(range(len(labels)), labels=labels, rotation=45, ha="right")
+    ax.set_yticks(range(len(labels)), labels=labels)
+    peak = max((max(row) for row in matrix), default=0)
+    for i, row in enumerate(matrix):
+        for j, value in enumerate(row):
+            ax.text(j, i, str(value), ha="center", va="center",
+                    color="white" if peak and value > peak / 2 else "black")
+    ax.set_title("Confusion Matrix for PII Detection")
+    ax.set_xlabel("Predicted Labels")
+    ax.set_ylabel("True Labels")
+    save(fig, "confusion_matrix")
+
+    # ROC curve for each class
+    fig, ax = plt.subplots(figsize=(10, 8))
+    for label in labels:
+        roc = summary["per_label"][label]["roc"]
+        auc = "n/a" if roc["auc"] is None else f"{roc['auc']:.2f}"
+        ax.plot(roc["fpr"], roc["tpr"], label=f"{label} (AUC = {auc})")
+    ax.plot([0, 1], [0, 1], color="navy", linestyle="--")
+    ax.set_title("ROC Curve")
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.legend(loc="lower right")
+    save(fig, "roc_curve")
+
+    # Precision-Recall curve for each class
+    fig, ax = plt.subplots(figsize=(10, 8))
+    for label in labels:
+        pr = summary["per_label"][label]["pr"]
+        ax.plot(pr["recall"], pr["precision"], label=label)
+    ax.set_title("Precision-Recall Curve")
+    ax.set_xlabel("Recall")
+    ax.set_ylabel("Precision")
+    ax.legend()
+    save(fig, "precision_recall_curve")
+
+    return written
+
+
+def write_report(counts: Counter, output_dir: str, formats: Sequence[str] = ("png", "svg"),
+                 plots: bool = True) -> Dict:
+    """Write metrics.json, label_counts.csv and (optionally) plots into ``output_dir``."""
+    os.makedirs(output_dir, exist_ok=True)
+    summary = summarize(counts)
+    write_count_table(counts, os.path.join(output_dir, "label_counts.csv"))
+    if plots and formats:
+        summary["plots"] = write_plots(summary, output_dir, formats)
+    with open(os.path.join(output_dir, "metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def _parse_spans(value) -> List[Span]:
+    if isinstance(value, str) and value.strip():
+        return [tuple(s) for s in ast.literal_eval(value)]
+    return []
+
+
+def iter_result_rows(path: str, true_column: str = "True Results", predicted_column: str = "Predicted Results",
+                     sheet: Optional[str] = "Predicted Results") -> Iterator[Tuple[List[Span], List[Span]]]:
+    """Stream (true, predicted) span lists from a results XLSX (read-only mode) or CSV."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet and sheet in workbook.sheetnames else workbook.active
+            rows = worksheet.iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            t_idx, p_idx = header.index(true_column), header.index(predicted_column)
+            for row in rows:
+                yield _parse_spans(row[t_idx]), _parse_spans(row[p_idx])
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield _parse_spans(row.get(true_column)), _parse_spans(row.get(predicted_column))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", default="Results.xlsx", help="Results workbook or CSV")
+    parser.add_argument("--sheet", default="Predicted Results")
+    parser.add_argument("--true-column", default="True Results")
+    parser.add_argument("--predicted-column", default="Predicted Results")
+    parser.add_argument("--output-dir", default="Report")
+    parser.add_argument("--formats", nargs="*", default=["png", "svg"], help="Plot formats (none to skip plots)")
+    args = parser.parse_args(argv)
+
+    counts = count_table(iter_result_rows(args.results, args.true_column, args.predicted_column, args.sheet))
+    summary = write_report(counts, args.output_dir, formats=args.formats)
+    weighted = summary["weighted"]
+    print(f"Precision: {weighted['precision']}")
+    print(f"Recall: {weighted['recall']}")
+    print(f"F1 Score: {weighted['f1']}")
+    print(f"Accuracy: {summary['accuracy']}")
+    print(f"Report written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
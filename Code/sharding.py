@@ -0,0 +1,630 @@
+"""
+Sharded batch anonymization across processes or machines.
+
+A corpus of CSV / XLSX / Parquet / PDF files is split into a deterministic manifest of
+shards. CSV files are cut into byte ranges that always end on a row boundary (newlines
+inside quoted fields are skipped); other files are kept whole. Workers that share the
+filesystem process shards independently and write one output file plus a stats file per
+shard; the merge step checks that every shard of the manifest finished and concatenates
+the outputs in manifest order.
+
+    python sharding.py plan  data/ --shards 8 --manifest run/manifest.json
+    python sharding.py work  --manifest run/manifest.json --out-dir run --worker-index 0 --num-workers 4
+    python sharding.py merge --manifest run/manifest.json --out-dir run --output results.csv.gz
+    python sharding.py local data/ --workers 4 --out-dir run          # plan + 4 processes + merge
+    python sharding.py bench data/ --workers 1 2 4 --out-dir bench    # scaling benchmark
+
+With ``--index`` every shard also writes a hashed PII index (``pii_index.py``) under
+``<out-dir>/index``; query the whole run with ``python pii_index.py query <out-dir>/index ...``.
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from batch_io import CSV_EXTENSIONS, DEFAULT_CHUNKSIZE, SUPPORTED_EXTENSIONS, source_extension
+from budget_batching import DEFAULT_BATCH_CHARS, DEFAULT_MAX_BATCH_ITEMS, DEFAULT_MAX_DOC_CHARS, BudgetBatcher
+from hyperparameter_sweep import THREAD_ENV_VARS
+from output_writer import SUFFIXES
+from pdf_extract import PDF_EXTENSIONS
+from profiling import MODES as PROFILE_MODES, profiled
+
+SPLITS = ("bytes", "files")
+MANIFEST_VERSION = 1
+SCAN_BLOCK_BYTES = 1 << 20
+
+
+# -----------------------------
+# Planning
+# -----------------------------
+def list_inputs(paths: Iterable[str]) -> List[str]:
+    """Expand folders into their supported files; the result is sorted and de-duplicated."""
+    extensions = SUPPORTED_EXTENSIONS + PDF_EXTENSIONS
+    files = set()
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files.update(str(p.resolve()) for p in path.iterdir() if p.is_file() and p.suffix.lower() in extensions)
+        elif path.suffix.lower() in extensions:
+            files.add(str(path.resolve()))
+        else:
+            raise ValueError(f"Unsupported input '{path}'. Supported: {', '.join(extensions)}")
+    return sorted(files)
+
+
+def csv_row_boundaries(path: str, step: int) -> Tuple[int, List[int], int]:
+    """
+    Scan a CSV once and return ``(header_end, cuts, size)``: the offset after the header row
+    and cut offsets roughly every ``step`` bytes, each just after a newline outside quotes.
+    """
+    header_end = None
+    cuts = []
+    next_target = 0
+    in_quotes = False
+    pos = 0
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            i = 0
+            while next_target <= pos + len(block):
+                # Quote parity up to the target, then the first newline outside quotes
+                j = max(i, next_target - pos)
+                in_quotes ^= bool(block.count(b'"', i, j) & 1)
+                i = j
+                boundary = None
+                while boundary is None:
+                    newline = block.find(b"\n", i)
+                    if newline == -1:
+                        break
+                    in_quotes ^= bool(block.count(b'"', i, newline) & 1)
+                    i = newline + 1
+                    if not in_quotes:
+                        boundary = pos + i
+                if boundary is None:
+                    break
+                if header_end is None:
+                    header_end = boundary
+                else:
+                    cuts.append(boundary)
+                next_target = boundary + step
+            in_quotes ^= bool(block.count(b'"', i) & 1)
+            pos += len(block)
+    if header_end is None:
+        header_end = pos
+    return header_end, [c for c in cuts if c < pos], pos
+
+
+def _file_kind(path: str) -> str:
+    ext = source_extension(path)
+    if ext in CSV_EXTENSIONS:
+        return "csv"
+    if ext in PDF_EXTENSIONS:
+        return "pdf"
+    return "table"
+
+
+def _manifest_id(shards: List[Dict]) -> str:
+    return hashlib.sha256(json.dumps(shards, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def plan_shards(paths: Iterable[str], num_shards: int, split: str = "bytes") -> Dict:
+    """
+    Build a manifest of ``num_shards`` shards. Units (whole files, or CSV byte ranges when
+    ``split='bytes'``) keep their input order and are packed contiguously by size, so the
+    same inputs always give the same shards and concatenating shard outputs keeps row order.
+    """
+    if split not in SPLITS:
+        raise ValueError(f"Unknown split '{split}'. Choose one of {SPLITS}.")
+    files = list_inputs(paths)
+    sizes = {f: os.path.getsize(f) for f in files}
+    total = sum(sizes.values())
+    step = max(1, math.ceil(total / max(num_shards, 1)))
+
+    units = []
+    for path in files:
+        kind = _file_kind(path)
+        if kind == "csv" and split == "bytes":
+            header_end, cuts, size = csv_row_boundaries(path, step)
+            bounds = [header_end] + cuts + [size]
+            for start, end in zip(bounds, bounds[1:]):
+                if end > start:
+                    units.append({"path": path, "kind": kind, "header_end": header_end, "start": start, "end": end})
+        else:
+            units.append({"path": path, "kind": kind, "start": 0, "end": sizes[path]})
+
+    shards = [{"id": i, "parts": [], "bytes": 0} for i in range(num_shards)]
+    offset = 0
+    for unit in units:
+        size = unit["end"] - unit["start"]
+        # Assign each unit to the shard that contains its midpoint
+        shard = shards[min(int((offset + size / 2) * num_shards / max(total, 1)), num_shards - 1)]
+        shard["parts"].append(unit)
+        shard["bytes"] += size
+        offset += size
+
+    return {
+        "version": MANIFEST_VERSION,
+        "manifest_id": _manifest_id(shards),
+        "split": split,
+        "inputs": [{"path": f, "size": sizes[f]} for f in files],
+        "shards": shards,
+    }
+
+
+def write_manifest(manifest: Dict, path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version {manifest.get('version')} in {path}.")
+    return manifest
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+class CsvByteRange(io.RawIOBase):
+    """Read-only view of a CSV's header row followed by the byte range ``[start, end)``."""
+
+    def __init__(self, path: str, header_end: int, start: int, end: int):
+        super().__init__()
+        self.name = path
+        self._file = open(path, "rb")
+        self._header_end = header_end
+        self._start = start
+        self._size = header_end + (end - start)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self._size:
+            return 0
+        if self._pos < self._header_end:
+            file_pos, limit = self._pos, self._header_end - self._pos
+        else:
+            file_pos, limit = self._start + self._pos - self._header_end, self._size - self._pos
+        self._file.seek(file_pos)
+        data = self._file.read(min(len(buffer), limit))
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def shard_paths(out_dir: str, shard_id: int, compression: str = "gzip") -> Tuple[Path, Path]:
+    """Output and stats file of one shard."""
+    stem = Path(out_dir) / f"shard-{shard_id:05d}"
+    return stem.with_name(stem.name + SUFFIXES[compression]), stem.with_name(stem.name + ".stats.json")
+
+
+def read_shard_stats(out_dir: str, shard_id: int) -> Optional[Dict]:
+    _, stats_path = shard_paths(out_dir, shard_id)
+    if not stats_path.exists():
+        return None
+    with open(stats_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _part_profiles(parts: List[Dict]) -> Dict[str, Dict]:
+    """Profile each table file from its own first rows, so every shard of it agrees."""
+    from batch_io import iter_table_chunks
+    from column_profiler import DEFAULT_SAMPLE_SIZE, profile_columns
+
+    profiles = {}
+    for part in parts:
+        if part["kind"] != "pdf" and part["path"] not in profiles:
+            first = next(iter_table_chunks(part["path"], chunksize=DEFAULT_SAMPLE_SIZE), None)
+            if first is not None:
+                profiles[part["path"]] = profile_columns(first)
+    return profiles
+
+
+def shard_columns(parts: List[Dict], text_col: Optional[str]) -> List[str]:
+    """
+    Output header of a shard: 'source', every input column of its parts (in order of first
+    appearance) and the result columns, so parts with different columns all keep theirs.
+    """
+    from batch_io import table_columns
+
+    columns = ["source"]
+    for part in parts:
+        names = [text_col or "text"] if part["kind"] == "pdf" else table_columns(part["path"])
+        columns.extend(c for c in names if c not in columns)
+    # PDF parts always go through the single-column pipeline, which adds 'anonymized_text'
+    results = ["predictions"]
+    if text_col is not None or any(part["kind"] == "pdf" for part in parts):
+        results.append("anonymized_text")
+    columns.extend(c for c in results if c not in columns)
+    return columns
+
+
+def run_shard(nlp, manifest: Dict, shard_id: int, out_dir: str, text_col: Optional[str] = "text",
+              policy: str = "longest", chunksize: int = DEFAULT_CHUNKSIZE, batch_size: Optional[int] = None,
+              compression: str = "gzip", prefilter=None, force: bool = False, batcher=None, replace=None,
+              index_salt: Optional[bytes] = None, model_version: Optional[str] = None) -> Dict:
+    """
+    Process one shard into ``shard-NNNNN<suffix>`` and ``shard-NNNNN.stats.json``. Both are
+    written under temporary names and renamed when done; the stats file marks completion,
+    so a shard that already finished for this manifest is skipped unless ``force``.
+    With ``index_salt`` the shard's entities are also indexed into ``index/shard-NNNNN``
+    (see ``pii_index``); rows of a CSV byte range are counted from the start of the range.
+    """
+    import pandas as pd
+
+    from output_writer import ChunkedCsvWriter
+    from pdf_extract import extract_pdf_text
+    from pii_pipeline import DEFAULT_BATCH_SIZE, process_chunk, process_tables
+
+    previous = read_shard_stats(out_dir, shard_id)
+    if not force and previous and previous.get("manifest_id") == manifest["manifest_id"]:
+        return previous
+
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    output_path, stats_path = shard_paths(out_dir, shard_id, compression)
+    parts = manifest["shards"][shard_id]["parts"]
+    profiles = _part_profiles(parts) if text_col is None else None
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    prefilter_stats = Counter()
+    part_stats = []
+
+    index = None
+    if index_salt is not None:
+        from pii_index import PiiIndexWriter
+
+        # A rerun of the shard rebuilds its index from scratch
+        index_dir = Path(out_dir) / "index" / f"shard-{shard_id:05d}"
+        shutil.rmtree(index_dir, ignore_errors=True)
+        index = PiiIndexWriter(str(index_dir), index_salt)
+
+    start_time = time.perf_counter()
+    tmp_output = output_path.with_name(output_path.name + ".tmp")
+    columns = shard_columns(parts, text_col)
+    with ChunkedCsvWriter(str(tmp_output), compression=compression, arcname=f"shard-{shard_id:05d}.csv",
+                          columns=columns) as writer:
+        for part in parts:
+            rows_before = writer.rows
+            source = None
+            # Index postings name the part, so rows of a byte range can be found again
+            name = f"{part['path']}#bytes={part['start']}-{part['end']}" if "header_end" in part else part["path"]
+            on_part_spans = functools.partial(index.add, name) if index is not None else None
+            on_spans = (lambda _, *found: on_part_spans(*found)) if on_part_spans else None
+            if part["kind"] == "pdf":
+                column = text_col or "text"
+                chunk = pd.DataFrame({column: [extract_pdf_text(part["path"])]})
+                chunks = [process_chunk(nlp, chunk, column, policy, batch_size, prefilter, prefilter_stats, batcher,
+                                        replace, on_part_spans)]
+            else:
+                source = (io.BufferedReader(CsvByteRange(part["path"], part["header_end"], part["start"], part["end"]))
+                          if "header_end" in part else part["path"])
+                chunks = (chunk for _, chunk in process_tables(
+                    nlp, [source], text_col=text_col, policy=policy, chunksize=chunksize, batch_size=batch_size,
+                    prefilter=prefilter, stats=prefilter_stats, profiles=profiles, batcher=batcher, replace=replace,
+                    on_spans=on_spans,
+                ))
+            for chunk in chunks:
+                chunk.insert(0, "source", part["path"])
+                writer.write(chunk)
+            if isinstance(source, io.BufferedReader):
+                source.close()
+            part_stats.append({"path": part["path"], "start": part["start"], "end": part["end"],
+                               "rows": writer.rows - rows_before})
+    if writer.dropped_columns:
+        # Never mark a shard complete with columns missing from its output
+        tmp_output.unlink()
+        raise RuntimeError(f"Shard {shard_id} produced columns outside its header: "
+                           f"{sorted(writer.dropped_columns)}")
+    os.replace(tmp_output, output_path)
+    if index is not None:
+        index.close()
+
+    stats = {
+        "manifest_id": manifest["manifest_id"],
+        "shard": shard_id,
+        "status": "complete",
+        "output": output_path.name,
+        "rows": writer.rows,
+        "bytes": manifest["shards"][shard_id]["bytes"],
+        "parts": part_stats,
+        "skipped_rows": prefilter_stats["skipped"],
+        "columns": columns,
+        "seconds": time.perf_counter() - start_time,
+        "worker": f"{socket.gethostname()}:{os.getpid()}",
+        "model_version": model_version,
+    }
+    tmp_stats = stats_path.with_name(stats_path.name + ".tmp")
+    with open(tmp_stats, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_stats, stats_path)
+    return stats
+
+
+def assigned_shards(num_shards: int, worker_index: int, num_workers: int) -> List[int]:
+    """Shards handled by one of ``num_workers`` workers (round robin)."""
+    return list(range(worker_index, num_shards, num_workers))
+
+
+# -----------------------------
+# Merge
+# -----------------------------
+def check_complete(manifest: Dict, out_dir: str) -> List[Dict]:
+    """Stats of every shard; raises if any shard is missing, unfinished or from another manifest."""
+    all_stats, missing = [], []
+    for shard in manifest["shards"]:
+        stats = read_shard_stats(out_dir, shard["id"])
+        if (not stats or stats.get("manifest_id") != manifest["manifest_id"]
+                or stats.get("status") != "complete" or not (Path(out_dir) / stats["output"]).exists()):
+            missing.append(shard["id"])
+        else:
+            all_stats.append(stats)
+    if missing:
+        raise RuntimeError(f"{len(missing)} of {len(manifest['shards'])} shard(s) are not complete: {missing}")
+    return all_stats
+
+
+def merge_shards(manifest: Dict, out_dir: str, output: str, compression: str = "gzip",
+                 chunksize: int = DEFAULT_CHUNKSIZE) -> Dict:
+    """
+    Validate completeness, then stream every shard output into ``output`` in shard order.
+    The header is the union of the shard headers; cells of columns a shard lacks are empty.
+    """
+    import pandas as pd
+
+    from output_writer import ChunkedCsvWriter
+
+    all_stats = check_complete(manifest, out_dir)
+    columns = []
+    for stats in all_stats:
+        # Stats written before headers were recorded: read the shard's own header
+        shard_header = stats.get("columns") or list(pd.read_csv(Path(out_dir) / stats["output"], nrows=0).columns)
+        columns.extend(c for c in shard_header if c not in columns)
+    with ChunkedCsvWriter(output, compression=compression, columns=columns) as writer:
+        for stats in all_stats:
+            rows_before = writer.rows
+            if not stats["rows"]:
+                continue
+            shard_output = Path(out_dir) / stats["output"]
+            # Read every field as the exact string the worker wrote
+            for chunk in pd.read_csv(shard_output, chunksize=chunksize, dtype=str, keep_default_na=False):
+                writer.write(chunk)
+            if writer.rows - rows_before != stats["rows"]:
+                raise RuntimeError(f"Shard {stats['shard']} output has {writer.rows - rows_before} rows, "
+                                   f"its stats report {stats['rows']}.")
+    return {
+        "manifest_id": manifest["manifest_id"],
+        "output": output,
+        "shards": len(all_stats),
+        "rows": writer.rows,
+        "skipped_rows": sum(s["skipped_rows"] for s in all_stats),
+        "columns": columns,
+        "worker_seconds": sum(s["seconds"] for s in all_stats),
+    }
+
+
+# -----------------------------
+# Local runs and benchmark
+# -----------------------------
+def _worker_args(args) -> List[str]:
+    worker = ["--model", args.model, "--policy", args.policy, "--chunksize", str(args.chunksize),
+              "--compression", args.compression]
+    if args.profile_columns:
+        worker.append("--profile-columns")
+    else:
+        worker += ["--text-col", args.text_col]
+    if args.prefilter:
+        worker.append("--prefilter")
+    if args.batch_size:
+        worker += ["--batch-size", str(args.batch_size)]
+    worker += ["--batch-chars", str(args.batch_chars), "--max-doc-chars", str(args.max_doc_chars)]
+    if args.rss_limit_mb:
+        worker += ["--rss-limit-mb", str(args.rss_limit_mb)]
+    if args.surrogates:
+        # The key itself is inherited through the environment or read from the file, never put on a command line
+        worker.append("--surrogates")
+        if args.surrogate_key_file:
+            worker += ["--surrogate-key-file", args.surrogate_key_file]
+    if args.index:
+        worker.append("--index")
+        if args.index_salt_file:
+            worker += ["--index-salt-file", args.index_salt_file]
+    if args.profile:
+        worker += ["--profile", args.profile]
+        if args.profile_memory:
+            worker.append("--profile-memory")
+    return worker
+
+
+def run_local(args, inputs: List[str], workers: int, out_dir: str) -> Dict:
+    """Plan, run ``workers`` worker processes on this machine, then merge."""
+    manifest_path = str(Path(out_dir) / "manifest.json")
+    manifest = plan_shards(inputs, args.shards or workers, args.split)
+    write_manifest(manifest, manifest_path)
+
+    env = dict(os.environ, **{var: str(args.threads_per_worker) for var in THREAD_ENV_VARS})
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "work", "--manifest", manifest_path,
+                          "--out-dir", out_dir, "--worker-index", str(i), "--num-workers", str(workers),
+                          *_worker_args(args)], env=env)
+        for i in range(workers)
+    ]
+    failed = [i for i, p in enumerate(processes) if p.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Worker(s) {failed} failed; rerun 'work' for them or 'local' to resume.")
+    summary = merge_shards(manifest, out_dir, str(Path(out_dir) / ("merged" + SUFFIXES[args.compression])),
+                           compression=args.compression)
+    summary["wall_seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_processing_args(sub):
+        sub.add_argument("--model", default="PII Model", help="Model directory or model registry")
+        sub.add_argument("--text-col", default="text")
+        sub.add_argument("--profile-columns", action="store_true", help="Profile and anonymize every PII column")
+        sub.add_argument("--policy", default="longest")
+        sub.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+        sub.add_argument("--batch-size", type=int, default=None,
+                         help="Fixed batch size; with --batch-chars, the most documents per batch")
+        sub.add_argument("--batch-chars", type=int, default=DEFAULT_BATCH_CHARS,
+                         help="Character budget per model batch (0 = fixed --batch-size batches)")
+        sub.add_argument("--max-doc-chars", type=int, default=DEFAULT_MAX_DOC_CHARS,
+                         help="Split longer documents into pieces of at most this many characters")
+        sub.add_argument("--rss-limit-mb", type=float, default=None,
+                         help="Shrink the batch budget when the worker's RSS nears this ceiling")
+        sub.add_argument("--compression", default="gzip", choices=tuple(SUFFIXES))
+        sub.add_argument("--prefilter", action="store_true", help="Skip rows without PII cues")
+        sub.add_argument("--surrogates", action="store_true",
+                         help="Replace PII with keyed consistent surrogates (key from $PII_SURROGATE_KEY)")
+        sub.add_argument("--surrogate-key-file", default=None, help="Read the surrogate key from this file")
+        sub.add_argument("--index", action="store_true",
+                         help="Write a hashed PII index per shard under <out-dir>/index (salt from $PII_INDEX_SALT)")
+        sub.add_argument("--index-salt-file", default=None, help="Read the index salt from this file")
+        sub.add_argument("--profile", default=None, choices=PROFILE_MODES,
+                         help="Profile each worker; writes worker-<i>.summary.txt next to the shard outputs")
+        sub.add_argument("--profile-memory", action="store_true", help="Also trace allocations (with --profile)")
+
+    def add_plan_args(sub):
+        sub.add_argument("inputs", nargs="+", help="Files or folders (CSV, XLSX, Parquet, PDF)")
+        sub.add_argument("--split", default="bytes", choices=SPLITS)
+
+    plan = commands.add_parser("plan", help="Write a shard manifest")
+    add_plan_args(plan)
+    plan.add_argument("--shards", type=int, required=True)
+    plan.add_argument("--manifest", required=True)
+
+    work = commands.add_parser("work", help="Process shards of a manifest")
+    work.add_argument("--manifest", required=True)
+    work.add_argument("--out-dir", required=True)
+    work.add_argument("--shard", type=int, action="append", help="Shard id (repeatable)")
+    work.add_argument("--worker-index", type=int, default=0)
+    work.add_argument("--num-workers", type=int, default=1)
+    work.add_argument("--force", action="store_true", help="Reprocess shards that already completed")
+    add_processing_args(work)
+
+    merge = commands.add_parser("merge", help="Validate and combine shard outputs")
+    merge.add_argument("--manifest", required=True)
+    merge.add_argument("--out-dir", required=True)
+    merge.add_argument("--output", required=True)
+    merge.add_argument("--compression", default="gzip", choices=tuple(SUFFIXES))
+
+    for name in ("local", "bench"):
+        sub = commands.add_parser(name, help="Plan, run local worker processes and merge"
+                                  if name == "local" else "Time local runs for several worker counts")
+        add_plan_args(sub)
+        add_processing_args(sub)
+        sub.add_argument("--workers", type=int, nargs="+" if name == "bench" else None,
+                         default=[1, 2, 4] if name == "bench" else 2)
+        sub.add_argument("--shards", type=int, default=None, help="Defaults to the number of workers")
+        sub.add_argument("--threads-per-worker", type=int, default=1)
+        sub.add_argument("--out-dir", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        manifest = plan_shards(args.inputs, args.shards, args.split)
+        write_manifest(manifest, args.manifest)
+        for shard in manifest["shards"]:
+            print(f"shard {shard['id']}: {len(shard['parts'])} part(s), {shard['bytes']:,} bytes")
+    elif args.command == "work":
+        import spacy
+
+        from prefilter import build_prefilter
+
+        manifest = read_manifest(args.manifest)
+        shard_ids = args.shard or assigned_shards(len(manifest["shards"]), args.worker_index, args.num_workers)
+        from managed_model import ManagedModel
+        from model_registry import HotSwapModel, ModelRegistry, is_registry, lease
+
+        if is_registry(args.model):
+            # New registry versions are picked up between shards; each shard runs on one version
+            nlp = HotSwapModel(ModelRegistry(args.model), log=print).start()
+        else:
+            nlp = ManagedModel(spacy.load(args.model))
+        prefilter = build_prefilter() if args.prefilter else None
+        replace = None
+        if args.surrogates:
+            from surrogates import SurrogateGenerator
+
+            replace = SurrogateGenerator.from_env(args.surrogate_key_file)
+        index_salt = None
+        if args.index:
+            from pii_index import load_salt
+
+            index_salt = load_salt(args.index_salt_file)
+        batcher = None
+        if args.batch_chars:
+            batcher = BudgetBatcher(args.batch_chars, max_doc_chars=args.max_doc_chars, rss_limit_mb=args.rss_limit_mb,
+                                    max_items=args.batch_size or DEFAULT_MAX_BATCH_ITEMS)
+        profile = contextlib.nullcontext({})
+        if args.profile:
+            profile = profiled(f"worker-{args.worker_index}", args.out_dir, args.profile, args.profile_memory)
+        with profile as profile_files:
+            for shard_id in shard_ids:
+                with lease(nlp) as (version, shard_nlp):
+                    stats = run_shard(shard_nlp, manifest, shard_id, args.out_dir,
+                                      None if args.profile_columns else args.text_col, args.policy, args.chunksize,
+                                      args.batch_size, args.compression, prefilter, args.force, batcher, replace,
+                                      index_salt, version)
+                print(f"shard {shard_id}: {stats['rows']} rows in {stats['seconds']:.1f}s")
+        if profile_files:
+            print(f"Profile written to {profile_files['summary']}")
+    elif args.command == "merge":
+        print(json.dumps(merge_shards(read_manifest(args.manifest), args.out_dir, args.output, args.compression),
+                         indent=2))
+    elif args.command == "local":
+        print(json.dumps(run_local(args, args.inputs, args.workers, args.out_dir), indent=2))
+    else:
+        import pandas as pd
+
+        results = []
+        for workers in args.workers:
+            summary = run_local(args, args.inputs, workers, str(Path(args.out_dir) / f"workers-{workers}"))
+            results.append({"workers": workers, "rows": summary["rows"], "wall_seconds": summary["wall_seconds"],
+                            "rows_per_second": summary["rows"] / summary["wall_seconds"],
+                            "worker_seconds": summary["worker_seconds"]})
+        table = pd.DataFrame(results)
+        table["speedup"] = table["wall_seconds"].iloc[0] / table["wall_seconds"]
+        table.to_csv(Path(args.out_dir) / "scaling.csv", index=False)
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Overlap resolution for PII entity spans.
+
+Training annotations, model predictions and rule-based detectors can all produce
+overlapping character spans. ``resolve_spans`` keeps a non-overlapping subset using one
+of the configurable policies below, so every stage resolves conflicts the same way.
+
+Spans are ``(start, end, label)`` tuples, optionally with a fourth ``source`` element
+(``"rule"`` or ``"model"``; spans without one count as ``"model"``). Candidates are
+ranked once (O(n log n)) and accepted greedily. Accepted spans are kept sorted by start,
+so an overlap check is a binary search plus a look at the two neighbouring spans.
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+Span = Tuple  # (start, end, label) or (start, end, label, source)
+
+# Structured identifiers first: their patterns are the least ambiguous.
+DEFAULT_LABEL_PRIORITY = ("ssn", "credit_card", "email", "phone", "url", "address", "name", "company")
+DEFAULT_SOURCE_PRIORITY = ("rule", "model")
+
+POLICIES = ("longest", "priority", "rule_over_model")
+
+
+def _source(span: Span) -> str:
+    return span[3] if len(span) > 3 else "model"
+
+
+def _rank_key(policy: str, label_priority: Sequence[str], source_priority: Sequence[str]):
+    label_rank = {label: i for i, label in enumerate(label_priority)}
+    source_rank = {source: i for i, source in enumerate(source_priority)}
+    unknown_label = len(label_rank)
+    unknown_source = len(source_rank)
+
+    # Lower keys win; every policy falls back to longer, then earlier spans
+    if policy == "longest":
+        return lambda s: (s[0] - s[1], s[0])
+    if policy == "priority":
+        return lambda s: (label_rank.get(s[2], unknown_label), s[0] - s[1], s[0])
+    if policy == "rule_over_model":
+        return lambda s: (source_rank.get(_source(s), unknown_source), s[0] - s[1], s[0])
+    raise ValueError(f"Unknown span resolution policy '{policy}'. Choose one of {POLICIES}.")
+
+
+def resolve_spans(
+    spans: Sequence[Span],
+    policy: str = "longest",
+    label_priority: Sequence[str] = DEFAULT_LABEL_PRIORITY,
+    source_priority: Sequence[str] = DEFAULT_SOURCE_PRIORITY,
+) -> List[Span]:
+    """
+    Return a non-overlapping subset of ``spans`` sorted by start offset.
+
+    policy:
+      - "longest": the longest span wins (ties go to the earliest start).
+      - "priority": the label listed first in ``label_priority`` wins, then the longest.
+      - "rule_over_model": spans from the source listed first in ``source_priority`` win,
+        then the longest.
+    Spans that merely touch (one ends where the next starts) do not overlap. Empty or
+    inverted spans are dropped; exact duplicates collapse to one.
+    """
+    key = _rank_key(policy, label_priority, source_priority)
+    candidates = sorted((s for s in spans if 0 <= s[0] < s[1]), key=key)
+
+    # Accepted spans never overlap, so sorted by start they are sorted by end as well
+    starts: List[int] = []
+    ends: List[int] = []
+    accepted: List[Span] = []
+    for span in candidates:
+        start, end = span[0], span[1]
+        i = bisect_right(starts, start)
+        if (i and ends[i - 1] > start) or (i < len(starts) and starts[i] < end):
+            continue
+        starts.insert(i, start)
+        ends.insert(i, end)
+        accepted.insert(i, span)
+    return accepted
+
+
+def resolve_entities(
+    ents: List[Dict],
+    policy: str = "longest",
+    label_priority: Sequence[str] = DEFAULT_LABEL_PRIORITY,
+    source_priority: Sequence[str] = DEFAULT_SOURCE_PRIORITY,
+) -> List[Dict]:
+    """``resolve_spans`` for entity dicts with 'start', 'end', 'label' and optional 'source' keys."""
+    keyed = [(e["start"], e["end"], e["label"], e.get("source", "model"), i) for i, e in enumerate(ents)]
+    kept = resolve_spans(keyed, policy=policy, label_priority=label_priority, source_priority=source_priority)
+    return [ents[s[4]] for s in kept]
+
+
+def strip_sources(spans: Sequence[Span]) -> List[Tuple[int, int, str]]:
+    """Drop the optional ``source`` element, e.g. before handing spans to spaCy."""
+    return [(s[0], s[1], s[2]) for s in spans]
+
+
+def resolve_annotations(entities: Sequence[Span], policy: str = "longest") -> List[Tuple[int, int, str]]:
+    """Resolve training/evaluation annotations into spaCy-compatible (start, end, label) tuples."""
+    return strip_sources(resolve_spans(entities, policy=policy))
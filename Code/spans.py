@@ -0,0 +1,248 @@
+"""
+Compact, array-backed entity spans.
+
+Instead of one dict per entity (with a copy of the entity text), a ``SpanBatch`` stores the
+entities of many documents in flat numpy arrays:
+  - ``starts`` / ``ends``: int32 character offsets into each document's text,
+  - ``labels``: uint8 codes into ``label_names``,
+  - ``doc_offsets``: int64, the entities of document ``i`` are ``[doc_offsets[i], doc_offsets[i + 1])``.
+Indexing a batch gives a ``DocSpans`` view (no copy). Entity text is sliced from the
+source text when needed. Batches serialize to JSON Lines, Arrow IPC files or NPZ.
+
+``anonymize`` and the highlighting helpers accept a ``DocSpans`` wherever they accept a list
+of entity dicts; ``span_tuples`` converts either form to ``(start, end, label)`` tuples.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from span_resolver import DEFAULT_LABEL_PRIORITY, resolve_spans
+
+DEFAULT_LABELS = tuple(sorted(DEFAULT_LABEL_PRIORITY))
+MAX_LABELS = 256
+
+
+class DocSpans:
+    """Entities of one document (array views, sorted by start when built from spaCy docs)."""
+
+    __slots__ = ("starts", "ends", "labels", "label_names")
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, labels: np.ndarray, label_names: Sequence[str]):
+        self.starts = starts
+        self.ends = ends
+        self.labels = labels
+        self.label_names = label_names
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: slice) -> "DocSpans":
+        if not isinstance(index, slice):
+            raise TypeError("DocSpans supports slicing only; use tuples() for single entities.")
+        return DocSpans(self.starts[index], self.ends[index], self.labels[index], self.label_names)
+
+    def tuples(self) -> List[Tuple[int, int, str]]:
+        names = self.label_names
+        return [(s, e, names[code]) for s, e, code in zip(self.starts.tolist(), self.ends.tolist(), self.labels.tolist())]
+
+    def to_list(self) -> List[List]:
+        """JSON-ready ``[[start, end, label], ...]``."""
+        return [list(t) for t in self.tuples()]
+
+    def to_dicts(self, text: Optional[str] = None) -> List[Dict]:
+        """Entity dicts as returned by ``pii_pipeline.predict`` (with 'text' when ``text`` is given)."""
+        if text is None:
+            return [{"start": s, "end": e, "label": label} for s, e, label in self.tuples()]
+        return [{"start": s, "end": e, "label": label, "text": text[s:e]} for s, e, label in self.tuples()]
+
+    def filter_labels(self, labels: Optional[Iterable[str]]) -> "DocSpans":
+        if labels is None:
+            return self
+        wanted = {label.lower() for label in labels}
+        codes = [i for i, name in enumerate(self.label_names) if name in wanted]
+        mask = np.isin(self.labels, codes)
+        return DocSpans(self.starts[mask], self.ends[mask], self.labels[mask], self.label_names)
+
+    def shift(self, offset: int) -> "DocSpans":
+        return DocSpans(self.starts + offset, self.ends + offset, self.labels, self.label_names)
+
+    def resolve(self, policy: str = "longest") -> "DocSpans":
+        """Non-overlapping subset (see ``span_resolver.resolve_spans``), sorted by start."""
+        keyed = [(s, e, label, "model", i) for i, (s, e, label) in enumerate(self.tuples())]
+        keep = np.array([s[4] for s in resolve_spans(keyed, policy=policy)], dtype=np.int64)
+        return DocSpans(self.starts[keep], self.ends[keep], self.labels[keep], self.label_names)
+
+
+def span_tuples(ents: Union[DocSpans, List[Dict]]) -> List[Tuple[int, int, str]]:
+    """``(start, end, label)`` tuples from a ``DocSpans`` or a list of entity dicts."""
+    if isinstance(ents, DocSpans):
+        return ents.tuples()
+    return [(e["start"], e["end"], e["label"].lower()) for e in ents]
+
+
+class SpanBatch:
+    """Entities of a batch of documents in flat arrays (see the module docstring)."""
+
+    __slots__ = ("starts", "ends", "labels", "doc_offsets", "label_names")
+
+    def __init__(self, starts, ends, labels, doc_offsets, label_names: Sequence[str] = DEFAULT_LABELS):
+        if len(label_names) > MAX_LABELS:
+            raise ValueError(f"At most {MAX_LABELS} labels fit in uint8 label codes.")
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.ends = np.asarray(ends, dtype=np.int32)
+        self.labels = np.asarray(labels, dtype=np.uint8)
+        self.doc_offsets = np.asarray(doc_offsets, dtype=np.int64)
+        self.label_names = tuple(label_names)
+
+    # -- construction ------------------------------------------------------------------
+    @classmethod
+    def from_docs(cls, docs: Iterable, label_names: Sequence[str] = DEFAULT_LABELS) -> "SpanBatch":
+        """Collect ``doc.ents`` of spaCy docs; ``None`` stands for a document without entities."""
+        names = list(label_names)
+        codes = {name: i for i, name in enumerate(names)}
+        starts, ends, labels, offsets = [], [], [], [0]
+        for doc in docs:
+            if doc is not None:
+                for ent in doc.ents:
+                    label = ent.label_.lower()
+                    code = codes.get(label)
+                    if code is None:
+                        code = codes[label] = len(names)
+                        names.append(label)
+                    starts.append(ent.start_char)
+                    ends.append(ent.end_char)
+                    labels.append(code)
+            offsets.append(len(starts))
+        return cls(starts, ends, labels, offsets, names)
+
+    @classmethod
+    def from_entity_lists(cls, entity_lists: Iterable[Iterable], label_names: Sequence[str] = DEFAULT_LABELS
+                          ) -> "SpanBatch":
+        """From per-document lists of entity dicts or ``(start, end, label)`` tuples."""
+        names = list(label_names)
+        codes = {name: i for i, name in enumerate(names)}
+        starts, ends, labels, offsets = [], [], [], [0]
+        for ents in entity_lists:
+            for ent in ents:
+                start, end, label = (ent["start"], ent["end"], ent["label"]) if isinstance(ent, dict) else ent[:3]
+                label = label.lower()
+                if label not in codes:
+                    codes[label] = len(names)
+                    names.append(label)
+                starts.append(start)
+                ends.append(end)
+                labels.append(codes[label])
+            offsets.append(len(starts))
+        return cls(starts, ends, labels, offsets, names)
+
+    @classmethod
+    def concat(cls, batches: Sequence["SpanBatch"]) -> "SpanBatch":
+        """Concatenate batches (label codes are remapped onto a shared label table)."""
+        names = list(DEFAULT_LABELS)
+        for batch in batches:
+            names.extend(n for n in batch.label_names if n not in names)
+        index = {name: i for i, name in enumerate(names)}
+        offsets, total = [np.zeros(1, dtype=np.int64)], 0
+        for batch in batches:
+            offsets.append(batch.doc_offsets[1:] + total)
+            total += batch.n_spans
+        return cls(
+            np.concatenate([b.starts for b in batches]) if batches else [],
+            np.concatenate([b.ends for b in batches]) if batches else [],
+            np.concatenate([np.array([index[n] for n in b.label_names], dtype=np.uint8)[b.labels]
+                            for b in batches]) if batches else [],
+            np.concatenate(offsets),
+            names,
+        )
+
+    # -- access --------------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.doc_offsets) - 1
+
+    @property
+    def n_spans(self) -> int:
+        return int(self.doc_offsets[-1])
+
+    def __getitem__(self, i: int) -> DocSpans:
+        lo, hi = self.doc_offsets[i], self.doc_offsets[i + 1]
+        return DocSpans(self.starts[lo:hi], self.ends[lo:hi], self.labels[lo:hi], self.label_names)
+
+    def __iter__(self) -> Iterator[DocSpans]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.ends.nbytes + self.labels.nbytes + self.doc_offsets.nbytes
+
+    # -- serialization -------------------------------------------------------------------
+    def to_json_rows(self) -> List[str]:
+        """One compact JSON array ``[[start, end, "label"], ...]`` per document."""
+        quoted = [json.dumps(name) for name in self.label_names]
+        starts, ends, labels = self.starts.tolist(), self.ends.tolist(), self.labels.tolist()
+        offsets = self.doc_offsets.tolist()
+        return [
+            "[" + ",".join(f"[{starts[j]},{ends[j]},{quoted[labels[j]]}]" for j in range(lo, hi)) + "]"
+            for lo, hi in zip(offsets, offsets[1:])
+        ]
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for row in self.to_json_rows():
+                f.write(row + "\n")
+
+    @classmethod
+    def read_jsonl(cls, path: str) -> "SpanBatch":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_entity_lists(json.loads(line) for line in f)
+
+    def to_arrow(self):
+        """pyarrow Table with one row per entity: doc, start, end and a dictionary-encoded label."""
+        import pyarrow as pa
+
+        doc = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.doc_offsets))
+        table = pa.table({
+            "doc": doc,
+            "start": self.starts,
+            "end": self.ends,
+            "label": pa.DictionaryArray.from_arrays(pa.array(self.labels), pa.array(self.label_names)),
+        })
+        return table.replace_schema_metadata({"num_docs": str(len(self))})
+
+    def write_arrow(self, path: str) -> None:
+        import pyarrow as pa
+
+        table = self.to_arrow()
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    @classmethod
+    def from_arrow(cls, table) -> "SpanBatch":
+        import pyarrow as pa
+
+        num_docs = int(table.schema.metadata[b"num_docs"])
+        label = table.column("label").combine_chunks()
+        if not isinstance(label, pa.DictionaryArray):
+            label = label.dictionary_encode()
+        doc = table.column("doc").to_numpy()
+        offsets = np.searchsorted(doc, np.arange(num_docs + 1), side="left")
+        return cls(table.column("start").to_numpy(), table.column("end").to_numpy(),
+                   label.indices.to_numpy(zero_copy_only=False), offsets, label.dictionary.to_pylist())
+
+    @classmethod
+    def read_arrow(cls, path: str) -> "SpanBatch":
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            return cls.from_arrow(pa.ipc.open_file(source).read_all())
+
+    def write_npz(self, path: str) -> None:
+        np.savez_compressed(path, starts=self.starts, ends=self.ends, labels=self.labels,
+                            doc_offsets=self.doc_offsets, label_names=np.array(self.label_names))
+
+    @classmethod
+    def read_npz(cls, path: str) -> "SpanBatch":
+        with np.load(path) as data:
+            return cls(data["starts"], data["ends"], data["labels"], data["doc_offsets"],
+                       data["label_names"].tolist())
@@ -0,0 +1,324 @@
+"""
+Streaming anonymization of newline-delimited records (stdin or a named pipe to stdout).
+
+Records are plain text lines or JSON objects (JSONL). In JSONL mode only the string
+values at ``--fields`` (dotted paths such as ``message`` or ``user.name``) are
+anonymized. Other values are kept, and a record with nothing to replace is written back
+byte for byte. A line that is not a JSON object is anonymized as plain text and counted
+as 'invalid'. Records are written in input order.
+
+A reader thread parses lines into a buffer holding at most ``--max-in-flight-mb`` of
+records. A record stays in flight until its output is written. When the buffer is full
+the reader stops reading, so back-pressure reaches the writer through the pipe instead
+of growing memory. The main thread batches the records for ``nlp.pipe``. A batch is
+flushed when it reaches ``--batch-records`` records or ``--batch-chars`` characters,
+``--flush-ms`` after its first record arrived, or at once when the buffer is full.
+Each batch's output is flushed to stdout at once, so a record waits about ``--flush-ms``
+plus one batch of inference at most.
+A summary (records/s, flush reasons, latency) goes to stderr at the end.
+
+    tail -F app.log | python streaming.py --model "PII Model" > app.anon.log
+    kafkacat -C -t events | python streaming.py --format jsonl --fields message user.name --surrogates
+    mkfifo /tmp/pii.in && python streaming.py --input /tmp/pii.in --format jsonl --reopen
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import BinaryIO, Callable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+from budget_batching import DEFAULT_BATCH_CHARS, DEFAULT_MAX_DOC_CHARS, BudgetBatcher
+
+FORMATS = ("lines", "jsonl")
+DEFAULT_BATCH_RECORDS = 256
+DEFAULT_FLUSH_MS = 200
+DEFAULT_MAX_IN_FLIGHT_MB = 64
+LATENCY_WINDOW = 10_000
+
+# Buffer markers: end of input, a ``get`` that timed out, and a reader waiting for space
+EOF = object()
+TIMEOUT = object()
+FULL = object()
+
+
+class InFlightBuffer:
+    """
+    FIFO of items bounded by their total size in bytes. ``put`` blocks while the buffer
+    is full, except that one item larger than the whole limit is let through when the
+    buffer is empty. Sizes are given back with ``release`` once the item is done with.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self.blocked = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item, size: int) -> None:
+        with self._cond:
+            while self.used and self.used + size > self.max_bytes:
+                self.blocked = True
+                self._cond.notify_all()
+                self._cond.wait()
+            self.blocked = False
+            self.used += size
+            self.peak = max(self.peak, self.used)
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Mark the end of input (or pass the reader's ``error`` on to ``get``)."""
+        with self._cond:
+            self._items.append(error or EOF)
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        Next item, ``EOF``, ``TIMEOUT`` if nothing arrived within ``timeout`` seconds, or
+        ``FULL`` if nothing is buffered but ``put`` is waiting for items taken earlier to be released.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self.blocked, timeout):
+                return TIMEOUT
+            if not self._items:
+                return FULL
+            item = self._items.popleft()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+# -----------------------------
+# Records
+# -----------------------------
+class Record:
+    """One input line: its bytes, the parsed object (JSONL) and the texts to anonymize."""
+
+    __slots__ = ("line", "obj", "slots", "texts", "arrived")
+
+    def __init__(self, line: bytes, obj, slots: List[Tuple[object, object]], texts: List[str]):
+        self.line = line
+        self.obj = obj
+        # (container, key) of every text in ``obj``; empty for plain lines
+        self.slots = slots
+        self.texts = texts
+        self.arrived = time.monotonic()
+
+    def render(self, anonymized: List[Optional[str]]) -> bytes:
+        """Output line; ``anonymized`` holds the new texts (None where nothing was found)."""
+        if not any(a is not None for a in anonymized):
+            return self.line
+        ending = self.line[len(self.line.rstrip(b"\r\n")):]
+        if self.obj is None:
+            return anonymized[0].encode("utf-8") + ending
+        for (container, key), new in zip(self.slots, anonymized):
+            if new is not None:
+                container[key] = new
+        return json.dumps(self.obj, ensure_ascii=False).encode("utf-8") + ending
+
+
+def field_slots(obj, paths: Sequence[Sequence[str]]) -> List[Tuple[object, object]]:
+    """``(container, key)`` of the string values at ``paths`` (missing fields are skipped)."""
+    slots = []
+    for path in paths:
+        container = obj
+        for key in path[:-1]:
+            container = container.get(key) if isinstance(container, dict) else None
+        if isinstance(container, dict) and isinstance(container.get(path[-1]), str):
+            slots.append((container, path[-1]))
+    return slots
+
+
+def parse_record(line: bytes, fmt: str, paths: Sequence[Sequence[str]], stats: Counter) -> Record:
+    text = line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+    if fmt == "jsonl" and text.strip():
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            slots = field_slots(obj, paths)
+            return Record(line, obj, slots, [container[key] for container, key in slots])
+        stats["invalid"] += 1
+    return Record(line, None, [], [text] if text.strip() else [])
+
+
+def read_lines(path: str, reopen: bool = False) -> Iterator[bytes]:
+    """Lines of ``path`` ('-' for stdin); with ``reopen`` a named pipe is reopened after every writer closes it."""
+    if path == "-":
+        yield from sys.stdin.buffer
+        return
+    while True:
+        with open(path, "rb") as f:
+            yield from f
+        if not reopen:
+            return
+
+
+def _read_into(buffer: InFlightBuffer, lines: Iterator[bytes], fmt: str, paths, stats: Counter) -> None:
+    try:
+        for line in lines:
+            buffer.put(parse_record(line, fmt, paths, stats), len(line))
+    except BaseException as e:  # handed to the main thread
+        buffer.close(e)
+    else:
+        buffer.close()
+
+
+# -----------------------------
+# Streaming
+# -----------------------------
+def anonymize_records(nlp, records: List[Record], policy: str = "longest", prefilter: Optional[Pattern] = None,
+                      stats: Optional[Counter] = None, batcher: Optional[BudgetBatcher] = None,
+                      replace: Optional[Callable[[str, str], str]] = None) -> List[bytes]:
+    """Output lines of ``records``, with all their texts run through the model in one ``predict_spans`` call."""
+    from model_registry import lease
+    from pii_pipeline import anonymize, predict_spans
+
+    texts = [text for record in records for text in record.texts]
+    with lease(nlp) as (_, batch_nlp):
+        spans = iter(predict_spans(batch_nlp, texts, prefilter=prefilter, stats=stats, batcher=batcher))
+    out = []
+    for record in records:
+        anonymized = []
+        for text in record.texts:
+            ents = next(spans)
+            anonymized.append(anonymize(text, ents, policy, replace) if len(ents) else None)
+        out.append(record.render(anonymized))
+    return out
+
+
+def stream(nlp, lines: Iterator[bytes], output: BinaryIO, fmt: str = "lines", fields: Sequence[str] = ("text",),
+           batch_records: int = DEFAULT_BATCH_RECORDS, batch_chars: int = DEFAULT_BATCH_CHARS,
+           flush_ms: float = DEFAULT_FLUSH_MS, max_in_flight_mb: float = DEFAULT_MAX_IN_FLIGHT_MB,
+           **anonymize_kwargs) -> Counter:
+    """
+    Anonymize ``lines`` into ``output`` (see the module docstring) and return the stats:
+    'records', 'batches', 'invalid', 'flush_size' / 'flush_timeout' / 'flush_full' / 'flush_eof', plus
+    'max_latency_ms', 'p99_latency_ms' and 'peak_in_flight_mb'. ``anonymize_kwargs`` go to
+    ``anonymize_records``.
+    """
+    stats = Counter()
+    paths = [field.split(".") for field in fields]
+    buffer = InFlightBuffer(int(max_in_flight_mb * 2**20))
+    reader = threading.Thread(target=_read_into, args=(buffer, lines, fmt, paths, stats), name="stream-reader",
+                              daemon=True)
+    reader.start()
+    latencies = deque(maxlen=LATENCY_WINDOW)
+    batch: List[Record] = []
+    chars = 0
+    deadline = None
+
+    def flush(reason: str) -> None:
+        out = anonymize_records(nlp, batch, stats=stats, **anonymize_kwargs)
+        output.write(b"".join(out))
+        output.flush()
+        now = time.monotonic()
+        for record in batch:
+            latencies.append(now - record.arrived)
+        buffer.release(sum(len(record.line) for record in batch))
+        stats["records"] += len(batch)
+        stats["batches"] += 1
+        stats[f"flush_{reason}"] += 1
+
+    while True:
+        item = buffer.get(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if item is TIMEOUT or item is FULL or item is EOF:
+            if batch:
+                flush({TIMEOUT: "timeout", FULL: "full"}.get(item, "eof"))
+                batch, chars, deadline = [], 0, None
+            if item is EOF:
+                break
+            continue
+        batch.append(item)
+        chars += sum(map(len, item.texts))
+        if deadline is None:
+            deadline = item.arrived + flush_ms / 1000
+        if len(batch) >= batch_records or chars >= batch_chars:
+            flush("size")
+            batch, chars, deadline = [], 0, None
+
+    if latencies:
+        ordered = sorted(latencies)
+        stats["max_latency_ms"] = round(ordered[-1] * 1000, 1)
+        stats["p99_latency_ms"] = round(ordered[int(0.99 * (len(ordered) - 1))] * 1000, 1)
+    stats["peak_in_flight_mb"] = round(buffer.peak / 2**20, 2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="-", help="File or named pipe to read ('-' = stdin)")
+    parser.add_argument("--reopen", action="store_true", help="Keep reading a named pipe after its writer closes it")
+    parser.add_argument("--format", default="lines", choices=FORMATS)
+    parser.add_argument("--fields", nargs="+", default=["text"], help="JSONL fields to anonymize (dotted paths)")
+    parser.add_argument("--model", default="PII Model", help="Model directory or model registry")
+    parser.add_argument("--policy", default="longest")
+    parser.add_argument("--batch-records", type=int, default=DEFAULT_BATCH_RECORDS,
+                        help="Flush a batch at this many records")
+    parser.add_argument("--batch-chars", type=int, default=DEFAULT_BATCH_CHARS,
+                        help="Flush a batch at this many characters of text")
+    parser.add_argument("--flush-ms", type=float, default=DEFAULT_FLUSH_MS,
+                        help="Flush a batch this long after its first record arrived")
+    parser.add_argument("--max-in-flight-mb", type=float, default=DEFAULT_MAX_IN_FLIGHT_MB,
+                        help="Stop reading input while this much is buffered or being processed")
+    parser.add_argument("--max-doc-chars", type=int, default=DEFAULT_MAX_DOC_CHARS,
+                        help="Split longer texts into pieces of at most this many characters")
+    parser.add_argument("--prefilter", action="store_true", help="Skip texts without PII cues")
+    parser.add_argument("--surrogates", action="store_true",
+                        help="Replace PII with keyed consistent surrogates (key from $PII_SURROGATE_KEY)")
+    parser.add_argument("--surrogate-key-file", default=None, help="Read the surrogate key from this file")
+    parser.add_argument("--quiet", action="store_true", help="No summary on stderr")
+    args = parser.parse_args(argv)
+
+    import spacy
+
+    from managed_model import ManagedModel
+    from model_registry import HotSwapModel, ModelRegistry, is_registry
+    from prefilter import build_prefilter
+
+    log = lambda message: print(message, file=sys.stderr)  # noqa: E731
+    if is_registry(args.model):
+        # New registry versions are picked up between batches
+        nlp = HotSwapModel(ModelRegistry(args.model), log=log).start()
+    else:
+        nlp = ManagedModel(spacy.load(args.model), log=log)
+    replace = None
+    if args.surrogates:
+        from surrogates import SurrogateGenerator
+
+        replace = SurrogateGenerator.from_env(args.surrogate_key_file)
+
+    start = time.perf_counter()
+    try:
+        stats = stream(nlp, read_lines(args.input, args.reopen), sys.stdout.buffer, args.format, args.fields,
+                       args.batch_records, args.batch_chars, args.flush_ms, args.max_in_flight_mb,
+                       policy=args.policy, prefilter=build_prefilter() if args.prefilter else None,
+                       batcher=BudgetBatcher(args.batch_chars, max_doc_chars=args.max_doc_chars), replace=replace)
+    except BrokenPipeError:
+        # The reader downstream went away (e.g. 'head'); stop quietly like other filters
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    except KeyboardInterrupt:
+        return
+    if not args.quiet:
+        seconds = time.perf_counter() - start
+        log(f"{stats['records']:,} records in {seconds:.1f}s ({stats['records'] / seconds:,.0f}/s), "
+            f"{stats['batches']:,} batches (size {stats['flush_size']}, timeout {stats['flush_timeout']}, "
+            f"full {stats['flush_full']}, end {stats['flush_eof']}), {stats['invalid']} invalid, latency p99 {stats['p99_latency_ms']} ms / "
+            f"max {stats['max_latency_ms']} ms, peak in flight {stats['peak_in_flight_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
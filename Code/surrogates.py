@@ -0,0 +1,295 @@
+"""
+Deterministic, format-preserving surrogates for detected PII.
+
+Placeholders (``[NAME REDACTED]``) break joins across documents. ``SurrogateGenerator``
+instead replaces every value with a fake value derived from HMAC-SHA256 under a secret
+key, so the same real value always gets the same surrogate: in every document, process,
+shard and machine that uses the same key, with no shared state or coordination.
+The surrogate keeps the format of the original:
+  - words become pronounceable pseudo-words of the same length and capitalization. They
+    are keyed on the casefolded word alone, so "Parker" maps to the same word in a name,
+    a company and an e-mail address. Company suffixes, street types, card brands and
+    similar words are kept as they are,
+  - digits are replaced in place, keeping every separator. Phone numbers keep their
+    "+CC" country code, SSNs stay valid (area not 000/666/9xx) and card numbers keep
+    their first digit (the brand) and get a valid Luhn check digit. An expiry date next to
+    a card number keeps a month from 01 to 12 (and a 4-digit year keeps its century),
+  - e-mail addresses and URLs keep their structure, "www" and the top-level domain.
+Phone, SSN and card surrogates are keyed on the digits only, so "+1 555-010-9999" and
+"+1 (555) 010 9999" map to the same number, each in its own format. Results are kept in an LRU
+cache of ``cache_size`` values.
+
+The key comes from ``PII_SURROGATE_KEY`` or a key file. Anyone with the key can test a
+guessed value against a surrogate, so keep it as secret as the data.
+
+    PII_SURROGATE_KEY=... python surrogates.py map name "Caroline Wood"
+    PII_SURROGATE_KEY=... python surrogates.py bench --data Testing_Set.csv --workers 2
+"""
+
+import argparse
+import ast
+import hashlib
+import hmac
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+KEY_ENV_VAR = "PII_SURROGATE_KEY"
+MIN_KEY_BYTES = 16
+DEFAULT_CACHE_SIZE = 100_000
+
+VOWELS = "aeiou"
+CONSONANTS = "bcdfghjklmnprstvwz"
+TOKEN = re.compile(r"[^\W\d_]+|\d+|.", re.S)
+# Unbroken 12-19 digits, 4-4-4-(1-7) groups or Amex 4-6-5 groups
+CARD_NUMBER = re.compile(r"\b(?:\d{12,19}|\d{4}(?:[ -]\d{4}){2}[ -]\d{1,7}|\d{4}[ -]\d{6}[ -]\d{5})\b")
+# MM/YY, MM/YYYY, MM-YY (expiry dates next to a card number)
+CARD_EXPIRY = re.compile(r"\b(0?[1-9]|1[0-2])(\s?[/-]\s?)(\d{4}|\d{2})\b")
+PHONE_COUNTRY_CODE = re.compile(r"\s*\+\s*(\d{1,3})\D")
+URL_PARTS = re.compile(r"^([a-zA-Z][\w+.-]*://)?([^/?#]*)(.*)$", re.S)
+
+# Words that carry format rather than identity (compared casefolded)
+KEEP_WORDS = frozenset("""
+    inc llc ltd plc corp corporation co company group and of the sons partners holdings limited
+    gmbh ag sa bv llp lp pvt
+    street st avenue ave road rd boulevard blvd lane ln drive dr court ct suite ste apt apartment
+    unit box po floor fl way place pl square sq parkway pkwy highway hwy
+    mr mrs ms miss dr jr sr ii iii iv
+    cvv cvc cid exp expiry expires valid thru visa mastercard maestro amex american express discover
+    jcb diners club card number
+    www http https
+""".split())
+
+# Digits of these labels are keyed on the whole number rather than on each digit run
+NUMBER_LABELS = ("phone", "ssn", "credit_card")
+
+
+def load_key(path: Optional[str] = None) -> bytes:
+    """The surrogate key from ``path`` or the ``PII_SURROGATE_KEY`` environment variable."""
+    if path:
+        with open(path, "rb") as f:
+            key = f.read().strip()
+    else:
+        key = os.environ.get(KEY_ENV_VAR, "").encode("utf-8")
+    if len(key) < MIN_KEY_BYTES:
+        source = path or KEY_ENV_VAR
+        raise ValueError(f"Surrogate key from {source} must be at least {MIN_KEY_BYTES} bytes "
+                         f"(e.g. the output of 'python -c \"import secrets; print(secrets.token_hex(32))\"').")
+    return key
+
+
+def luhn_check_digit(digits: str) -> str:
+    """Check digit that makes ``digits`` + it pass the Luhn test."""
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        n = int(d)
+        if i % 2 == 0:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return str(-total % 10)
+
+
+def _lay_digits(shape: str, digits: str) -> str:
+    """``shape`` with its digits replaced, in order, by ``digits``."""
+    new = iter(digits)
+    return "".join(next(new) if ch.isdigit() else ch for ch in shape)
+
+
+class SurrogateGenerator:
+    """Keyed, format-preserving replacement of PII values (see the module docstring)."""
+
+    def __init__(self, key: bytes, cache_size: int = DEFAULT_CACHE_SIZE):
+        if len(key) < MIN_KEY_BYTES:
+            raise ValueError(f"Surrogate key must be at least {MIN_KEY_BYTES} bytes.")
+        self._key = key
+        self._cached = lru_cache(maxsize=cache_size)(self._surrogate)
+
+    @classmethod
+    def from_env(cls, key_file: Optional[str] = None, **kwargs) -> "SurrogateGenerator":
+        return cls(load_key(key_file), **kwargs)
+
+    def __call__(self, value: str, label: str) -> str:
+        return self._cached(value, label.lower())
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    # -----------------------------
+    # Keyed streams
+    # -----------------------------
+    def _stream(self, domain: str, value: str, n: int) -> bytes:
+        out, counter = b"", 0
+        while len(out) < n:
+            out += hmac.new(self._key, f"{domain}\x1f{value}\x1f{counter}".encode("utf-8"), hashlib.sha256).digest()
+            counter += 1
+        return out[:n]
+
+    def _digits(self, domain: str, value: str, n: int) -> str:
+        return "".join(str(b % 10) for b in self._stream(domain, value, n))
+
+    def word(self, word: str) -> str:
+        """Pseudo-word with the length and per-letter capitalization of ``word``."""
+        folded = word.casefold()
+        if folded in KEEP_WORDS:
+            return word
+        stream = self._stream("word", folded, len(word) + 1)
+        start = stream[-1] & 1
+        letters = []
+        for i, ch in enumerate(word):
+            pool = VOWELS if (i + start) % 2 else CONSONANTS
+            letter = pool[stream[i] % len(pool)]
+            letters.append(letter.upper() if ch.isupper() else letter)
+        return "".join(letters)
+
+    # -----------------------------
+    # Formats
+    # -----------------------------
+    def text(self, value: str, label: str) -> str:
+        """Word by word: pseudo-words for words, keyed digits for digit runs, everything else kept."""
+        parts = []
+        for token in TOKEN.findall(value):
+            if token.isdigit():
+                parts.append(self._digits(f"digits:{label}", token, len(token)))
+            elif token.isalpha():
+                # Two-letter upper-case words in addresses are state codes
+                keep = label == "address" and len(token) == 2 and token.isupper()
+                parts.append(token if keep else self.word(token))
+            else:
+                parts.append(token)
+        return "".join(parts)
+
+    def number(self, value: str, label: str) -> str:
+        digits = re.sub(r"\D", "", value)
+        if not digits:
+            return self.text(value, label)
+        keep = 0
+        if label == "phone":
+            country = PHONE_COUNTRY_CODE.match(value)
+            keep = len(country.group(1)) if country and len(country.group(1)) < len(digits) else 0
+        elif label == "credit_card":
+            keep = 1
+        new = digits[:keep] + self._digits(label, digits, len(digits) - keep)
+        if label == "ssn" and len(new) == 9:
+            area, group, serial = new[:3], new[3:5], new[5:]
+            if area in ("000", "666") or area[0] == "9":
+                area = str(int(area) % 665 + 1).zfill(3)
+            new = area + (group if group != "00" else "01") + (serial if serial != "0000" else "0001")
+        elif label == "credit_card" and len(new) > 1:
+            new = new[:-1] + luhn_check_digit(new[:-1])
+        return _lay_digits(value, new)
+
+    def card_text(self, value: str) -> str:
+        """Card numbers inside ``value`` (e.g. a card block with holder name and expiry) get Luhn-valid surrogates."""
+        parts, last = [], 0
+        for match in CARD_NUMBER.finditer(value):
+            parts.append(self._card_details(value[last:match.start()]))
+            parts.append(self.number(match.group(), "credit_card"))
+            last = match.end()
+        if not parts:
+            return self.number(value, "credit_card")
+        parts.append(self._card_details(value[last:]))
+        return "".join(parts)
+
+    def _card_details(self, value: str) -> str:
+        """Text around a card number: valid expiry dates, everything else word by word."""
+        parts, last = [], 0
+        for match in CARD_EXPIRY.finditer(value):
+            month, separator, year = match.groups()
+            digits = self._digits("expiry", month.zfill(2) + year, 2 + len(year))
+            # A one-digit month stays one digit
+            new_month = str(int(digits[:2]) % (12 if len(month) == 2 else 9) + 1).zfill(len(month))
+            new_year = year[:2] + digits[4:] if len(year) == 4 else digits[2:]
+            parts.append(self.text(value[last:match.start()], "credit_card"))
+            parts.append(new_month + separator + new_year)
+            last = match.end()
+        parts.append(self.text(value[last:], "credit_card"))
+        return "".join(parts)
+
+    def domain(self, host: str) -> str:
+        labels = host.split(".")
+        if len(labels) < 2:
+            return self.text(host, "url")
+        return ".".join([*(self.text(label, "url") for label in labels[:-1]), labels[-1]])
+
+    def email(self, value: str) -> str:
+        local, at, host = value.rpartition("@")
+        if not at:
+            return self.text(value, "email")
+        return f"{self.text(local, 'email')}@{self.domain(host)}"
+
+    def url(self, value: str) -> str:
+        scheme, host, rest = URL_PARTS.match(value).groups()
+        return f"{scheme or ''}{self.domain(host)}{self.text(rest, 'url')}"
+
+    def _surrogate(self, value: str, label: str) -> str:
+        if label == "email":
+            return self.email(value)
+        if label == "url":
+            return self.url(value)
+        if label == "credit_card":
+            return self.card_text(value)
+        if label in NUMBER_LABELS:
+            return self.number(value, label)
+        return self.text(value, label)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _anonymize_rows(texts: List[str], entity_lists: List[List], key: Optional[bytes]) -> List[str]:
+    from pii_pipeline import anonymize
+
+    replace: Optional[Callable] = SurrogateGenerator(key) if key else None
+    ents = [[{"start": s, "end": e, "label": label} for s, e, label in row] for row in entity_lists]
+    return [anonymize(text, row, replace=replace) for text, row in zip(texts, ents)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--key-file", default=None, help=f"Key file (default: ${KEY_ENV_VAR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("map", help="Print the surrogate of one value")
+    show.add_argument("label")
+    show.add_argument("value")
+    bench = commands.add_parser("bench", help="Placeholder vs surrogate anonymization on annotated rows")
+    bench.add_argument("--data", default="Testing_Set.csv")
+    bench.add_argument("--repeat", type=int, default=50)
+    bench.add_argument("--workers", type=int, default=2, help="Processes that must produce identical output")
+    args = parser.parse_args(argv)
+
+    key = load_key(args.key_file)
+    if args.command == "map":
+        print(SurrogateGenerator(key)(args.value, args.label))
+        return
+
+    import multiprocessing
+
+    import pandas as pd
+
+    df = pd.read_csv(args.data)
+    texts = df["text"].astype(str).tolist() * args.repeat
+    entity_lists = [ast.literal_eval(raw) for raw in df["True Predictions"]] * args.repeat
+    # 'surrogate' starts with a cold cache; every value repeats ``--repeat`` times
+    for name, mode_key, rows, ents in (("placeholder", None, texts, entity_lists),
+                                       ("surrogate", key, texts, entity_lists),
+                                       ("cold cache", key, texts[:len(df)], entity_lists[:len(df)])):
+        start = time.perf_counter()
+        _anonymize_rows(rows, ents, mode_key)
+        seconds = time.perf_counter() - start
+        print(f"{name:>11}: {len(rows) / seconds:,.0f} rows/s, {sum(map(len, ents)) / seconds:,.0f} entities/s")
+
+    # Independent processes, each with a cold cache, must agree on every row
+    ctx = multiprocessing.get_context("spawn")
+    half = len(df)
+    with ctx.Pool(args.workers) as pool:
+        outputs = pool.starmap(_anonymize_rows, [(texts[:half], entity_lists[:half], key)] * args.workers)
+    identical = all(out == outputs[0] for out in outputs)
+    print(f"{args.workers} worker processes produced {'identical' if identical else 'DIFFERENT'} surrogates")
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from budget_batching import BudgetBatcher, split_text
+
+
+def test_split_text_prefers_line_breaks_and_covers_the_text():
+    text = "first line\nsecond line here\nthird"
+    pieces = split_text(text, 20)
+    assert "".join(piece for piece, _ in pieces) == text
+    assert all(text[offset:offset + len(piece)] == piece for piece, offset in pieces)
+    assert pieces[0][0] == "first line\n"
+    assert all(len(piece) <= 20 for piece, _ in pieces)
+
+
+def test_batches_fill_the_budget():
+    batcher = BudgetBatcher(budget=10, max_doc_chars=100)
+    batches = list(batcher.batches(["aaaa", "bbbb", "cccc", "dd"]))
+    assert [[piece for _, _, piece in batch] for batch in batches] == [["aaaa", "bbbb"], ["cccc", "dd"]]
+
+
+def test_small_budget_does_not_split_documents():
+    # A shrunk budget changes batch composition only; a long text gets a batch of its own
+    batcher = BudgetBatcher(budget=10, max_doc_chars=100, min_budget=10)
+    text = "Jane Doe lives at 42 Baker Street"
+    batches = list(batcher.batches(["hi", text, "there"]))
+    assert batches == [[(0, 0, "hi")], [(1, 0, text)], [(2, 0, "there")]]
+    assert batcher.stats["split_docs"] == 0
+
+
+def test_documents_over_max_doc_chars_are_split_with_offsets():
+    batcher = BudgetBatcher(budget=1000, max_doc_chars=12)
+    text = "alpha beta gamma delta"
+    batch, = batcher.batches([text])
+    assert "".join(piece for _, _, piece in batch) == text
+    assert all(text[offset:].startswith(piece) for _, offset, piece in batch)
+    assert batcher.stats["split_docs"] == 1
+
+
+def test_max_items():
+    batcher = BudgetBatcher(budget=1000, max_items=2)
+    assert [len(b) for b in batcher.batches(["a"] * 5)] == [2, 2, 1]
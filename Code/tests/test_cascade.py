@@ -0,0 +1,59 @@
+from collections import Counter
+
+import pytest
+
+from cascade import Cascade, entity_scores, rule_entities
+
+
+def _spans(ents):
+    return [(e["start"], e["end"], e["label"]) for e in ents]
+
+
+def test_rule_entities():
+    text = "Mail jd@example.com, see https://example.com/a. SSN 123-45-6789, cards 4111 1111 1111 1111 / 4111 1111 1111 1112"
+    found = {(text[s:e], label) for s, e, label in _spans(rule_entities(text))}
+    assert found == {
+        ("jd@example.com", "email"), ("https://example.com/a", "url"), ("123-45-6789", "ssn"),
+        ("4111 1111 1111 1111", "credit_card"),
+    }
+    assert all(e["source"] == "rule" and e["score"] == 1.0 for e in rule_entities(text))
+    assert rule_entities("order 1234-56-78901 and 0123-45-6789x") == []
+
+
+def test_entity_scores():
+    gold = [{(0, 4, "name"), (5, 9, "phone")}, set()]
+    predicted = [[{"start": 0, "end": 4, "label": "name"}], [{"start": 1, "end": 2, "label": "ssn"}]]
+    assert entity_scores(gold, predicted) == {"precision": 0.5, "recall": 0.5, "f1": 0.5}
+    assert entity_scores([set()], [[]]) == {"precision": 0.0, "recall": 0.0, "f1": 0.0}
+
+
+@pytest.fixture(scope="module")
+def heavy_nlp():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "NAME", "pattern": "Jane Doe"}])
+    return nlp
+
+
+def test_only_low_confidence_documents_are_escalated(heavy_nlp):
+    texts = ["Jane Doe called", "Jane Doe wrote to jd@example.com"]
+    first_tier = [([], 0.99), ([], 0.6)]
+    stats = Counter()
+    cascade = Cascade(None, heavy_nlp, threshold=0.9)
+    results = cascade.predict_many(texts, stats=stats, first_tier=first_tier)
+    # The confident document keeps its (empty) first-tier result; rules still apply to both
+    assert _spans(results[0]) == []
+    assert _spans(results[1]) == [(0, 8, "name"), (18, 32, "email")]
+    assert stats == {"docs": 2, "escalated": 1}
+
+    cascade.threshold = 0.5
+    assert all(_spans(r) == _spans(rule_entities(t)) for t, r in zip(texts, cascade.predict_many(texts, first_tier=first_tier)))
+
+
+def test_rules_do_not_cut_wider_model_spans(heavy_nlp):
+    text = "Card 4111 1111 1111 1111 exp 12/27"
+    block = {"start": 5, "end": len(text), "label": "credit_card", "score": 0.97}
+    cascade = Cascade(None, heavy_nlp, threshold=0.9)
+    assert _spans(cascade.predict_many([text], first_tier=[([block], 0.97)])[0]) == [(5, len(text), "credit_card")]
+    without_rules = Cascade(None, heavy_nlp, threshold=0.9, use_rules=False)
+    assert without_rules.predict_many(["jd@example.com"], first_tier=[([], 1.0)]) == [[]]
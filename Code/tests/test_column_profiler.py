@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_profiler import (FREE_TEXT, NON_PII, STRUCTURED, luhn_valid, profile_column, profile_columns,
+                             redact_structured, validate)
+
+
+def test_luhn_valid():
+    digits = pd.Series(["4111111111111111", "4111111111111112", "79927398713", None, ""])
+    # 11 digits pass the checksum but are too short for a card
+    assert luhn_valid(digits).tolist() == [True, False, False, False, False]
+
+
+def test_validate_credit_card_inside_text():
+    values = pd.Series(["Visa 4111 1111 1111 1111 exp 09/27", "4111 1111 1111 1112", "n/a"])
+    assert validate(values, "credit_card").tolist() == [True, False, False]
+
+
+@pytest.mark.parametrize("label, values", [
+    ("ssn", ["123-45-6789", "987 65 4321"]),
+    ("email", ["ann.lee@example.com", "bob+tag@mail.co.uk"]),
+    ("phone", ["+44 20 7946 0958", "(555) 010-9999"]),
+    ("url", ["https://example.com/a", "www.example.org"]),
+])
+def test_structured_columns_from_values(label, values):
+    profile = profile_column("col", pd.Series(values * 10))
+    assert profile["kind"] == STRUCTURED and profile["label"] == label
+
+
+def test_integer_timestamps_and_ids_are_not_pii():
+    # 10-digit epoch seconds fit the phone pattern and 9-digit IDs the SSN pattern
+    timestamps = pd.Series(np.arange(1_700_000_000, 1_700_000_500, dtype="int64"))
+    order_ids = pd.Series(np.arange(123_456_789, 123_457_289, dtype="int64"))
+    assert profile_column("created_at", timestamps)["kind"] == NON_PII
+    assert profile_column("order_id", order_ids)["kind"] == NON_PII
+
+
+def test_integer_column_with_matching_header_is_structured():
+    ssns = pd.Series(np.arange(123_456_789, 123_456_889, dtype="int64"))
+    assert profile_column("ssn", ssns) == {"kind": STRUCTURED, "label": "ssn", "match_rate": 1.0}
+    assert profile_column("ssn", ssns, use_header_hints=False)["kind"] == NON_PII
+
+
+def test_header_hint_for_names():
+    names = pd.Series(["Ann Lee", "Bob Roe", "Cy Twombly"] * 10)
+    assert profile_column("Customer Name", names)["label"] == "name"
+
+
+def test_free_text_categorical_and_empty_columns():
+    prose = pd.Series(["Please call me back tomorrow about the overdue invoice for March, thanks a lot."] * 5)
+    status = pd.Series(["open", "closed"] * 50)
+    assert profile_column("notes", prose)["kind"] == FREE_TEXT
+    assert profile_column("status", status)["kind"] == NON_PII
+    assert profile_column("empty", pd.Series([None, "  "]))["kind"] == NON_PII
+    assert profile_column("flag", pd.Series([True, False]))["kind"] == NON_PII
+
+
+def test_profile_columns_skips_columns():
+    df = pd.DataFrame({"email": ["a@b.com"] * 3, "id": [1, 2, 3]})
+    assert set(profile_columns(df, skip={"id"})) == {"email"}
+
+
+def test_redact_structured_keeps_empty_cells():
+    out = redact_structured(pd.Series(["a@b.com", None, " ", "c@d.org"]), "[EMAIL REDACTED]")
+    assert out.tolist() == ["[EMAIL REDACTED]", None, " ", "[EMAIL REDACTED]"]
@@ -0,0 +1,82 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from coreset import (
+    masked_context, minhash_signatures, near_duplicate_clusters, reduce_corpus, select_coreset, shingles,
+)
+
+TEMPLATES = [
+    "My name is {name} and you can reach me at {phone} any time after work on weekdays.",
+    "Please send the invoice for {company} to {email} before the end of the month as usual.",
+    "The delivery address is {address}; leave the parcel with the neighbours if nobody is home.",
+]
+
+
+def _row(template: int, i: int):
+    values = {"name": f"Person{i}", "phone": f"555-01{i:02d}", "company": f"Firm{i} Ltd",
+              "email": f"user{i}@example.com", "address": f"{i} Elm Street"}
+    text, entities = TEMPLATES[template], []
+    for field in ("name", "phone", "company", "email", "address"):
+        marker = "{" + field + "}"
+        if marker in text:
+            start = text.index(marker)
+            text = text.replace(marker, values[field])
+            entities.append((start, start + len(values[field]), field))
+    return text, entities
+
+
+def test_masked_context_makes_template_rows_identical():
+    (a, ents_a), (b, ents_b) = _row(0, 1), _row(0, 42)
+    assert a != b
+    assert masked_context(a, ents_a) == masked_context(b, ents_b)
+    assert masked_context(a, ents_a).startswith("My name is <NAME> and")
+    # Overlapping entities keep the first one
+    assert masked_context("Jane Doe", [(0, 8, "name"), (5, 8, "name")]) == "<NAME>"
+
+
+def test_shingles():
+    assert shingles("A b C d") == {"a b c", "b c d"}
+    assert shingles("two words") == {"two words"}
+    assert shingles("") == set()
+
+
+def test_minhash_agreement_tracks_jaccard():
+    base = " ".join(f"w{i}" for i in range(200))
+    near = base.replace("w100 ", "x ")
+    far = " ".join(f"z{i}" for i in range(200))
+    sig = minhash_signatures([shingles(t) for t in (base, near, far)], num_perm=128)
+    assert np.mean(sig[0] == sig[1]) > 0.8
+    assert np.mean(sig[0] == sig[2]) < 0.1
+    assert np.array_equal(sig, minhash_signatures([shingles(t) for t in (base, near, far)], num_perm=128))
+
+
+def test_near_duplicate_clusters_group_templates():
+    rows = [_row(t, i) for i in range(10) for t in range(3)]
+    contexts = [masked_context(text, ents) for text, ents in rows]
+    clusters = near_duplicate_clusters(minhash_signatures([shingles(c) for c in contexts]))
+    assert len(set(clusters)) == 3
+    for t in range(3):
+        assert len({clusters[i] for i in range(t, len(rows), 3)}) == 1
+
+
+def test_select_coreset_covers_clusters_and_balances_labels():
+    labels = [Counter(name=1, phone=1)] * 10 + [Counter(email=1, company=1)] * 10 + [Counter(address=1)] * 10
+    clusters = [0] * 10 + [1] * 10 + [2] * 10
+    picked = select_coreset(labels, clusters, 3)
+    assert sorted(clusters[i] for i in picked) == [0, 1, 2]
+    assert len(set(select_coreset(labels, clusters, 30))) == 30
+    assert len(select_coreset(labels, clusters, 100)) == 30
+    assert select_coreset(labels, clusters, 9, seed=5) == select_coreset(labels, clusters, 9, seed=5)
+
+
+def test_reduce_corpus():
+    rows = [_row(t, i) for i in range(10) for t in range(3)]
+    dataset = pd.DataFrame({"text": [t for t, _ in rows] + [rows[0][0]],
+                            "True Predictions": [str(e) for _, e in rows] + [str(rows[0][1])]})
+    selected, stats = reduce_corpus(dataset, None)
+    assert stats["exact_duplicates"] == 1
+    assert stats["clusters"] == stats["clusters_covered"] == stats["selected"] == len(selected) == 3
+    selected, stats = reduce_corpus(dataset, 6)
+    assert len(selected) == 6 and stats["clusters_covered"] == 3
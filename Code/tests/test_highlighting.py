@@ -0,0 +1,68 @@
+import pytest
+
+from highlighting import entities_in_window, filter_labels, page_bounds, render_highlighted
+from spans import SpanBatch
+
+
+def _ents(*spans):
+    return [{"start": s, "end": e, "label": label} for s, e, label in spans]
+
+
+def test_short_text_is_one_page():
+    assert page_bounds("hello", [], page_chars=100) == [(0, 5)]
+    assert page_bounds("", []) == [(0, 0)]
+
+
+def test_pages_cover_the_text_and_prefer_line_breaks():
+    text = "\n".join(f"line {i:03d}" for i in range(100))
+    bounds = page_bounds(text, [], page_chars=100)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(text)
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    assert all(text[end - 1] == "\n" for _, end in bounds[:-1])
+    assert all(end - start <= 100 for start, end in bounds)
+
+
+def test_pages_never_cut_an_entity():
+    text = "x" * 95 + "Jane Doe" + "y" * 100
+    ents = _ents((95, 103, "name"))
+    bounds = page_bounds(text, ents, page_chars=100)
+    assert bounds[0] == (0, 103)
+    assert all(not (start < 95 < end < 103) for start, end in bounds)
+    # DocSpans give the same pages as entity dicts
+    assert page_bounds(text, SpanBatch.from_entity_lists([ents])[0], page_chars=100) == bounds
+
+
+def test_entities_in_window():
+    ents = _ents((0, 4, "name"), (10, 14, "phone"), (20, 30, "email"))
+    starts = [e["start"] for e in ents]
+    assert entities_in_window(ents, starts, 5, 20) == ents[1:2]
+    assert entities_in_window(ents, starts, 0, 100) == ents
+    assert entities_in_window(ents, starts, 31, 40) == []
+    doc = SpanBatch.from_entity_lists([ents])[0]
+    assert entities_in_window(doc, doc.starts, 5, 21).tuples() == [(10, 14, "phone"), (20, 30, "email")]
+
+
+def test_filter_labels():
+    ents = _ents((0, 4, "name"), (10, 14, "phone"))
+    assert filter_labels(ents, ["PHONE"]) == ents[1:]
+    assert filter_labels(ents, None) is ents
+
+
+def test_render_highlighted_escapes_and_windows():
+    text = "<b>Jane</b> & Bob"
+    html = render_highlighted(text, _ents((3, 7, "name"), (14, 17, "name")), 0, 12)
+    assert "&lt;b&gt;" in html and "title='name'>Jane</span>" in html
+    # Entities outside the window are not rendered and the text stops at its end
+    assert "Bob" not in html and html.endswith("&lt;/b&gt; ")
+
+
+@pytest.mark.parametrize("page_chars", [7, 50, 1000])
+def test_every_entity_lands_on_exactly_one_page(page_chars):
+    text = " ".join(["Call Jane Doe at 555-0100.\n"] * 20)
+    ents = [e for i in range(20) for e in _ents((28 * i + 5, 28 * i + 13, "name"), (28 * i + 17, 28 * i + 25, "phone"))]
+    assert all(text[e["start"]:e["end"]] in ("Jane Doe", "555-0100") for e in ents)
+    starts = [e["start"] for e in ents]
+    pages = [entities_in_window(ents, starts, s, e) for s, e in page_bounds(text, ents, page_chars)]
+    assert [e for page in pages for e in page] == ents
+    for (start, end), page in zip(page_bounds(text, ents, page_chars), pages):
+        assert all(start <= e["start"] and e["end"] <= end for e in page)
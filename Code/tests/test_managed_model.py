@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from managed_model import DetachedDoc, ManagedModel, random_pii_texts
+
+
+@pytest.fixture
+def nlp():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    # A token pattern: EntityRuler.from_bytes drops phrase patterns, and reloads go through it
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "NAME", "pattern": [{"LOWER": "jane"}, {"LOWER": "doe"}]}])
+    return nlp
+
+
+def test_pipe_yields_detached_docs_in_order(nlp):
+    model = ManagedModel(nlp, zone_docs=2)
+    texts = [f"doc {i} from Jane Doe" for i in range(5)]
+    docs = list(model.pipe(texts))
+    assert all(isinstance(doc, DetachedDoc) for doc in docs)
+    assert [doc.text for doc in docs] == texts
+    assert [(e.start_char, e.end_char, e.label_, e.text) for e in docs[3].ents] == [(11, 19, "NAME", "Jane Doe")]
+    assert len(docs[0]) == 5
+    pairs = list(model.pipe([("Jane Doe", 1), ("nobody", 2)], as_tuples=True))
+    assert [(len(doc.ents), context) for doc, context in pairs] == [(1, 1), (0, 2)]
+    assert model.metrics()["docs"] == 7
+
+
+def test_memory_zones_drop_the_strings_of_each_chunk(nlp):
+    model = ManagedModel(nlp, zone_docs=10)
+    strings = len(nlp.vocab.strings)
+    for _ in model.pipe(random_pii_texts(50)):
+        pass
+    assert len(nlp.vocab.strings) == strings
+
+    plain = ManagedModel(nlp, use_memory_zones=False)
+    for _ in plain.pipe(random_pii_texts(50, seed=1)):
+        pass
+    assert len(nlp.vocab.strings) > strings
+
+
+def test_reload_once_the_vocab_limit_is_exceeded(nlp):
+    log = []
+    model = ManagedModel(nlp, check_every=10, max_vocab=20, use_memory_zones=False, log=log.append)
+    for text in random_pii_texts(9):
+        model(text)
+    # Vocab is only checked every check_every documents
+    assert model.reloads == 0 and model.nlp is nlp
+    model("one more")
+    assert model.reloads == 1 and model.nlp is not nlp
+    assert log and "vocab" in log[0]
+    # The fresh pipeline has the load-time vocab and still finds entities
+    assert len(model.nlp.vocab) - model.baseline_vocab == 0
+    assert [e.text for e in model("from Jane Doe").ents] == ["Jane Doe"]
+    assert model.pipe_names == ["entity_ruler"]
+
+
+def test_no_reload_without_limits(nlp):
+    model = ManagedModel(nlp, check_every=5, max_vocab=None, use_memory_zones=False)
+    for _ in model.pipe(random_pii_texts(20)):
+        pass
+    assert model.maybe_reload() is False
+    assert model.reloads == 0 and model.nlp is nlp
+
+
+def test_reload_on_request(nlp):
+    log = []
+    model = ManagedModel(nlp, log=log.append)
+    model.reload()
+    assert model.reloads == 1 and model.reload_seconds > 0
+    assert log == ["Reloaded model after 0 documents (requested)"]
+    assert [doc.ents[0].text for doc in model.pipe(["Jane Doe"])] == ["Jane Doe"]
+
+
+def test_abandoned_stream_does_not_hold_the_model(nlp):
+    model = ManagedModel(nlp, zone_docs=2)
+    docs = model.pipe(f"doc {i}" for i in range(10))
+    next(docs)
+    result = []
+    other = threading.Thread(target=lambda: result.append(model("Jane Doe")))
+    other.start()
+    other.join(5)
+    assert result and result[0].ents[0].text == "Jane Doe"
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from model_registry import HotSwapModel, ModelRegistry, lease, model_version
+
+spacy = pytest.importorskip("spacy")
+
+
+class FakeWrap:
+    """Stands in for ``ManagedModel``: records what it ran and refuses models named 'broken'."""
+
+    def __init__(self, nlp):
+        if nlp.meta["name"] == "broken":
+            raise ValueError("broken model")
+        self.nlp = nlp
+        self.name = nlp.meta["name"]
+        self.seen = []
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            self.seen.append(text)
+            yield self.nlp(text)
+
+    def __call__(self, text):
+        self.seen.append(text)
+        return self.nlp(text)
+
+
+def _register(registry, tmp_path, name):
+    nlp = spacy.blank("en")
+    nlp.meta["name"] = name
+    nlp.to_disk(tmp_path / name)
+    return registry.register(str(tmp_path / name))["version"]
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "models"))
+    _register(registry, tmp_path, "first")
+    return registry
+
+
+def test_register_and_activate(registry, tmp_path):
+    assert registry.current() == "v0001"
+    # Registering does not move CURRENT once there is one
+    assert _register(registry, tmp_path, "second") == "v0002"
+    assert registry.current() == "v0001"
+    assert [meta["version"] for meta in registry.versions()] == ["v0001", "v0002"]
+    registry.activate("v0002")
+    assert registry.current() == "v0002"
+    with pytest.raises(ValueError):
+        registry.activate("v0009")
+
+
+def test_serves_the_current_version_after_warmup(registry):
+    model = HotSwapModel(registry, warmup_texts=["warm"], wrap=FakeWrap)
+    assert model.version == "v0001" and model_version(model) == "v0001"
+    assert [doc.text for doc in model.pipe(["a", "b"])] == ["a", "b"]
+    assert model("c").text == "c"
+    # Other attributes go to the active (wrapped) model
+    assert model.seen == ["warm", "a", "b", "c"]
+    assert model.check() is False
+    assert model.metrics() == {"version": "v0001", "loading": None, "swaps": 0, "in_flight": 0}
+
+
+def test_swap_waits_for_leases_on_the_old_version(registry, tmp_path):
+    log = []
+    model = HotSwapModel(registry, warmup_texts=[], wrap=FakeWrap, log=log.append)
+    with model.lease() as (version, old):
+        _register(registry, tmp_path, "second")
+        registry.activate("v0002")
+        assert model.check() is True
+        assert model.wait_idle(5)
+        # New work goes to the new version while the lease keeps the old one
+        assert model.version == "v0002" and model.name == "second"
+        assert version == "v0001" and old.name == "first"
+        assert old("still served").text == "still served"
+        assert model.metrics()["in_flight"] == 0
+        time.sleep(0.05)
+        assert "Released model v0001" not in log
+    assert _wait_for(lambda: "Released model v0001" in log)
+    assert model.swaps == 1
+
+
+def test_pipe_holds_its_lease_until_exhausted(registry, tmp_path):
+    log = []
+    model = HotSwapModel(registry, warmup_texts=[], wrap=FakeWrap, log=log.append)
+    docs = model.pipe(["a", "b"])
+    assert next(docs).text == "a"
+    _register(registry, tmp_path, "second")
+    registry.activate("v0002")
+    model.check()
+    assert model.wait_idle(5) and model.version == "v0002"
+    assert "Released model v0001" not in log
+    # The rest of the stream still runs on the version it started on
+    assert [doc.text for doc in docs] == ["b"]
+    assert _wait_for(lambda: "Released model v0001" in log)
+
+
+def test_failed_load_keeps_the_old_version(registry, tmp_path):
+    model = HotSwapModel(registry, warmup_texts=[], wrap=FakeWrap)
+    _register(registry, tmp_path, "broken")
+    registry.activate("v0002")
+    assert model.check() is True
+    assert model.wait_idle(5)
+    assert model.version == "v0001" and "broken model" in model.failed["v0002"]
+    # A failed version is not retried on every poll
+    assert model.check() is False
+
+
+def test_concurrent_leases_during_a_swap(registry, tmp_path):
+    model = HotSwapModel(registry, warmup_texts=[], wrap=FakeWrap)
+    stop = threading.Event()
+    seen = set()
+    errors = []
+
+    def work():
+        while not stop.is_set():
+            try:
+                with lease(model) as (version, nlp):
+                    assert nlp("x").text == "x"
+                    seen.add((version, nlp.name))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    _register(registry, tmp_path, "second")
+    registry.activate("v0002")
+    model.check()
+    assert model.wait_idle(5)
+    time.sleep(0.05)
+    stop.set()
+    for worker in workers:
+        worker.join(5)
+    assert not errors
+    # Every lease saw a consistent (version, model) pair
+    assert seen <= {("v0001", "first"), ("v0002", "second")}
+    assert ("v0002", "second") in seen
+
+
+def test_lease_of_a_plain_model():
+    nlp = object()
+    with lease(nlp) as (version, leased):
+        assert version is None and leased is nlp
+    assert model_version(nlp) is None
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from ner_training import (  # noqa: E402
+    build_examples, bucketed_batches, create_blank_nlp, labels_of, length_buckets, split_dev,
+)
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    return create_blank_nlp(["NAME", "PHONE"])
+
+
+@pytest.fixture(scope="module")
+def examples(nlp):
+    rng = random.Random(0)
+    records = [(" ".join(["word"] * rng.randint(1, 120)), {"entities": []}) for _ in range(300)]
+    return build_examples(nlp, records)
+
+
+def test_length_buckets_respect_the_ratio(examples):
+    buckets = length_buckets(examples, 1.25)
+    assert sum(map(len, buckets)) == len(examples)
+    for bucket in buckets:
+        lengths = [len(eg.reference) for eg in bucket]
+        assert max(lengths) <= 1.25 * min(lengths) + 1
+    # Buckets come shortest first
+    assert [len(b[0].reference) for b in buckets] == sorted(len(b[0].reference) for b in buckets)
+
+
+@pytest.mark.parametrize("batch_tokens", [50, 500, 2000])
+def test_bucketed_batches_stay_within_the_token_budget(examples, batch_tokens):
+    batches = list(bucketed_batches(examples, batch_tokens, rng=random.Random(1)))
+    assert sorted(id(eg) for b in batches for eg in b) == sorted(id(eg) for eg in examples)
+    for batch in batches:
+        padded = len(batch) * max(len(eg.reference) for eg in batch)
+        # Only a single document longer than the budget may exceed it
+        assert padded <= batch_tokens or len(batch) == 1
+
+
+def test_bucketed_batches_order_depends_on_the_rng(examples):
+    first = [[id(eg) for eg in b] for b in bucketed_batches(examples, 500, rng=random.Random(1))]
+    again = [[id(eg) for eg in b] for b in bucketed_batches(examples, 500, rng=random.Random(1))]
+    other = [[id(eg) for eg in b] for b in bucketed_batches(examples, 500, rng=random.Random(2))]
+    assert first == again != other
+
+
+def test_build_examples_skips_records_spacy_rejects(nlp):
+    # Overlapping entities cannot be turned into BILUO tags
+    records = [("Call Jane Doe", {"entities": [(5, 13, "NAME")]}),
+               ("Call Jane Doe", {"entities": [(5, 9, "NAME"), (5, 13, "NAME")]})]
+    logged = []
+    examples = build_examples(nlp, records, log=logged.append)
+    assert len(examples) == 1 and len(logged) == 1
+    assert [(e.text, e.label_) for e in examples[0].reference.ents] == [("Jane Doe", "NAME")]
+    assert labels_of(records) == ["NAME"]
+
+
+def test_split_dev_is_deterministic():
+    records = [(str(i), {"entities": []}) for i in range(100)]
+    train, dev = split_dev(records, 0.1, seed=3)
+    assert len(dev) == 10 and sorted(train + dev) == sorted(records)
+    assert split_dev(records, 0.1, seed=3) == (train, dev)
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from pii_index import PiiIndexReader, PiiIndexWriter, compact, load_salt, normalize
+
+SALT = b"0123456789abcdef0123"
+TEXTS = [
+    "Call Jane Doe at 555-010-9999.",
+    "SSN 123-45-6789 belongs to jane  doe",
+    "Nothing here",
+]
+SPANS = [
+    [(5, 13, "name"), (17, 29, "phone")],
+    [(4, 15, "ssn"), (27, 36, "name")],
+    [],
+]
+
+
+def _build(directory, flush_postings=1_000_000):
+    with PiiIndexWriter(str(directory), SALT, flush_postings=flush_postings) as writer:
+        writer.add("a.csv", [0, 1, 2], "text", TEXTS, SPANS)
+    return directory
+
+
+def test_normalize():
+    assert normalize("phone", "+1 (555) 010-9999") == "15550109999"
+    assert normalize("SSN", "123 45 6789") == normalize("ssn", "123-45-6789")
+    assert normalize("name", "  Jane\n DOE, ") == "jane doe"
+    assert normalize("url", "HTTPS://Example.com/") == "https://example.com"
+
+
+def test_write_and_lookup(tmp_path):
+    reader = PiiIndexReader(str(_build(tmp_path / "index")), SALT)
+    hits = reader.lookup("Jane Doe", "name")
+    assert [(h["source"], h["row"], h["column"], h["start"], h["end"]) for h in hits] == \
+        [("a.csv", 0, "text", 5, 13), ("a.csv", 1, "text", 27, 36)]
+    # Formatting variants find the same postings; no label searches every label
+    assert [h["row"] for h in reader.lookup("555 010 9999", "phone")] == [0]
+    assert [h["label"] for h in reader.lookup("123456789")] == ["ssn"]
+    assert reader.lookup("John Smith") == []
+    stats = reader.stats()
+    # The row without entities gets no document
+    assert stats["documents"] == 2 and stats["postings"] == 4
+    assert stats["labels"] == ["name", "phone", "ssn"]
+
+
+def test_index_stores_no_values(tmp_path):
+    directory = _build(tmp_path / "index")
+    for path in directory.iterdir():
+        data = path.read_bytes()
+        assert b"Jane" not in data and b"6789" not in data
+
+
+def test_wrong_salt_is_rejected(tmp_path):
+    directory = _build(tmp_path / "index")
+    other = b"fedcba9876543210fedc"
+    with pytest.raises(ValueError):
+        PiiIndexReader(str(directory), other)
+    with pytest.raises(ValueError):
+        PiiIndexWriter(str(directory), other)
+    with pytest.raises(FileNotFoundError):
+        PiiIndexReader(str(tmp_path / "missing"), SALT)
+
+
+def test_flush_between_columns_keeps_one_doc_per_row(tmp_path):
+    directory = tmp_path / "index"
+    with PiiIndexWriter(str(directory), SALT, flush_postings=1) as writer:
+        writer.add("a.csv", [0, 1], "text", TEXTS[:2], SPANS[:2])
+        writer.add("a.csv", [0, 1], "notes", ["Jane Doe", "Jane Doe"], [[(0, 8, "name")], [(0, 8, "name")]])
+        writer.add("b.csv", [0], "text", TEXTS[:1], SPANS[:1])
+    manifest = json.loads((directory / "index.json").read_text())
+    assert manifest["docs"] == 3
+    assert len(manifest["segments"]) == 3
+    hits = PiiIndexReader(str(directory), SALT).lookup("jane doe", "name")
+    assert sorted((h["source"], h["row"], h["column"]) for h in hits) == [
+        ("a.csv", 0, "notes"), ("a.csv", 0, "text"), ("a.csv", 1, "notes"), ("a.csv", 1, "text"), ("b.csv", 0, "text"),
+    ]
+
+
+def test_reopen_appends_and_compact_merges_segments(tmp_path):
+    directory = _build(tmp_path / "index", flush_postings=1)
+    with PiiIndexWriter(str(directory), SALT) as writer:
+        writer.add("b.csv", [7], "text", TEXTS[:1], SPANS[:1])
+    before = PiiIndexReader(str(directory), SALT).lookup("Jane Doe", "name")
+    assert [(h["source"], h["row"]) for h in before] == [("a.csv", 0), ("a.csv", 1), ("b.csv", 7)]
+
+    manifest = compact(str(directory), SALT)
+    assert len(manifest["segments"]) == 1
+    assert len(list(directory.glob("seg-*.keys.npy"))) == 1
+    reader = PiiIndexReader(str(directory), SALT)
+    assert sorted(map(str, reader.lookup("Jane Doe", "name"))) == sorted(map(str, before))
+    assert reader.stats()["postings"] == 6
+
+
+def test_flush_after_compact_keeps_the_compacted_segment(tmp_path):
+    directory = _build(tmp_path / "index")
+    with PiiIndexWriter(str(directory), SALT) as writer:
+        writer.add("b.csv", [7], "text", TEXTS[:1], SPANS[:1])
+    compact(str(directory), SALT)
+    # Two more segments after the compacted one
+    with PiiIndexWriter(str(directory), SALT, flush_postings=1) as writer:
+        writer.add("c.csv", [0], "text", ["Call Jane Doe"], [[(5, 13, "name")]])
+        writer.add("c.csv", [1], "text", ["Jane Doe"], [[(0, 8, "name")]])
+    manifest = json.loads((directory / "index.json").read_text())
+    names = [s["name"] for s in manifest["segments"]]
+    assert len(names) == len(set(names)) == 3
+    reader = PiiIndexReader(str(directory), SALT)
+    assert [(h["source"], h["row"]) for h in reader.lookup("Jane Doe", "name")] == \
+        [("a.csv", 0), ("a.csv", 1), ("b.csv", 7), ("c.csv", 0), ("c.csv", 1)]
+    assert [h["row"] for h in reader.lookup("123-45-6789", "ssn")] == [1]
+
+
+def test_reader_searches_every_index_under_root(tmp_path):
+    _build(tmp_path / "run" / "shard-00000")
+    with PiiIndexWriter(str(tmp_path / "run" / "shard-00001"), SALT) as writer:
+        writer.add("b.csv", [3], "text", TEXTS[:1], SPANS[:1])
+    reader = PiiIndexReader(str(tmp_path / "run"), SALT)
+    assert reader.stats()["indexes"] == 2
+    assert [h["source"] for h in reader.lookup("555-010-9999", "phone")] == ["a.csv", "b.csv"]
+
+
+def test_load_salt(tmp_path, monkeypatch):
+    monkeypatch.setenv("PII_INDEX_SALT", "short")
+    with pytest.raises(ValueError):
+        load_salt()
+    path = tmp_path / "salt"
+    path.write_bytes(SALT + b"\n")
+    assert load_salt(str(path)) == SALT
@@ -0,0 +1,18 @@
+from pii_pipeline import anonymize, output_columns
+
+
+def test_output_columns_union_of_all_sources(tmp_path):
+    first = tmp_path / "a.csv"
+    first.write_text("id,text\n1,x\n", encoding="utf-8")
+    second = tmp_path / "b.csv"
+    second.write_text("text,email\nx,y\n", encoding="utf-8")
+    assert output_columns([str(first), str(second)]) == ["id", "text", "email", "predictions", "anonymized_text"]
+    # Profiled runs anonymize in place and only add 'predictions'
+    assert output_columns([str(second)], text_col=None) == ["text", "email", "predictions"]
+
+
+def test_anonymize_placeholders_and_replace():
+    text = "Call Jane Doe at 555-0100"
+    ents = [{"start": 5, "end": 13, "label": "NAME"}, {"start": 17, "end": 25, "label": "phone"}]
+    assert anonymize(text, ents) == "Call [NAME REDACTED] at [PHONE REDACTED]"
+    assert anonymize(text, ents, replace=lambda value, label: label.upper()) == "Call NAME at PHONE"
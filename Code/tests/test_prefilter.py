@@ -0,0 +1,30 @@
+import pytest
+
+from prefilter import _line_records, build_prefilter, candidate_mask, might_contain_pii
+
+
+@pytest.mark.parametrize("text", ["call Jane", "ssn 123-45-6789 ok", "card 4111", "mail a@b", "see www.x.io",
+                                  "https://x.io"])
+def test_rows_with_a_cue_are_kept(text):
+    assert might_contain_pii(text, build_prefilter())
+
+
+@pytest.mark.parametrize("text", ["nothing to see here", "order 123 of 999", ""])
+def test_rows_without_cues_are_skipped(text):
+    assert not might_contain_pii(text, build_prefilter())
+
+
+def test_config_disables_cues():
+    prefilter = build_prefilter({"capitalized": False, "min_digit_run": 0})
+    assert candidate_mask(["Jane Doe", "4111 1111", "a@b"], prefilter) == [False, False, True]
+    assert might_contain_pii("12 34", build_prefilter({"min_digit_run": 2}))
+    with pytest.raises(ValueError):
+        build_prefilter({"capitalized": False, "min_digit_run": 0, "at_sign": False, "url": False})
+
+
+def test_line_records_keep_spans_inside_each_line():
+    text = "Jane Doe\ncall 555-0100\nspans\nlines"
+    entities = [(0, 8, "name"), (14, 22, "phone"), (26, 34, "address")]
+    assert _line_records(text, entities) == [
+        ("Jane Doe", [(0, 8, "name")]), ("call 555-0100", [(5, 13, "phone")]), ("spans", []), ("lines", []),
+    ]
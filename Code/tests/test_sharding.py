@@ -0,0 +1,117 @@
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+import sharding
+from sharding import CsvByteRange, assigned_shards, csv_row_boundaries, plan_shards, shard_columns
+
+ROWS = [
+    ["id", "text"],
+    *[[str(i), f"row {i}\nsecond line, with a comma" if i % 3 == 0 else f'plain "quoted" row {i}'] for i in range(40)],
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f, lineterminator="\n").writerows(ROWS)
+    return path
+
+
+def _row_starts(data: bytes):
+    """Offsets just after every record-ending newline, parsed the slow way."""
+    starts, in_quotes = [], False
+    for i, byte in enumerate(data):
+        if byte == ord('"'):
+            in_quotes = not in_quotes
+        elif byte == ord("\n") and not in_quotes:
+            starts.append(i + 1)
+    return starts
+
+
+@pytest.mark.parametrize("block_bytes", [7, 64, 1 << 20])
+@pytest.mark.parametrize("step", [1, 50, 300])
+def test_cuts_fall_on_record_boundaries(csv_path, monkeypatch, block_bytes, step):
+    # Small scan blocks put quotes and newlines on both sides of block edges
+    monkeypatch.setattr(sharding, "SCAN_BLOCK_BYTES", block_bytes)
+    data = csv_path.read_bytes()
+    header_end, cuts, size = csv_row_boundaries(str(csv_path), step)
+    record_ends = _row_starts(data)
+    assert size == len(data)
+    assert header_end == record_ends[0]
+    assert cuts == sorted(set(cuts))
+    assert set(cuts) <= set(record_ends[1:])
+    assert all(header_end < c < size for c in cuts)
+    if step == 1:
+        # Every record starts a new range
+        assert cuts == record_ends[1:-1]
+
+
+def test_header_only_and_no_trailing_newline(tmp_path):
+    header_only = tmp_path / "header.csv"
+    header_only.write_bytes(b"id,text")
+    assert csv_row_boundaries(str(header_only), 1) == (7, [], 7)
+    no_newline = tmp_path / "last.csv"
+    no_newline.write_bytes(b'id,text\n1,"a\nb"\n2,c')
+    assert csv_row_boundaries(str(no_newline), 1) == (8, [16], 19)
+
+
+def test_byte_ranges_reproduce_every_row_once(csv_path):
+    header_end, cuts, size = csv_row_boundaries(str(csv_path), 120)
+    bounds = [header_end] + cuts + [size]
+    frames = []
+    for start, end in zip(bounds, bounds[1:]):
+        with CsvByteRange(str(csv_path), header_end, start, end) as part:
+            frames.append(pd.read_csv(part, dtype=str, keep_default_na=False))
+    assert len(frames) > 2
+    combined = pd.concat(frames, ignore_index=True)
+    assert combined.values.tolist() == ROWS[1:]
+
+
+def test_byte_range_seek_and_read(csv_path):
+    header_end, cuts, _ = csv_row_boundaries(str(csv_path), 120)
+    data = csv_path.read_bytes()
+    with CsvByteRange(str(csv_path), header_end, cuts[0], cuts[1]) as part:
+        expected = data[:header_end] + data[cuts[0]:cuts[1]]
+        assert part.read() == expected
+        assert part.seek(0, io.SEEK_END) == len(expected)
+        # Reads across the end of the header continue in the range
+        part.seek(header_end - 2)
+        assert part.read() == expected[header_end - 2:]
+
+
+def test_plan_shards_is_deterministic_and_covers_the_file(csv_path, tmp_path):
+    other = tmp_path / "other.csv"
+    other.write_text("id,text\n1,hello\n", encoding="utf-8")
+    manifest = plan_shards([str(tmp_path)], 4)
+    assert manifest == plan_shards([str(tmp_path)], 4)
+    parts = [p for shard in manifest["shards"] for p in shard["parts"]]
+    for path in (csv_path, other):
+        ranges = [(p["start"], p["end"]) for p in parts if p["path"] == str(path.resolve())]
+        header_end, _, size = csv_row_boundaries(str(path), path.stat().st_size)
+        assert ranges[0][0] == header_end and ranges[-1][1] == size
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    files = plan_shards([str(tmp_path)], 4, split="files")
+    assert sorted(p["start"] for s in files["shards"] for p in s["parts"]) == [0, 0]
+    with pytest.raises(ValueError):
+        plan_shards([str(tmp_path)], 2, split="rows")
+
+
+def test_shard_columns_union_keeps_first_seen_order(tmp_path):
+    first = tmp_path / "a.csv"
+    first.write_text("id,text,email\n1,x,y\n", encoding="utf-8")
+    second = tmp_path / "b.csv"
+    second.write_text("text,phone\nx,1\n", encoding="utf-8")
+    parts = [{"path": str(first), "kind": "csv"}, {"path": str(second), "kind": "csv"}]
+    columns = shard_columns(parts, "text")
+    assert columns[0] == "source"
+    assert columns.index("id") < columns.index("text") < columns.index("email") < columns.index("phone")
+    assert "anonymized_text" in columns
+
+
+def test_assigned_shards_round_robin():
+    assert assigned_shards(7, 1, 3) == [1, 4]
+    assert sorted(s for w in range(3) for s in assigned_shards(7, w, 3)) == list(range(7))
@@ -0,0 +1,59 @@
+import pytest
+
+from span_resolver import resolve_annotations, resolve_entities, resolve_spans
+
+
+def test_longest_wins_and_output_is_sorted():
+    spans = [(10, 14, "name"), (0, 5, "name"), (8, 20, "address")]
+    assert resolve_spans(spans) == [(0, 5, "name"), (8, 20, "address")]
+
+
+def test_longest_tie_goes_to_earliest_start():
+    assert resolve_spans([(2, 6, "phone"), (0, 4, "ssn")]) == [(0, 4, "ssn")]
+
+
+def test_touching_spans_do_not_overlap():
+    spans = [(0, 4, "name"), (4, 8, "name")]
+    assert resolve_spans(spans) == spans
+
+
+def test_empty_inverted_and_duplicate_spans():
+    spans = [(3, 3, "name"), (5, 2, "name"), (0, 4, "email"), (0, 4, "email")]
+    assert resolve_spans(spans) == [(0, 4, "email")]
+    assert resolve_spans([]) == []
+
+
+def test_priority_policy_prefers_label_order():
+    spans = [(0, 20, "address"), (5, 16, "ssn")]
+    assert resolve_spans(spans, policy="priority") == [(5, 16, "ssn")]
+    assert resolve_spans(spans, policy="longest") == [(0, 20, "address")]
+
+
+def test_rule_over_model_policy():
+    spans = [(0, 20, "name", "model"), (2, 8, "phone", "rule")]
+    assert resolve_spans(spans, policy="rule_over_model") == [(2, 8, "phone", "rule")]
+    # Without a source a span counts as a model span
+    assert resolve_spans([(0, 20, "name"), (2, 8, "phone", "rule")], policy="rule_over_model") == \
+        [(2, 8, "phone", "rule")]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        resolve_spans([(0, 1, "name")], policy="shortest")
+
+
+def test_resolve_entities_keeps_the_original_dicts():
+    ents = [{"start": 0, "end": 4, "label": "name", "text": "Anna"},
+            {"start": 0, "end": 10, "label": "name", "text": "Anna Smith"}]
+    assert resolve_entities(ents) == [ents[1]]
+
+
+def test_resolve_annotations_strips_sources():
+    assert resolve_annotations([(0, 3, "ssn", "rule"), (1, 2, "name")]) == [(0, 3, "ssn")]
+
+
+def test_cost_does_not_depend_on_offsets():
+    # Offsets far into a huge document (e.g. an mmap window) need no per-character memory
+    base = 10 ** 12
+    spans = [(base + 10, base + 20, "name"), (base, base + 15, "address"), (base + 15, base + 18, "phone")]
+    assert resolve_spans(spans) == [(base, base + 15, "address"), (base + 15, base + 18, "phone")]
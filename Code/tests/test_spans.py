@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from spans import DEFAULT_LABELS, DocSpans, SpanBatch, span_tuples
+
+ENTITY_LISTS = [
+    [{"start": 0, "end": 4, "label": "NAME"}, {"start": 10, "end": 21, "label": "ssn"}],
+    [],
+    [(3, 8, "email"), (9, 12, "custom_id")],
+]
+
+
+@pytest.fixture
+def batch():
+    return SpanBatch.from_entity_lists(ENTITY_LISTS)
+
+
+def test_from_entity_lists(batch):
+    assert len(batch) == 3
+    assert batch.n_spans == 4
+    assert batch.doc_offsets.tolist() == [0, 2, 2, 4]
+    assert batch[0].tuples() == [(0, 4, "name"), (10, 21, "ssn")]
+    assert len(batch[1]) == 0
+    # Unknown labels are appended after the default table
+    assert batch.label_names[:len(DEFAULT_LABELS)] == DEFAULT_LABELS
+    assert batch[2].tuples() == [(3, 8, "email"), (9, 12, "custom_id")]
+
+
+def test_from_docs():
+    class Ent:
+        def __init__(self, start_char, end_char, label_):
+            self.start_char, self.end_char, self.label_ = start_char, end_char, label_
+
+    class Doc:
+        def __init__(self, *ents):
+            self.ents = ents
+
+    batch = SpanBatch.from_docs([Doc(Ent(0, 3, "NAME")), None, Doc(Ent(1, 2, "Other"), Ent(5, 9, "phone"))])
+    assert [doc.tuples() for doc in batch] == [[(0, 3, "name")], [], [(1, 2, "other"), (5, 9, "phone")]]
+
+
+def test_iteration_and_doc_spans_helpers(batch):
+    text = "Anna lives at 123-45-6789"
+    doc = batch[0]
+    assert doc.to_list() == [[0, 4, "name"], [10, 21, "ssn"]]
+    assert doc.to_dicts(text)[0] == {"start": 0, "end": 4, "label": "name", "text": "Anna"}
+    assert doc.filter_labels(["SSN"]).tuples() == [(10, 21, "ssn")]
+    assert doc.filter_labels(None) is doc
+    assert doc.shift(5).tuples() == [(5, 9, "name"), (15, 26, "ssn")]
+    assert doc[1:].tuples() == [(10, 21, "ssn")]
+    with pytest.raises(TypeError):
+        doc[0]
+    assert [len(d) for d in batch] == [2, 0, 2]
+
+
+def test_resolve_drops_overlaps():
+    doc = SpanBatch.from_entity_lists([[(0, 10, "address"), (2, 5, "name"), (12, 14, "name")]])[0]
+    assert doc.resolve().tuples() == [(0, 10, "address"), (12, 14, "name")]
+
+
+def test_span_tuples_accepts_both_forms(batch):
+    assert span_tuples(batch[0]) == span_tuples(ENTITY_LISTS[0]) == [(0, 4, "name"), (10, 21, "ssn")]
+
+
+def test_concat_remaps_labels(batch):
+    other = SpanBatch.from_entity_lists([[(1, 2, "zip_code")], [(0, 3, "custom_id")]])
+    merged = SpanBatch.concat([batch, other])
+    assert len(merged) == 5
+    assert merged.doc_offsets.tolist() == [0, 2, 2, 4, 5, 6]
+    assert [d.tuples() for d in merged] == [d.tuples() for d in batch] + [d.tuples() for d in other]
+    empty = SpanBatch.concat([])
+    assert len(empty) == 0 and empty.n_spans == 0
+
+
+def test_too_many_labels():
+    with pytest.raises(ValueError):
+        SpanBatch([], [], [], [0], [f"label_{i}" for i in range(300)])
+
+
+def _assert_same(a, b):
+    assert len(a) == len(b)
+    assert [d.tuples() for d in a] == [d.tuples() for d in b]
+
+
+def test_json_rows_and_jsonl_round_trip(batch, tmp_path):
+    assert batch.to_json_rows()[:2] == ['[[0,4,"name"],[10,21,"ssn"]]', "[]"]
+    path = tmp_path / "spans.jsonl"
+    batch.write_jsonl(str(path))
+    _assert_same(SpanBatch.read_jsonl(str(path)), batch)
+
+
+def test_npz_round_trip(batch, tmp_path):
+    path = tmp_path / "spans.npz"
+    batch.write_npz(str(path))
+    loaded = SpanBatch.read_npz(str(path))
+    _assert_same(loaded, batch)
+    assert loaded.label_names == batch.label_names
+
+
+def test_arrow_round_trip_keeps_trailing_empty_docs(tmp_path):
+    pytest.importorskip("pyarrow")
+    batch = SpanBatch.from_entity_lists([[], [(0, 4, "name")], [], []])
+    path = tmp_path / "spans.arrow"
+    batch.write_arrow(str(path))
+    loaded = SpanBatch.read_arrow(str(path))
+    _assert_same(loaded, batch)
+    assert np.array_equal(loaded.doc_offsets, batch.doc_offsets)
+
+
+def test_doc_spans_direct():
+    doc = DocSpans(np.array([0]), np.array([2]), np.array([0], dtype=np.uint8), ("name",))
+    assert doc.to_dicts() == [{"start": 0, "end": 2, "label": "name"}]
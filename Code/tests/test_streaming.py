@@ -0,0 +1,124 @@
+import io
+import json
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from streaming import EOF, FULL, TIMEOUT, InFlightBuffer, field_slots, parse_record, stream
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "NAME", "pattern": "Jane Doe"}])
+    return nlp
+
+
+def test_buffer_put_blocks_until_release():
+    buffer = InFlightBuffer(10)
+    buffer.put("a", 6)
+    done = threading.Event()
+    putter = threading.Thread(target=lambda: (buffer.put("b", 6), done.set()))
+    putter.start()
+    assert buffer.get(1) == "a"
+    # The item was taken but not released, so the reader is still waiting for space
+    assert buffer.get(1) is FULL
+    assert not done.is_set()
+    buffer.release(6)
+    assert done.wait(1)
+    putter.join()
+    assert buffer.get(1) == "b"
+    assert buffer.peak == 6
+
+
+def test_buffer_lets_an_oversized_item_through_when_empty():
+    buffer = InFlightBuffer(10)
+    buffer.put("big", 50)
+    assert buffer.get(0) == "big" and buffer.peak == 50
+
+
+def test_buffer_timeout_eof_and_error():
+    buffer = InFlightBuffer(10)
+    start = time.monotonic()
+    assert buffer.get(0.05) is TIMEOUT
+    assert time.monotonic() - start >= 0.04
+    buffer.close()
+    assert buffer.get(0) is EOF
+    failing = InFlightBuffer(10)
+    failing.close(OSError("pipe closed"))
+    with pytest.raises(OSError):
+        failing.get(0)
+
+
+def test_field_slots_skips_missing_and_non_string_fields():
+    obj = {"message": "hi", "user": {"name": "Jane", "id": 7}, "list": ["x"]}
+    slots = field_slots(obj, [["message"], ["user", "name"], ["user", "id"], ["missing", "x"], ["list", "0"]])
+    assert [container[key] for container, key in slots] == ["hi", "Jane"]
+
+
+def test_parse_record_and_render():
+    stats = Counter()
+    record = parse_record(b'{"message": "Jane Doe", "n": 1}\n', "jsonl", [["message"], ["n"]], stats)
+    assert record.texts == ["Jane Doe"]
+    assert record.render([None]) == b'{"message": "Jane Doe", "n": 1}\n'
+    assert json.loads(record.render(["[NAME REDACTED]"])) == {"message": "[NAME REDACTED]", "n": 1}
+
+    plain = parse_record(b"not json\r\n", "jsonl", [["message"]], stats)
+    assert stats["invalid"] == 1
+    assert plain.obj is None and plain.texts == ["not json"]
+    assert plain.render(["x"]) == b"x\r\n"
+    assert parse_record(b"\n", "lines", [], stats).texts == []
+
+
+def test_stream_keeps_order_and_untouched_lines(nlp):
+    lines = [f"line {i} from Jane Doe\n".encode() if i % 2 else f"line {i}\n".encode() for i in range(20)]
+    output = io.BytesIO()
+    stats = stream(nlp, iter(lines), output, batch_records=3)
+    out = output.getvalue().splitlines(keepends=True)
+    assert len(out) == 20
+    for i, (before, after) in enumerate(zip(lines, out)):
+        assert after == (before.replace(b"Jane Doe", b"[NAME REDACTED]") if i % 2 else before)
+    assert stats["records"] == 20 and stats["flush_size"] == 6 and stats["flush_eof"] == 1
+
+
+def test_stream_jsonl_fields(nlp):
+    lines = [b'{"message": "from Jane Doe", "user": {"name": "Jane Doe"}, "other": "Jane Doe"}\n', b"garbage\n"]
+    output = io.BytesIO()
+    stats = stream(nlp, iter(lines), output, fmt="jsonl", fields=("message", "user.name"))
+    first, second = output.getvalue().splitlines()
+    assert json.loads(first) == {"message": "from [NAME REDACTED]", "user": {"name": "[NAME REDACTED]"},
+                                 "other": "Jane Doe"}
+    assert second == b"garbage"
+    assert stats["invalid"] == 1
+
+
+def test_stream_flushes_a_partial_batch_after_flush_ms(nlp):
+    release = threading.Event()
+
+    def lines():
+        yield b"Jane Doe\n"
+        release.wait(5)
+
+    output = io.BytesIO()
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(stream(nlp, lines(), output, flush_ms=20)))
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not output.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Written while the input is still open
+    assert output.getvalue() == b"[NAME REDACTED]\n"
+    release.set()
+    worker.join(5)
+    assert result["flush_timeout"] == 1
+
+
+def test_stream_bounds_memory_in_flight(nlp):
+    lines = [(b"x" * 1000) + b"\n" for _ in range(200)]
+    stats = stream(nlp, iter(lines), io.BytesIO(), batch_records=1000, flush_ms=10_000, max_in_flight_mb=0.01)
+    assert stats["records"] == 200
+    assert stats["flush_full"] > 0
+    assert stats["peak_in_flight_mb"] <= 0.01
@@ -0,0 +1,122 @@
+import re
+
+import pytest
+
+from surrogates import KEY_ENV_VAR, SurrogateGenerator, load_key, luhn_check_digit
+
+KEY = b"0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+def gen():
+    return SurrogateGenerator(KEY)
+
+
+def _shape(value: str) -> str:
+    return re.sub(r"[a-z]", "a", re.sub(r"[A-Z]", "A", re.sub(r"\d", "9", value)))
+
+
+def _luhn_valid(digits: str) -> bool:
+    return luhn_check_digit(digits[:-1]) == digits[-1]
+
+
+def test_same_key_same_surrogate_across_instances():
+    values = [("Caroline Wood", "name"), ("555-010-9999", "phone"), ("c.wood@example.com", "email")]
+    first, second = SurrogateGenerator(KEY), SurrogateGenerator(KEY, cache_size=0)
+    assert [first(v, label) for v, label in values] == [second(v, label) for v, label in values]
+
+
+def test_different_key_different_surrogate(gen):
+    other = SurrogateGenerator(b"fedcba9876543210fedcba9876543210")
+    assert gen("Caroline Wood", "name") != other("Caroline Wood", "name")
+
+
+@pytest.mark.parametrize("value, label", [
+    ("Caroline Wood", "name"),
+    ("42 Baker Street, Springfield IL", "address"),
+    ("(555) 010-9999", "phone"),
+    ("Acme Holdings Ltd", "company"),
+])
+def test_format_is_preserved(gen, value, label):
+    surrogate = gen(value, label)
+    assert surrogate != value
+    assert _shape(surrogate) == _shape(value)
+
+
+def test_words_keyed_on_casefolded_word(gen):
+    assert gen("Parker", "name") == gen("Parker", "company")
+    assert gen("PARKER", "name") == gen("Parker", "name").upper()
+    assert gen("parker@mail.com", "email").split("@")[0] == gen("parker", "name")
+
+
+def test_keep_words_and_state_codes(gen):
+    assert gen("Acme Inc", "company").endswith(" Inc")
+    assert gen("12 Elm Street", "address").endswith(" Street")
+    assert gen("Springfield IL", "address").endswith(" IL")
+
+
+def test_phone_keeps_country_code_and_is_keyed_on_digits(gen):
+    dashed, spaced = gen("+1 555-010-9999", "phone"), gen("+1 (555) 010 9999", "phone")
+    assert dashed.startswith("+1 ") and spaced.startswith("+1 (")
+    assert re.sub(r"\D", "", dashed) == re.sub(r"\D", "", spaced)
+
+
+@pytest.mark.parametrize("value", ["123-45-6789", "900-12-3456", "666-00-0000", "000000000"])
+def test_ssn_surrogates_are_valid(gen, value):
+    digits = re.sub(r"\D", "", gen(value, "ssn"))
+    area, group, serial = digits[:3], digits[3:5], digits[5:]
+    assert len(digits) == 9
+    assert area not in ("000", "666") and area[0] != "9"
+    assert group != "00" and serial != "0000"
+
+
+@pytest.mark.parametrize("value", ["4111 1111 1111 1111", "5500-0000-0000-0004", "378282246310005"])
+def test_card_surrogates_keep_brand_and_pass_luhn(gen, value):
+    surrogate = gen(value, "credit_card")
+    digits = re.sub(r"\D", "", surrogate)
+    assert _shape(surrogate) == _shape(value)
+    assert digits[0] == value[0]
+    assert _luhn_valid(digits)
+
+
+def test_card_block_replaces_only_the_number_and_holder(gen):
+    surrogate = gen("Visa 4111 1111 1111 1111 exp 12/27", "credit_card")
+    assert surrogate.startswith("Visa ")
+    assert " exp " in surrogate
+    assert _luhn_valid(re.sub(r"\D", "", surrogate.split(" exp ")[0]))
+
+
+def test_email_and_url_keep_structure(gen):
+    local, host = gen("jane.doe@example.co.uk", "email").split("@")
+    assert len(local) == 8 and local[4] == "."
+    assert host.endswith(".uk") and host.count(".") == 2
+    url = gen("https://www.example.com/u/jane", "url")
+    assert url.startswith("https://www.") and _shape(url) == _shape("https://www.example.com/u/jane")
+    assert ".com/" in url
+
+
+def test_luhn_check_digit():
+    assert luhn_check_digit("411111111111111") == "1"
+    assert luhn_check_digit("7992739871") == "3"
+
+
+def test_short_key_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        SurrogateGenerator(b"short")
+    monkeypatch.setenv(KEY_ENV_VAR, "short")
+    with pytest.raises(ValueError):
+        load_key()
+    monkeypatch.setenv(KEY_ENV_VAR, KEY.decode())
+    assert load_key() == KEY
+
+
+@pytest.mark.parametrize("value", ["Visa 4111 1111 1111 1111 exp 12/27", "4111111111111111 05/2029",
+                                   "5500-0000-0000-0004 valid thru 1/26"])
+def test_card_expiry_stays_a_valid_date(value):
+    for i in range(50):
+        surrogate = SurrogateGenerator(f"{i:032d}".encode())(value, "credit_card")
+        assert _shape(surrogate) == _shape(value)
+        month, year = re.search(r"(\d{1,2})[/-](\d+)$", surrogate).groups()
+        assert 1 <= int(month) <= 12
+        if len(year) == 4:
+            assert year.startswith("20")
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from spans import SpanBatch
+from worker_pool import WorkerPool, pipe_bytes, read_spans, read_texts, split_tasks, write_spans, write_texts
+
+TEXTS = ["Call Jane Doe", "", "Zoë Müller → 東京", "x" * 1000]
+ENTITY_LISTS = [[(5, 13, "name")], [], [(0, 10, "name"), (13, 15, "address")], [(0, 4, "custom_id")]]
+
+
+@pytest.fixture
+def blocks():
+    created = []
+    yield created
+    for block in created:
+        block.close()
+        block.unlink()
+
+
+@pytest.mark.parametrize("texts", [TEXTS, [""], []])
+def test_texts_round_trip(blocks, texts):
+    block = write_texts(texts)
+    blocks.append(block)
+    assert read_texts(block, len(texts)) == texts
+
+
+def test_text_block_is_offsets_then_utf8(blocks):
+    block = write_texts(["ab", "é"])
+    blocks.append(block)
+    assert np.frombuffer(block.buf, dtype=np.int64, count=3).tolist() == [0, 2, 4]
+    assert bytes(block.buf[24:28]) == "abé".encode("utf-8")
+
+
+def test_spans_round_trip(blocks):
+    batch = SpanBatch.from_entity_lists(ENTITY_LISTS)
+    block, layout = write_spans(batch)
+    blocks.append(block)
+    assert layout == {"docs": 4, "spans": 4, "label_names": list(batch.label_names)}
+    loaded = read_spans(block, layout)
+    assert [doc.tuples() for doc in loaded] == [doc.tuples() for doc in batch]
+    assert loaded.label_names == batch.label_names
+    # The result is a copy, not a view that dies with the block
+    assert all(a.flags.owndata for a in (loaded.starts, loaded.ends, loaded.labels, loaded.doc_offsets))
+
+
+def test_empty_spans_round_trip(blocks):
+    batch = SpanBatch.from_entity_lists([[], []])
+    block, layout = write_spans(batch)
+    blocks.append(block)
+    loaded = read_spans(block, layout)
+    assert len(loaded) == 2 and loaded.n_spans == 0
+
+
+def test_split_tasks():
+    assert split_tasks(["aaa", "bb", "cccc", "d"], 5) == [(0, 2), (2, 4)]
+    # A text longer than task_chars gets a task of its own
+    assert split_tasks(["a" * 10, "b"], 5) == [(0, 1), (1, 2)]
+    assert split_tasks([], 5) == []
+
+
+def test_shm_pipes_less_than_pickle():
+    texts = [f"Jane Doe lives at {i} Main Street " * 20 for i in range(50)]
+    batch = SpanBatch.from_entity_lists([[(0, 8, "name"), (18, 32, "address")]] * 50)
+    shm = pipe_bytes("shm", texts, batch, task_chars=5000)
+    pickled = pipe_bytes("pickle", texts, batch, task_chars=5000)
+    assert 0 < shm < pickled
+    # Block names and layouts only: the pipe cost does not grow with the text
+    longer = [text * 10 for text in texts]
+    assert pipe_bytes("shm", longer, batch, task_chars=50_000) == shm
+
+
+def test_unknown_transport():
+    with pytest.raises(ValueError):
+        WorkerPool("PII Model", transport="queue")
@@ -0,0 +1,291 @@
+"""
+Process pool for model inference with a shared-memory transport.
+
+``WorkerPool`` keeps ``workers`` processes, each with the model loaded once (native
+thread pools capped at ``threads_per_worker``). ``predict_spans(texts)`` splits the texts
+into tasks of about ``task_chars`` characters, runs them in parallel and returns one
+``SpanBatch`` in input order. Two transports:
+  - ``pickle``: the texts go to the worker and ``predict_many``'s entity dicts come back
+    through the pool's pipes, pickled both ways (the straightforward way to fan out),
+  - ``shm``: each task's texts are written once into a ``multiprocessing.shared_memory``
+    block in Arrow's string layout (int64 offsets followed by the UTF-8 bytes). The worker
+    decodes its texts straight from that buffer and writes the spans back as the flat
+    ``SpanBatch`` arrays (doc offsets, starts, ends, label codes) into a second block.
+    Only block names and sizes go through the pipe.
+
+Compare both transports (throughput, bytes through the pipe, identical output) with:
+    python worker_pool.py --data Testing_Set.csv --model "PII Model" --workers 2 --repeat 20
+Add ``--tokenizer-only`` to see the transport cost without most of the inference cost.
+"""
+
+import argparse
+import multiprocessing
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from spans import SpanBatch
+
+TRANSPORTS = ("shm", "pickle")
+DEFAULT_TASK_CHARS = 200_000
+DEFAULT_BATCH_SIZE = 64
+SHM_NAME = "psm_00000000"
+
+# Set in each worker process by _init_worker
+_nlp = None
+_batch_size = DEFAULT_BATCH_SIZE
+
+
+# -----------------------------
+# Shared-memory layout
+# -----------------------------
+def write_texts(texts: Sequence[str]) -> shared_memory.SharedMemory:
+    """A new block holding ``len(texts) + 1`` int64 byte offsets followed by the UTF-8 data."""
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    header = offsets.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(1, header + int(offsets[-1])))
+    block.buf[:header] = offsets.tobytes()
+    block.buf[header:header + int(offsets[-1])] = b"".join(encoded)
+    return block
+
+
+def read_texts(block: shared_memory.SharedMemory, n_texts: int) -> List[str]:
+    """Decode the texts of a ``write_texts`` block straight from the shared buffer."""
+    header = 8 * (n_texts + 1)
+    offsets = np.frombuffer(block.buf, dtype=np.int64, count=n_texts + 1).tolist()
+    data = block.buf[header:]
+    try:
+        return [str(data[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+    finally:
+        # Views must be released before the block can be closed
+        data.release()
+
+
+def write_spans(batch: SpanBatch) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """A new block with the batch's arrays back to back; the dict describes the layout."""
+    arrays = (batch.doc_offsets.astype(np.int64), batch.starts.astype(np.int32), batch.ends.astype(np.int32),
+              batch.labels.astype(np.uint8))
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(a.nbytes for a in arrays)))
+    position = 0
+    for array in arrays:
+        block.buf[position:position + array.nbytes] = array.tobytes()
+        position += array.nbytes
+    return block, {"docs": len(batch), "spans": batch.n_spans, "label_names": list(batch.label_names)}
+
+
+def read_spans(block: shared_memory.SharedMemory, layout: Dict) -> SpanBatch:
+    """Copy a ``write_spans`` block into a ``SpanBatch`` (9 bytes per span plus 8 per document)."""
+    n_docs, n_spans = layout["docs"], layout["spans"]
+    arrays, position = [], 0
+    for dtype, count in ((np.int64, n_docs + 1), (np.int32, n_spans), (np.int32, n_spans), (np.uint8, n_spans)):
+        array = np.frombuffer(block.buf, dtype=dtype, count=count, offset=position).copy()
+        arrays.append(array)
+        position += array.nbytes
+    doc_offsets, starts, ends, labels = arrays
+    return SpanBatch(starts, ends, labels, doc_offsets, layout["label_names"])
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def _init_worker(model: str, threads: int, batch_size: int, disable: Sequence[str]) -> None:
+    from hyperparameter_sweep import limit_threads
+
+    limit_threads(threads)
+    import spacy
+
+    from managed_model import ManagedModel
+
+    global _nlp, _batch_size
+    _nlp = ManagedModel(spacy.load(model, disable=list(disable)))
+    _batch_size = batch_size
+
+
+def _pickle_task(texts: List[str]) -> List[List[Dict]]:
+    from pii_pipeline import predict_many
+
+    return predict_many(_nlp, texts, batch_size=_batch_size)
+
+
+def _shm_task(name: str, n_texts: int) -> Tuple[str, Dict]:
+    from pii_pipeline import predict_spans
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        texts = read_texts(block, n_texts)
+    finally:
+        block.close()
+    result, layout = write_spans(predict_spans(_nlp, texts, batch_size=_batch_size))
+    # The parent unlinks the result block once it has read it
+    result.close()
+    return result.name, layout
+
+
+# -----------------------------
+# Parent side
+# -----------------------------
+def split_tasks(texts: Sequence[str], task_chars: int) -> List[Tuple[int, int]]:
+    """``[start, end)`` ranges of consecutive texts of about ``task_chars`` characters each."""
+    ranges, start, size = [], 0, 0
+    for i, text in enumerate(texts):
+        if size and size + len(text) > task_chars:
+            ranges.append((start, i))
+            start, size = i, 0
+        size += len(text)
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+class WorkerPool:
+    """See the module docstring. ``stats`` counts tasks and the bytes of shared memory used."""
+
+    def __init__(self, model: str, workers: int = 2, transport: str = "shm", threads_per_worker: int = 1,
+                 batch_size: int = DEFAULT_BATCH_SIZE, task_chars: int = DEFAULT_TASK_CHARS,
+                 disable: Sequence[str] = ()):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport '{transport}'. Choose from {TRANSPORTS}.")
+        self.transport = transport
+        self.task_chars = task_chars
+        self.stats = {"tasks": 0, "shm_bytes": 0}
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(model, threads_per_worker, batch_size, tuple(disable)),
+        )
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def warm_up(self, workers: int) -> None:
+        """Make sure every worker has loaded the model before timing anything."""
+        list(self._pool.map(_pickle_task, [["warm up"]] * workers * 2))
+
+    def predict_spans(self, texts: Sequence[str]) -> SpanBatch:
+        texts = list(texts)
+        ranges = split_tasks(texts, self.task_chars)
+        self.stats["tasks"] += len(ranges)
+        if self.transport == "pickle":
+            futures = [self._pool.submit(_pickle_task, texts[start:end]) for start, end in ranges]
+            return SpanBatch.concat([SpanBatch.from_entity_lists(future.result()) for future in futures])
+
+        blocks, futures, batches = [], [], []
+        try:
+            for start, end in ranges:
+                blocks.append(write_texts(texts[start:end]))
+                futures.append(self._pool.submit(_shm_task, blocks[-1].name, end - start))
+            for block, future in zip(blocks, futures):
+                name, layout = future.result()
+                result = shared_memory.SharedMemory(name=name)
+                try:
+                    batches.append(read_spans(result, layout))
+                    self.stats["shm_bytes"] += block.size + result.size
+                finally:
+                    result.close()
+                    result.unlink()
+        except BaseException:
+            # Drop the queued tasks, and unlink the result blocks of the ones that finished
+            # (or were still running) and whose results were not read
+            for future in futures[len(batches):]:
+                future.cancel()
+            for future in futures[len(batches):]:
+                if not future.cancelled():
+                    _discard_result(future)
+            raise
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return SpanBatch.concat(batches)
+
+
+def pipe_bytes(transport: str, texts: Sequence[str], batch: SpanBatch, task_chars: int = DEFAULT_TASK_CHARS) -> int:
+    """
+    Bytes pickled through the pipes by ``predict_spans(texts)`` (which returned ``batch``).
+    Recomputed after the run, so the benchmark does not time the extra pickling.
+    """
+    texts, total = list(texts), 0
+    for start, end in split_tasks(texts, task_chars):
+        if transport == "pickle":
+            # The texts out, the entity dicts back
+            entity_lists = [batch[i].to_dicts(texts[i]) for i in range(start, end)]
+            total += len(pickle.dumps(texts[start:end], pickle.HIGHEST_PROTOCOL))
+            total += len(pickle.dumps(entity_lists, pickle.HIGHEST_PROTOCOL))
+        else:
+            # Block names and the result layout; SHM_NAME has the length of a generated name
+            layout = {"docs": end - start, "spans": int(batch.doc_offsets[end] - batch.doc_offsets[start]),
+                      "label_names": list(batch.label_names)}
+            total += len(pickle.dumps((SHM_NAME, end - start))) + len(pickle.dumps((SHM_NAME, layout)))
+    return total
+
+
+def _discard_result(future) -> None:
+    """Wait for a ``_shm_task`` and unlink its result block without reading it."""
+    try:
+        name, _ = future.result()
+        block = shared_memory.SharedMemory(name=name)
+    except BaseException:  # the task failed (no block) or the block is already gone
+        return
+    block.close()
+    block.unlink()
+
+
+def main(argv=None):
+    import pandas as pd
+
+    from budget_batching import mixed_workload
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="Testing_Set.csv")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--model", default="PII Model")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20, help="Repeat the rows this many times")
+    parser.add_argument("--long-docs", type=int, default=0, help="Long documents (e.g. PDF text) mixed in")
+    parser.add_argument("--long-doc-chars", type=int, default=100_000)
+    parser.add_argument("--task-chars", type=int, default=DEFAULT_TASK_CHARS)
+    parser.add_argument("--tokenizer-only", action="store_true", help="Disable 'ner' to expose the transport cost")
+    parser.add_argument("--transports", nargs="+", default=list(TRANSPORTS), choices=TRANSPORTS)
+    parser.add_argument("--output", default="worker_pool_report.csv")
+    args = parser.parse_args(argv)
+
+    rows = pd.read_csv(args.data)[args.text_col].astype(str).tolist() * args.repeat
+    texts = mixed_workload(rows, args.long_docs, args.long_doc_chars)
+    disable = ("ner",) if args.tokenizer_only else ()
+    print(f"{len(texts)} documents, {sum(map(len, texts)):,} characters, {args.workers} worker(s)")
+
+    results, outputs = [], {}
+    for transport in args.transports:
+        with WorkerPool(args.model, args.workers, transport, args.threads_per_worker,
+                        task_chars=args.task_chars, disable=disable) as pool:
+            pool.warm_up(args.workers)
+            pool.stats = {"tasks": 0, "shm_bytes": 0}
+            start = time.perf_counter()
+            batch = pool.predict_spans(texts)
+            seconds = time.perf_counter() - start
+        outputs[transport] = batch.to_json_rows()
+        results.append({"transport": transport, "docs": len(texts), "entities": batch.n_spans, "seconds": seconds,
+                        "docs_per_second": len(texts) / seconds, **pool.stats,
+                        "pipe_bytes": pipe_bytes(transport, texts, batch, args.task_chars)})
+    report = pd.DataFrame(results)
+    report.to_csv(args.output, index=False)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    if len(outputs) > 1:
+        first, *others = outputs.values()
+        print("Identical output:", all(other == first for other in others))
+
+
+if __name__ == "__main__":
+    main()
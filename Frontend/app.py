@@ -1,39 +1,40 @@
-import json
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Tuple
-import html
+from typing import Callable, List, Dict, Optional, Tuple
 
 import streamlit as st
 import pandas as pd
 import spacy
 
+# Shared pipeline modules live next to the training code
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Code"))
+
+from batch_io import DEFAULT_CHUNKSIZE, SUPPORTED_EXTENSIONS, list_table_files  # noqa: E402
+from budget_batching import DEFAULT_BATCH_CHARS, BudgetBatcher  # noqa: E402
+from highlighting import (  # noqa: E402
+    DEFAULT_PAGE_CHARS, entities_in_window, filter_labels, page_bounds, render_highlighted,
+)
+from managed_model import ManagedModel  # noqa: E402
+from model_registry import HotSwapModel, ModelRegistry, is_registry, lease, model_version  # noqa: E402
+from pii_index import SALT_ENV_VAR, PiiIndexWriter, load_salt  # noqa: E402
+from pii_pipeline import anonymize, output_columns, predict, process_tables  # noqa: E402
+from output_writer import COMPRESSIONS, MIME_TYPES, SUFFIXES, ChunkedCsvWriter, output_filename  # noqa: E402
+from pdf_extract import BACKENDS, available_backends, extract_pdf_text  # noqa: E402
+from prefilter import DEFAULT_PREFILTER, build_prefilter  # noqa: E402
+from profiling import DEFAULT_PROFILE_DIR, MODES as PROFILE_MODES, profiled  # noqa: E402
+from span_resolver import POLICIES, resolve_entities  # noqa: E402
+from surrogates import KEY_ENV_VAR, SurrogateGenerator  # noqa: E402
+
 # -----------------------------
 # Config
 # -----------------------------
 st.set_page_config(page_title="PII Detection & Anonymization", layout="wide")
 
-LABEL_COLORS = {
-    "name": "#E74C3C",
-    "email": "#3498DB",
-    "phone": "#9B59B6",
-    "address": "#16A085",
-    "credit_card": "#F39C12",
-    "company": "#2ECC71",
-    "url": "#1ABC9C",
-    "ssn": "#E67E22",
-}
-
-REPLACEMENTS = {
-    "name": "[NAME REDACTED]",
-    "email": "[EMAIL REDACTED]",
-    "phone": "[PHONE REDACTED]",
-    "address": "[ADDRESS REDACTED]",
-    "credit_card": "[CREDIT CARD REDACTED]",
-    "company": "[COMPANY REDACTED]",
-    "url": "[URL REDACTED]",
-    "ssn": "[SSN REDACTED]",
-}
-
 # -----------------------------
 # Helpers
 # -----------------------------
@@ -41,82 +42,170 @@ REPLACEMENTS = {
 def load_model(model_path: Path):
     if not model_path.exists():
         raise FileNotFoundError(f"Model directory not found: {model_path}")
-    return spacy.load(str(model_path))
-
-
-def predict(nlp, text: str) -> List[Dict]:
-    doc = nlp(text)
-    ents = []
-    for ent in doc.ents:
-        ents.append({
-            "start": ent.start_char,
-            "end": ent.end_char,
-            "label": ent.label_.lower(),
-            "text": ent.text,
-        })
-    return ents
-
-
-def anonymize(text: str, ents: List[Dict]) -> str:
-    # replace from end to start to keep spans stable
-    out = text
-    for ent in sorted(ents, key=lambda e: e["start"], reverse=True):
-        label = ent["label"].lower()
-        replacement = REPLACEMENTS.get(label, "[REDACTED]")
-        out = out[: ent["start"]] + replacement + out[ent["end"] :]
-    return out
-
-
-def render_highlighted(text: str, ents: List[Dict]) -> str:
-    # Build HTML with colored spans
-    parts = []
-    last = 0
-    for ent in sorted(ents, key=lambda e: e["start"]):
-        color = LABEL_COLORS.get(ent["label"].lower(), "#BDC3C7")
-        parts.append(html.escape(text[last:ent["start"]]))
-        span = f"<span style='background-color:{color}; padding:2px 4px; border-radius:3px;' title='{ent['label']}'>{html.escape(text[ent['start']:ent['end']])}</span>"
-        parts.append(span)
-        last = ent["end"]
-    parts.append(html.escape(text[last:]))
-    return "".join(parts)
-
-
-def extract_pdf_text(file) -> str:
+    if is_registry(model_path):
+        # Follow the registry's current version; new versions are loaded and swapped in the background
+        return HotSwapModel(ModelRegistry(str(model_path))).start()
+    # The model lives as long as the server: keep its vocab and memory bounded
+    return ManagedModel(spacy.load(str(model_path)))
+
+
+@st.cache_resource(show_spinner=False)
+def load_surrogates(key: str) -> SurrogateGenerator:
+    # One generator per key, so its LRU cache survives reruns
+    return SurrogateGenerator(key.encode("utf-8"))
+
+
+def show_document(key: str, text: str, ents: List[Dict], policy: str, page_chars: int = DEFAULT_PAGE_CHARS,
+                  show_table: bool = True, do_anonymize: bool = True, replace: Optional[Callable] = None) -> None:
     """
-    Extract text from a PDF UploadedFile or path-like using pdfplumber if available,
-    falling back to PyPDF2. Returns a single concatenated string.
+    Render one page of a document at a time: highlighted text, its entities table and its
+    anonymized text. Label filtering and paging happen here, so the browser only receives
+    the visible page.
     """
-    text = ""
-    # Try pdfplumber first
-    try:
-        import pdfplumber  # type: ignore
-        try:
-            # Ensure file pointer at start
-            if hasattr(file, "seek"):
-                file.seek(0)
-            with pdfplumber.open(file) as pdf:
-                for page in pdf.pages:
-                    t = page.extract_text() or ""
-                    text += t + "\n"
-            if text.strip():
-                return text
-        except Exception:
-            pass
-    except Exception:
-        pass
-
-    # Fallback: PyPDF2
-    try:
-        from PyPDF2 import PdfReader  # type: ignore
-        if hasattr(file, "seek"):
-            file.seek(0)
-        reader = PdfReader(file)
-        for page in reader.pages:
-            t = page.extract_text() or ""
-            text += t + "\n"
-        return text
-    except Exception as e:
-        raise RuntimeError(f"Failed to read PDF: {e}")
+    resolved = resolve_entities(ents, policy=policy)
+    present_labels = sorted({e["label"] for e in resolved})
+    selected_labels = st.multiselect(
+        "Show labels", present_labels, default=present_labels, key=f"{key}_labels",
+    )
+    bounds = page_bounds(text, resolved, page_chars)
+    page = 1
+    if len(bounds) > 1:
+        page = st.number_input(
+            f"Page (of {len(bounds)})", min_value=1, max_value=len(bounds), value=1, step=1, key=f"{key}_page",
+        )
+    start, end = bounds[int(page) - 1]
+    page_ents = entities_in_window(resolved, [e["start"] for e in resolved], start, end)
+    shown_ents = filter_labels(page_ents, selected_labels)
+    st.caption(f"Characters {start:,}–{end:,} of {len(text):,}; {len(shown_ents)} of {len(resolved)} entities on this page.")
+
+    # Highlighted view
+    st.markdown("**Detected Entities (highlighted):**")
+    st.markdown(render_highlighted(text, shown_ents, start, end), unsafe_allow_html=True)
+
+    # Table
+    if show_table and shown_ents:
+        st.dataframe(pd.DataFrame(shown_ents))
+
+    # Anonymized (all labels, regardless of the view filter)
+    if do_anonymize and page_ents:
+        shifted = [{**e, "start": e["start"] - start, "end": e["end"] - start} for e in page_ents]
+        st.markdown("**Anonymized Text:**")
+        st.code(anonymize(text[start:end], shifted, policy, replace))
+
+
+def show_prefilter_stats(stats: Counter) -> None:
+    if stats["rows"]:
+        st.caption(f"Pre-filter skipped {stats['skipped']} of {stats['rows']} text cells "
+                   f"({stats['skipped'] / stats['rows']:.1%}) without running the model.")
+
+
+def new_output_path(stem: str) -> Path:
+    """Output file for a batch run: in the chosen output folder, or a fresh temporary file."""
+    name = output_filename(stem, output_compression)
+    if output_folder:
+        folder = Path(output_folder).expanduser()
+        folder.mkdir(parents=True, exist_ok=True)
+        return folder / name
+    # Replace the previous run's temporary file
+    previous = st.session_state.pop("batch_output_tmp", None)
+    if previous:
+        Path(previous).unlink(missing_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{stem}_", suffix=SUFFIXES[output_compression])
+    os.close(fd)
+    st.session_state["batch_output_tmp"] = tmp_path
+    return Path(tmp_path)
+
+
+def new_profile_dir() -> Path:
+    """Profile folder for a batch run: ``Profiles`` in the output folder, or a fresh temporary folder."""
+    # Replace the previous run's temporary profiles
+    previous = st.session_state.pop("batch_profile_tmp", None)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    if output_folder:
+        return Path(output_folder).expanduser() / DEFAULT_PROFILE_DIR
+    tmp_dir = tempfile.mkdtemp(prefix="pii_profile_")
+    st.session_state["batch_profile_tmp"] = tmp_dir
+    return Path(tmp_dir)
+
+
+def new_batcher() -> BudgetBatcher:
+    return BudgetBatcher(int(batch_chars), rss_limit_mb=float(rss_limit_mb) or None)
+
+
+def run_batch_job(sources: List, text_col: Optional[str], stem: str, preview_rows: int = 50) -> None:
+    """Stream ``sources`` through the pipeline into an output file, chunk by chunk."""
+    profiles = []
+    prefilter_stats = Counter()
+    preview = []
+    out_path = new_output_path(stem)
+    # The whole job runs on one model version, even if a new one is swapped in meanwhile
+    job = lease(nlp)
+    profile = contextlib.nullcontext({})
+    if profile_mode != "off":
+        profile = profiled(f"{stem}_profile", str(new_profile_dir()), profile_mode, profile_memory)
+    # Postings are appended to the index as the chunks finish
+    index = PiiIndexWriter(index_folder, load_salt()) if index_folder else contextlib.nullcontext()
+    with job as (version, job_nlp), profile as profile_files, index, \
+            ChunkedCsvWriter(str(out_path), compression=output_compression,
+                             columns=output_columns(sources, text_col)) as writer:
+        for _, chunk in process_tables(
+            job_nlp, sources, text_col=text_col, policy=overlap_policy, chunksize=int(chunk_rows),
+            on_profile=lambda name, profile: profiles.append((name, profile)),
+            prefilter=prefilter, stats=prefilter_stats, batcher=new_batcher(), replace=replacer,
+            on_spans=index.add if index_folder else None,
+        ):
+            writer.write(chunk)
+            if sum(len(p) for p in preview) < preview_rows:
+                preview.append(chunk.head(preview_rows))
+
+    st.success(f"Processed {writer.rows} rows from {len(sources)} file(s)"
+               + (f" with model {version}." if version else "."))
+    show_prefilter_stats(prefilter_stats)
+    show_column_profiles(profiles)
+    if writer.dropped_columns:
+        st.warning(f"Columns left out of the output: {sorted(writer.dropped_columns)}")
+    if preview:
+        st.dataframe(pd.concat(preview, ignore_index=True).head(preview_rows))
+
+    if index_folder:
+        st.info(f"Hashed PII index updated in {index_folder} (query it with 'python pii_index.py query').")
+    if output_folder:
+        st.info(f"Results written to {out_path} ({out_path.stat().st_size:,} bytes).")
+    else:
+        with open(out_path, "rb") as f:
+            st.download_button(
+                "Download results",
+                data=f,
+                file_name=output_filename(stem, output_compression),
+                mime=MIME_TYPES[output_compression],
+            )
+    if profile_files:
+        show_run_profile(profile_files)
+
+
+def show_run_profile(files: Dict[str, str]) -> None:
+    with st.expander("Run profile"):
+        if output_folder:
+            st.caption(f"Profile files: {', '.join(files.values())}")
+        else:
+            st.caption("Profile files are temporary and removed at the next run; download them to keep them.")
+        summary = Path(files["summary"]).read_text(encoding="utf-8")
+        st.code(summary, language=None)
+        st.download_button("Download summary", data=summary, file_name=Path(files["summary"]).name,
+                           mime="text/plain")
+        stack_file = files.get("collapsed") or files.get("pstats")
+        with open(stack_file, "rb") as f:
+            st.download_button(
+                "Download flamegraph stacks" if "collapsed" in files else "Download cProfile stats",
+                data=f, file_name=Path(stack_file).name, mime="application/octet-stream",
+            )
+
+
+def show_column_profiles(profiles: List[Tuple[str, Dict[str, Dict]]]) -> None:
+    for name, profile in profiles:
+        with st.expander(f"Column profile: {name}"):
+            st.dataframe(pd.DataFrame.from_dict(profile, orient="index"))
 
 
 # -----------------------------
@@ -141,17 +230,94 @@ with st.sidebar:
     st.caption("Train the model first using the Code script, which saves to 'PII Model'.")
 
     st.header("Batch Processing")
-    st.caption("Upload one or more CSVs with a 'text' column OR process a local folder of CSVs.")
-    batch_files = st.file_uploader("CSV file(s)", type=["csv"], accept_multiple_files=True)
+    st.caption("Upload one or more CSV, XLSX or Parquet files with a 'text' column OR process a local folder of them.")
+    batch_files = st.file_uploader(
+        "CSV / XLSX / Parquet file(s)",
+        type=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
+        accept_multiple_files=True,
+    )
+    # Like the folder mode, uploads run only on request: a rerun must not write the output
+    # (and the PII index) again
+    run_uploads = st.button("Process uploaded files", disabled=not batch_files)
+    chunk_rows = st.number_input(
+        "Rows per chunk",
+        min_value=100,
+        value=DEFAULT_CHUNKSIZE,
+        step=1000,
+        help="Files are streamed and processed this many rows at a time.",
+    )
+    batch_chars = st.number_input(
+        "Characters per model batch",
+        min_value=1000,
+        value=DEFAULT_BATCH_CHARS,
+        step=10000,
+        help="Texts are batched for the model by total size; very long documents are split.",
+    )
+    rss_limit_mb = st.number_input(
+        "Memory ceiling (MB, 0 = none)",
+        min_value=0,
+        value=0,
+        step=256,
+        help="Batches shrink when the app's memory use gets close to this ceiling.",
+    )
+    profile_all_columns = st.checkbox(
+        "Profile all columns",
+        value=False,
+        help="Classify each column as structured PII, free text or non-PII. Structured columns are "
+             "redacted with validators, only free-text columns are sent to the model.",
+    )
+    use_prefilter = st.checkbox(
+        "Skip rows without PII cues",
+        value=False,
+        help="Rows with no capitalized word, digit run, '@' or URL are not sent to the model.",
+    )
+    min_digit_run = st.number_input(
+        "Pre-filter: minimum digit run", min_value=0, value=DEFAULT_PREFILTER["min_digit_run"], step=1,
+        disabled=not use_prefilter,
+    )
 
     st.caption("Or upload PDFs to extract, detect, and anonymize text.")
     pdf_files = st.file_uploader("PDF file(s)", type=["pdf"], accept_multiple_files=True)
+    pdf_backends = st.multiselect(
+        "PDF extractors (in fallback order)",
+        available_backends(list(BACKENDS)),
+        default=available_backends(),
+        help="Each page is read with the first extractor that returns text for it. "
+             "Run 'python pdf_extract.py bench' to compare them on your documents.",
+    )
 
     st.divider()
     st.subheader("Process Local Folder")
-    dataset_folder = st.text_input("Folder path (contains CSV files)", value="", placeholder=r"C:\\path\\to\\dataset")
+    dataset_folder = st.text_input("Folder path (contains CSV / XLSX / Parquet files)", value="", placeholder=r"C:\\path\\to\\dataset")
     text_col_name = st.text_input("Text column name", value="text")
-    run_folder = st.button("Process folder of CSVs")
+    run_folder = st.button("Process folder")
+
+    st.divider()
+    st.subheader("Batch Output")
+    output_compression = st.selectbox(
+        "Compression", COMPRESSIONS, index=COMPRESSIONS.index("gzip"),
+        help="Results are written to disk chunk by chunk; compression shrinks the download.",
+    )
+    output_folder = st.text_input(
+        "Write results to folder (optional)", value="", placeholder=r"C:\\path\\to\\output",
+        help="Write batch results straight into this folder instead of offering a browser download.",
+    )
+    index_folder = st.text_input(
+        "Hashed PII index folder (optional)", value="", placeholder=r"C:\\path\\to\\index",
+        help=f"Add every detected value to a salted-hash index (no raw PII) for 'which documents contained "
+             f"this value?' queries. The salt is read from the {SALT_ENV_VAR} environment variable.",
+    )
+    env_profile = os.environ.get("PII_PROFILE", "").lower()
+    profile_mode = st.selectbox(
+        "Profile batch runs", ("off", *PROFILE_MODES),
+        index=1 + PROFILE_MODES.index(env_profile) if env_profile in PROFILE_MODES else 0,
+        help="Write a flamegraph stack file (sample) or cProfile stats plus a hotspot summary next to the "
+             "results. Defaults to the PII_PROFILE environment variable.",
+    )
+    profile_memory = st.checkbox(
+        "Profile: track allocations", value=os.environ.get("PII_PROFILE_MEMORY") == "1",
+        disabled=profile_mode == "off", help="Trace allocations with tracemalloc (slows the run down).",
+    )
 
 # Load model
 nlp = None
@@ -163,6 +329,17 @@ if model_dir_input:
 else:
     st.warning("Please provide a model directory.")
 
+if nlp is not None:
+    model_metrics = nlp.metrics()
+    if "version" in model_metrics:
+        st.sidebar.caption(f"Model version {model_metrics['version']}"
+                           + (f" (loading {model_metrics['loading']})" if model_metrics["loading"] else ""))
+    st.sidebar.caption(f"Model: {model_metrics['docs']:,} documents, {model_metrics['vocab']:,} lexemes, "
+                       f"{model_metrics['reloads']} reload(s)"
+                       + (f", RSS {model_metrics['rss_mb']:.0f} MB" if model_metrics["rss_mb"] else ""))
+
+prefilter = build_prefilter({"min_digit_run": int(min_digit_run)}) if use_prefilter else None
+
 col1, col2 = st.columns([1, 1])
 
 with col1:
@@ -178,63 +355,62 @@ with col2:
     st.subheader("Options")
     show_table = st.checkbox("Show entities table", value=True)
     do_anonymize = st.checkbox("Anonymize detected PII", value=True)
+    overlap_policy = st.selectbox(
+        "Overlap resolution",
+        POLICIES,
+        help="How overlapping entities are resolved before highlighting and anonymizing.",
+    )
+    replacement_mode = st.radio(
+        "Replace PII with", ("Placeholders", "Consistent surrogates"), horizontal=True,
+        help="Surrogates are format-preserving fake values derived from a secret key: the same real value "
+             "always gets the same surrogate, so joins across documents keep working.",
+    )
+    surrogate_key = ""
+    if replacement_mode == "Consistent surrogates":
+        surrogate_key = st.text_input(
+            "Surrogate key", value=os.environ.get(KEY_ENV_VAR, ""), type="password",
+            help=f"At least 16 characters; defaults to the {KEY_ENV_VAR} environment variable. "
+                 "Use the same key everywhere to get the same surrogates.",
+        )
+    page_chars = st.number_input(
+        "Characters per page",
+        min_value=500,
+        value=DEFAULT_PAGE_CHARS,
+        step=500,
+        help="Long documents are rendered one page at a time.",
+    )
 
+replacer = None
+if surrogate_key:
+    try:
+        replacer = load_surrogates(surrogate_key)
+    except ValueError as e:
+        st.error(str(e))
+
+# Keep the last result across reruns so paging and filtering don't rerun the model. Cached
+# results are tagged with the model version and recomputed once a new version is active.
+current_version = model_version(nlp) if nlp is not None else None
+if nlp and "single_result" in st.session_state and st.session_state["single_result"][2] != current_version:
+    run, sample_text = True, st.session_state["single_result"][0]
 if run and sample_text and nlp:
-    ents = predict(nlp, sample_text)
+    st.session_state["single_result"] = (sample_text, predict(nlp, sample_text), current_version)
+
+if "single_result" in st.session_state and nlp:
+    single_text, ents, _ = st.session_state["single_result"]
 
     if len(ents) == 0:
         st.info("No entities detected.")
 
-    # Highlighted view
-    st.markdown("**Detected Entities (highlighted):**")
-    st.markdown(render_highlighted(sample_text, ents), unsafe_allow_html=True)
-
-    # Table
-    if show_table and ents:
-        st.dataframe(pd.DataFrame(ents))
-
-    # Anonymized
-    if do_anonymize and ents:
-        anon = anonymize(sample_text, ents)
-        st.markdown("**Anonymized Text:**")
-        st.code(anon)
+    show_document("single", single_text, ents, overlap_policy, int(page_chars), show_table, do_anonymize, replacer)
 
 st.divider()
 
 # Batch processing (uploaded files)
-if batch_files and nlp:
+if run_uploads and batch_files and nlp:
     try:
-        dfs = []
-        for f in batch_files:
-            try:
-                dfs.append(pd.read_csv(f))
-            except UnicodeDecodeError:
-                f.seek(0)
-                dfs.append(pd.read_csv(f, encoding="latin-1"))
-        df = pd.concat(dfs, ignore_index=True)
-        if "text" not in df.columns:
-            st.error("CSV must contain a 'text' column. You can also use the folder mode and specify a custom column name.")
-        else:
-            results = []
-            anonymized = []
-            for t in df["text"].astype(str).tolist():
-                ents = predict(nlp, t)
-                results.append(json.dumps(ents, ensure_ascii=False))
-                anonymized.append(anonymize(t, ents))
-            out_df = df.copy()
-            out_df["predictions"] = results
-            out_df["anonymized_text"] = anonymized
-
-            st.success(f"Processed {len(out_df)} rows from {len(batch_files)} file(s).")
-            st.dataframe(out_df.head(50))
-
-            csv_bytes = out_df.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                "Download results CSV",
-                data=csv_bytes,
-                file_name="pii_results.csv",
-                mime="text/csv",
-            )
+        run_batch_job(batch_files, None if profile_all_columns else "text", "pii_results")
+    except KeyError:
+        st.error("Files must contain a 'text' column. You can also use the folder mode and specify a custom column name.")
     except Exception as e:
         st.error(f"Batch processing failed: {e}")
 
@@ -245,62 +421,44 @@ if run_folder and nlp:
         if not p.exists() or not p.is_dir():
             st.error("Folder not found or not a directory.")
         else:
-            import glob
-            csv_paths = sorted(glob.glob(str(p / "*.csv")))
-            if not csv_paths:
-                st.error("No CSV files found in the folder.")
+            table_paths = list_table_files(p)
+            if not table_paths:
+                st.error("No CSV, XLSX or Parquet files found in the folder.")
             else:
-                dfs = []
-                for path in csv_paths:
-                    try:
-                        dfs.append(pd.read_csv(path))
-                    except UnicodeDecodeError:
-                        dfs.append(pd.read_csv(path, encoding="latin-1"))
-                df = pd.concat(dfs, ignore_index=True)
-                if text_col_name not in df.columns:
-                    st.error(f"Column '{text_col_name}' not found. Available columns: {list(df.columns)}")
-                else:
-                    results = []
-                    anonymized = []
-                    for t in df[text_col_name].astype(str).tolist():
-                        ents = predict(nlp, t)
-                        results.append(json.dumps(ents, ensure_ascii=False))
-                        anonymized.append(anonymize(t, ents))
-                    out_df = df.copy()
-                    out_df["predictions"] = results
-                    out_df["anonymized_text"] = anonymized
-
-                    st.success(f"Processed {len(out_df)} rows from {len(csv_paths)} CSV file(s).")
-                    st.dataframe(out_df.head(50))
-
-                    csv_bytes = out_df.to_csv(index=False).encode("utf-8")
-                    st.download_button(
-                        "Download results CSV",
-                        data=csv_bytes,
-                        file_name="pii_results_folder.csv",
-                        mime="text/csv",
-                    )
+                try:
+                    run_batch_job(table_paths, None if profile_all_columns else text_col_name, "pii_results_folder")
+                except KeyError as e:
+                    st.error(e.args[0])
     except Exception as e:
         st.error(f"Folder processing failed: {e}")
 
 # PDF processing (uploaded PDFs)
 if 'pdf_files' in locals() and pdf_files and nlp:
     try:
+        pdf_results = st.session_state.setdefault("pdf_results", {})
+        # Forget results for files that are no longer uploaded
+        current_keys = {(getattr(f, "file_id", f.name), tuple(pdf_backends), current_version) for f in pdf_files}
+        for stale in set(pdf_results) - current_keys:
+            del pdf_results[stale]
         for updf in pdf_files:
-            try:
-                pdf_text = extract_pdf_text(updf)
-            except Exception as e:
-                st.error(f"Failed to read {updf.name}: {e}")
-                continue
+            file_id = getattr(updf, "file_id", updf.name)
+            pdf_key = (file_id, tuple(pdf_backends), current_version)
+            if pdf_key not in pdf_results:
+                try:
+                    pdf_text = extract_pdf_text(updf, pdf_backends or None)
+                except Exception as e:
+                    st.error(f"Failed to read {updf.name}: {e}")
+                    continue
+                pdf_results[pdf_key] = (pdf_text, predict(nlp, pdf_text, new_batcher()) if pdf_text.strip() else [])
+            pdf_text, ents = pdf_results[pdf_key]
             if not pdf_text or not pdf_text.strip():
                 st.warning(f"No extractable text found in {updf.name}.")
                 continue
-            ents = predict(nlp, pdf_text)
-            anon = anonymize(pdf_text, ents)
+            anon = anonymize(pdf_text, ents, overlap_policy, replacer)
 
             with st.expander(f"PDF: {updf.name} – {len(ents)} entities detected"):
-                st.markdown("**Preview (first 1500 chars, anonymized):**")
-                st.code(anon[:1500] + ("..." if len(anon) > 1500 else ""))
+                show_document(f"pdf_{file_id}", pdf_text, ents, overlap_policy, int(page_chars), show_table,
+                              do_anonymize, replacer)
                 st.markdown("**Download anonymized full text:**")
                 st.download_button(
                     label=f"Download {updf.name}.anonymized.txt",